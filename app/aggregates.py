@@ -0,0 +1,82 @@
+"""
+Recompute loan_aggregates from the loans table.
+
+The table is maintained incrementally on every loan write; this rebuilds it
+from scratch, or with --verify only reports where it has drifted.
+
+    python -m app.aggregates [--verify]
+"""
+import argparse
+import sys
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from .database import engine as default_engine
+from .models import Loan, LoanAggregate, AggregateDeltas
+
+BATCH_SIZE = 10000
+
+
+def compute_aggregates(db: Session) -> dict[tuple, tuple]:
+    """Scan loans once and return {(status, loan_type, month): (count, total_amount, total_emi)}."""
+    deltas = AggregateDeltas()
+    rows = db.execute(
+        select(Loan.status, Loan.loan_type, Loan.applied_at, Loan.amount, Loan.emi)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for row in rows:
+        deltas.add(*row)
+    return {
+        (row["status"], row["loan_type"], row["month"]): (row["loan_count"], row["total_amount"], row["total_emi"])
+        for row in deltas.rows()
+    }
+
+
+def stored_aggregates(db: Session) -> dict[tuple, tuple]:
+    return {
+        (row.status, row.loan_type, row.month): (row.loan_count, row.total_amount, row.total_emi)
+        for row in db.query(LoanAggregate).filter(LoanAggregate.loan_count != 0)
+    }
+
+
+def rebuild_aggregates(db: Session) -> int:
+    """Replace loan_aggregates with freshly computed rows in one transaction; returns the group count."""
+    expected = compute_aggregates(db)
+    db.execute(delete(LoanAggregate))
+    if expected:
+        db.execute(insert(LoanAggregate), [
+            {"status": status, "loan_type": loan_type, "month": month,
+             "loan_count": count, "total_amount": amount, "total_emi": emi}
+            for (status, loan_type, month), (count, amount, emi) in expected.items()
+        ])
+    db.commit()
+    return len(expected)
+
+
+def verify_aggregates(db: Session) -> list[dict]:
+    """Groups whose stored totals differ from a fresh computation."""
+    expected = compute_aggregates(db)
+    stored = stored_aggregates(db)
+    return [
+        {"group": key, "stored": stored.get(key), "expected": expected.get(key)}
+        for key in sorted(expected.keys() | stored.keys())
+        if stored.get(key) != expected.get(key)
+    ]
+
+
+def main(argv=None, engine=default_engine) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verify", action="store_true", help="Report drift without rewriting the table")
+    args = parser.parse_args(argv)
+    with Session(engine) as db:
+        if not args.verify:
+            print(f"Rebuilt {rebuild_aggregates(db)} loan aggregate groups")
+            return 0
+        mismatches = verify_aggregates(db)
+    for mismatch in mismatches:
+        print(f"{mismatch['group']}: stored {mismatch['stored']}, expected {mismatch['expected']}")
+    print(f"{len(mismatches)} loan aggregate groups differ")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Audit trail of state-changing actions.
+
+Routes call record() after they commit. It only appends to an in-memory
+ring buffer of AUDIT_BUFFER_SIZE entries, so auditing adds no database
+write to the request. A flusher thread drains the buffer every
+AUDIT_FLUSH_INTERVAL_SECONDS, or sooner once AUDIT_FLUSH_BATCH entries are
+waiting, and hands each batch to the configured sinks: "database" bulk
+inserts into audit_entries, which GET /auditors/audit queries, and "files"
+appends gzip-compressed JSON lines to segment files under
+AUDIT_SEGMENT_DIRECTORY, starting a new segment past AUDIT_SEGMENT_MAX_BYTES.
+
+If writes fall so far behind that the buffer fills, the oldest entries are
+overwritten and counted in audit_dropped_total. A sink that fails keeps its
+own backlog, bounded the same way, and is retried on the next flush; the
+other sinks never see a batch twice.
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import insert
+from .config import settings
+from .database import SessionLocal
+from .models import AuditEntry
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseSink:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def write(self, entries: list[dict]) -> None:
+        rows = [{**entry, "detail": json.dumps(entry["detail"]) if entry["detail"] else None} for entry in entries]
+        with self.session_factory() as db:
+            db.execute(insert(AuditEntry), rows)
+            db.commit()
+
+
+class SegmentSink:
+    """Rotating gzip JSONL files; each batch is appended as one gzip member."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.path: Optional[Path] = None
+
+    def _next_path(self) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # The pid keeps worker processes off each other's segments
+        return self.directory / f"audit-{datetime.utcnow():%Y%m%dT%H%M%S%f}-{os.getpid()}.jsonl.gz"
+
+    def write(self, entries: list[dict]) -> None:
+        if self.path is None:
+            self.path = self._next_path()
+        data = "".join(json.dumps({**entry, "at": entry["at"].isoformat()}) + "\n" for entry in entries)
+        with gzip.open(self.path, "ab") as segment:
+            segment.write(data.encode())
+        if self.path.stat().st_size >= self.max_bytes:
+            self.path = None
+
+
+def build_sinks() -> list:
+    sinks = []
+    for name in settings.audit_sinks:
+        if name == "database":
+            sinks.append(DatabaseSink())
+        elif name == "files":
+            sinks.append(SegmentSink(settings.audit_segment_directory, settings.audit_segment_max_bytes))
+        else:
+            raise ValueError(f"Unknown audit sink {name!r}")
+    return sinks
+
+
+class AuditLog:
+    def __init__(self, capacity: int, sinks: list):
+        self.sinks = sinks
+        self.dropped = 0
+        self._buffer: deque = deque(maxlen=capacity)
+        # Entries a sink failed to take, keyed by sink and retried ahead of newer ones
+        self._backlog: dict = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def __len__(self) -> int:
+        """Entries not yet written to every sink."""
+        return len(self._buffer) + max(map(len, self._backlog.values()), default=0)
+
+    def record(
+        self, actor_type: str, actor_id: Optional[int], action: str, resource_type: str,
+        resource_id=None, **detail,
+    ) -> None:
+        """Buffer an entry; detail must be JSON-serializable."""
+        entry = {
+            "at": datetime.utcnow(), "actor_type": actor_type, "actor_id": actor_id, "action": action,
+            "resource_type": resource_type, "resource_id": None if resource_id is None else str(resource_id),
+            "detail": detail,
+        }
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(entry)
+            waiting = len(self._buffer)
+        if settings.audit_flush_interval_seconds > 0:
+            if self._thread is None:
+                self._ensure_started()
+            if waiting >= settings.audit_flush_batch:
+                self._wake.set()
+
+    def flush(self) -> int:
+        """
+        Write everything buffered, and each sink's backlog, to the sinks now.
+
+        Returns the most entries any sink was given; raises the first sink
+        error after every sink has been tried.
+        """
+        with self._flush_lock:
+            with self._lock:
+                entries = list(self._buffer)
+                self._buffer.clear()
+            written, error = 0, None
+            for sink in self.sinks:
+                batch = self._backlog.pop(sink, []) + entries
+                if not batch:
+                    continue
+                try:
+                    sink.write(batch)
+                    written = max(written, len(batch))
+                except Exception as exc:
+                    error = error or exc
+                    # Only this sink retries the batch; past capacity its oldest entries go
+                    overflow = max(0, len(batch) - self._buffer.maxlen)
+                    with self._lock:
+                        self.dropped += overflow
+                    self._backlog[sink] = batch[overflow:]
+            if error is not None:
+                raise error
+            return written
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer.clear()
+        self._backlog.clear()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(timeout=settings.audit_flush_interval_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:  # pragma: no cover - the entries stay buffered for the next attempt
+                logger.exception("Writing the audit log failed")
+
+
+audit_log = AuditLog(settings.audit_buffer_size, build_sinks())
+record = audit_log.record
@@ -5,5 +5,17 @@ from .auth import (
     verify_token,
     get_current_customer,
     get_current_admin,
+    get_customer_principal,
+    get_admin_principal,
+    revoke_tokens,
+    token_claims,
+    lookup_principal,
+    user_cache,
+    token_cache,
+    get_current_customer_async,
+    get_current_admin_async,
+    get_customer_principal_async,
+    get_admin_principal_async,
     oauth2_scheme
-)
\ No newline at end of file
+)
+from .hashing import hash_password, verify_and_update_password, shutdown_hash_pool
\ No newline at end of file
@@ -1,24 +1,34 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import inspect, literal, select, union_all, update
 from sqlalchemy.orm import Session
 from ..config import settings
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..models import Customer, BankAdmin
 from ..schemas.auth import TokenData
-
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+from ..utils.cache import TTLCache
+from ..metrics import jwt_decode_latency
+from .hashing import context_for, current_policy
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Detached copies of recently used customer/admin rows, keyed by (is_admin, id)
+user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds)
+
+# Verified TokenData keyed by a hash of the token; each entry expires at the token's exp
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=float("inf"))
+
+# In-process hashing for scripts and tests; request handlers use the pool in .hashing
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return context_for(current_policy()).verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return context_for(current_policy()).hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -30,42 +40,183 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
+def token_claims(user, is_admin: bool) -> dict:
+    """Claims that let the auth dependencies identify the user without a lookup."""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": "admin" if is_admin else "customer",
+        "ver": user.token_version or 0,
+    }
+
+def lookup_principal(db: Session, email: str):
+    """
+    Find the admin or customer with this email in a single UNION ALL query.
+
+    Returns a row with is_admin, id, email, password_hash and token_version,
+    or None. If both tables have the email, the admin wins.
+    """
+    admins = select(
+        literal(True).label("is_admin"), BankAdmin.id, BankAdmin.email,
+        BankAdmin.password_hash, BankAdmin.token_version,
+    ).where(BankAdmin.email == email)
+    customers = select(
+        literal(False).label("is_admin"), Customer.id, Customer.email,
+        Customer.password_hash, Customer.token_version,
+    ).where(Customer.email == email)
+    query = union_all(admins, customers).subquery()
+    return db.execute(select(query).order_by(query.c.is_admin.desc()).limit(1)).first()
+
 def verify_token(token: str, credentials_exception):  # pragma: no cover
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        with jwt_decode_latency.time():
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
-        is_admin: bool = payload.get("is_admin", False)
+        role = payload.get("role")
+        is_admin: bool = role == "admin" if role else payload.get("is_admin", False)
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email, is_admin=is_admin)
+        token_data = TokenData(
+            email=email,
+            is_admin=is_admin,
+            user_id=payload.get("uid"),
+            token_version=payload.get("ver", 0),
+        )
     except JWTError:
         raise credentials_exception
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(key, token_data, ttl=expires_in)
     return token_data
 
-def get_current_customer(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _detached_copy(user):
+    """Copy a row's column values into a new, session-less instance that is safe to share."""
+    mapper = inspect(user).mapper
+    return mapper.class_(**{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs})
+
+def _load_user(db: Session, model, token_data: TokenData, credentials_exception):
+    """Load the full row for a token, from user_cache when possible, enforcing its token version."""
+    if token_data.user_id is None:
+        # Tokens without a user id are looked up by email and never cached
+        user = db.query(model).filter(model.email == token_data.email).first()
+    else:
+        key = (token_data.is_admin, token_data.user_id)
+        user = user_cache.get(key)
+        if user is None:
+            user = db.get(model, token_data.user_id)
+            if user is not None:
+                user = _detached_copy(user)
+                user_cache.set(key, user)
+    if user is None or (token_data.user_id is not None and user.token_version != token_data.token_version):
+        raise credentials_exception
+    return user
+
+def _with_user_id(token_data: TokenData, user) -> TokenData:
+    if token_data.user_id is None:
+        return token_data.model_copy(update={"user_id": user.id, "token_version": user.token_version})
+    return token_data
+
+def _principal(db: Session, model, token_data: TokenData, credentials_exception) -> TokenData:
+    return _with_user_id(token_data, _load_user(db, model, token_data, credentials_exception))
+
+def get_current_customer(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    credentials_exception = _credentials_exception()
     token_data = verify_token(token, credentials_exception)
     if token_data.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized for customer access")
-    user = db.query(Customer).filter(Customer.email == token_data.email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    return _load_user(db, Customer, token_data, credentials_exception)
 
 def get_current_admin(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    credentials_exception = _credentials_exception()
+    token_data = verify_token(token, credentials_exception)
+    if not token_data.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized for admin access")
+    return _load_user(db, BankAdmin, token_data, credentials_exception)
+
+def get_customer_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> TokenData:
+    """
+    Lightweight identity for routes that only need the customer id.
+
+    Answered from the token plus the cached row, which is only loaded when
+    user_cache misses, so revocations are enforced in every process within
+    USER_CACHE_TTL_SECONDS.
+    """
+    credentials_exception = _credentials_exception()
+    token_data = verify_token(token, credentials_exception)
+    if token_data.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized for customer access")
+    return _principal(db, Customer, token_data, credentials_exception)
+
+def get_admin_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> TokenData:
+    """Lightweight admin identity answered from the token; see get_customer_principal."""
+    credentials_exception = _credentials_exception()
     token_data = verify_token(token, credentials_exception)
     if not token_data.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized for admin access")
-    user = db.query(BankAdmin).filter(BankAdmin.email == token_data.email).first()
-    if user is None:
+    return _principal(db, BankAdmin, token_data, credentials_exception)
+
+def revoke_tokens(db: Session, user, is_admin: bool) -> None:
+    """Invalidate every token issued to user so far by bumping its token version."""
+    model = BankAdmin if is_admin else Customer
+    db.execute(update(model).where(model.id == user.id).values(token_version=model.token_version + 1))
+    db.commit()
+    # Cache the new version so principal-only routes in this process see the revocation
+    fresh = db.get(model, user.id, populate_existing=True)
+    user_cache.set((is_admin, user.id), _detached_copy(fresh))
+
+async def _load_user_async(db, model, token_data: TokenData, credentials_exception):
+    """_load_user for an AsyncSession, sharing user_cache with the sync dependencies."""
+    if token_data.user_id is None:
+        user = await db.scalar(select(model).where(model.email == token_data.email))
+    else:
+        key = (token_data.is_admin, token_data.user_id)
+        user = user_cache.get(key)
+        if user is None:
+            user = await db.get(model, token_data.user_id)
+            if user is not None:
+                user = _detached_copy(user)
+                user_cache.set(key, user)
+    if user is None or (token_data.user_id is not None and user.token_version != token_data.token_version):
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
+
+async def get_current_customer_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)):
+    credentials_exception = _credentials_exception()
+    token_data = verify_token(token, credentials_exception)
+    if token_data.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized for customer access")
+    return await _load_user_async(db, Customer, token_data, credentials_exception)
+
+async def get_current_admin_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)):
+    credentials_exception = _credentials_exception()
+    token_data = verify_token(token, credentials_exception)
+    if not token_data.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized for admin access")
+    return await _load_user_async(db, BankAdmin, token_data, credentials_exception)
+
+async def get_customer_principal_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)) -> TokenData:
+    """get_customer_principal for the async routes."""
+    credentials_exception = _credentials_exception()
+    token_data = verify_token(token, credentials_exception)
+    if token_data.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized for customer access")
+    return _with_user_id(token_data, await _load_user_async(db, Customer, token_data, credentials_exception))
+
+async def get_admin_principal_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)) -> TokenData:
+    """get_admin_principal for the async routes."""
+    credentials_exception = _credentials_exception()
+    token_data = verify_token(token, credentials_exception)
+    if not token_data.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized for admin access")
+    return _with_user_id(token_data, await _load_user_async(db, BankAdmin, token_data, credentials_exception))
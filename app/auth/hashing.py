@@ -0,0 +1,107 @@
+"""
+Password hashing policy and the process pool that runs it.
+
+Hashing is CPU-bound and holds the GIL, so request handlers hand it to a
+dedicated process pool. Admission is bounded: when password_hash_queue_size
+hashes are already queued or running, callers wait up to
+password_hash_queue_timeout seconds and then get a 503.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from ..config import settings
+from ..metrics import password_hash_latency
+
+
+def current_policy() -> tuple:
+    legacy = tuple(s for s in settings.password_hash_legacy_schemes if s != settings.password_hash_scheme)
+    return settings.password_hash_scheme, legacy, settings.password_hash_rounds
+
+
+@lru_cache(maxsize=8)
+def context_for(policy: tuple) -> CryptContext:
+    """CryptContext for a policy; hashes in legacy schemes or with other rounds report needs_update."""
+    scheme, legacy, rounds = policy
+    options = {}
+    if rounds is not None:
+        options = {
+            f"{scheme}__default_rounds": rounds,
+            f"{scheme}__min_rounds": rounds,
+            f"{scheme}__max_rounds": rounds,
+        }
+    return CryptContext(schemes=[scheme, *legacy], deprecated="auto", **options)
+
+
+# These run inside the pool workers, so they take the policy explicitly
+def _hash(policy: tuple, password: str) -> str:
+    return context_for(policy).hash(password)
+
+
+def _verify_and_update(policy: tuple, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return context_for(policy).verify_and_update(password, hashed_password)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.password_hash_queue_size)
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def hash_queue_depth() -> int:
+    """Hashes currently queued or running on the pool, including callers waiting for a slot."""
+    return _in_flight
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the server process has threads running
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.password_hash_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_hash_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _run(fn, *args):
+    global _in_flight
+    if settings.password_hash_workers <= 0:
+        return fn(*args)
+    with _in_flight_lock:
+        _in_flight += 1
+    try:
+        if not _slots.acquire(timeout=settings.password_hash_queue_timeout):
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+        try:
+            return _get_pool().submit(fn, *args).result()
+        finally:
+            _slots.release()
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+def hash_password(password: str) -> str:
+    """Hash password on the pool with the current policy."""
+    with password_hash_latency.time("hash"):
+        return _run(_hash, current_policy(), password)
+
+
+def verify_and_update_password(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify password on the pool; also returns a new hash when the stored one predates the current policy."""
+    with password_hash_latency.time("verify"):
+        return _run(_verify_and_update, current_policy(), password, hashed_password)
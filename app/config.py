@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,5 +6,83 @@ class Settings(BaseSettings):
     secret_key: str = "secret"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Customer/admin rows cached for the auth dependencies; a revoked token is
+    # refused by every process within the TTL
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: float = 60.0
+    # Decoded tokens cached until their exp; 0 disables the cache
+    token_cache_size: int = 10000
 
-settings = Settings()
\ No newline at end of file
+    # Password hashing; stored hashes in legacy schemes or with other rounds
+    # are rehashed on the next successful login
+    password_hash_scheme: str = "pbkdf2_sha256"
+    password_hash_legacy_schemes: list[str] = ["pbkdf2_sha256"]
+    password_hash_rounds: Optional[int] = None  # None keeps passlib's default for the scheme
+    password_hash_workers: int = 2  # Processes in the hashing pool; 0 hashes in the request thread
+    password_hash_queue_size: int = 64  # Hashes queued or running before callers have to wait
+    password_hash_queue_timeout: float = 2.0  # Seconds to wait for a slot before answering 503
+
+    # Connection pool (ignored for in-memory SQLite, which uses a single connection)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # Seconds; -1 never recycles
+    db_pool_pre_ping: bool = True
+
+    # PRAGMAs applied to every new SQLite connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456  # 256 MiB
+    sqlite_cache_size: int = -65536  # Negative values are KiB, so 64 MiB
+
+    # Async mode serves the hot read/write routes from async handlers on an
+    # AsyncEngine; needs the optional aiosqlite (SQLite) or asyncpg (PostgreSQL)
+    # driver from requirements.txt
+    async_mode: bool = False
+    async_database_url: Optional[str] = None  # Derived from database_url when unset
+
+    # Read replicas for the read-only listing and report routes, used round-robin;
+    # a client that has just committed keeps reading from the primary for a while
+    database_replica_urls: list[str] = []
+    replica_read_your_writes_seconds: float = 5.0  # Should exceed the replicas' worst lag
+
+    # Fraud scoring: applications scoring at or above the threshold are flagged for review
+    fraud_flag_threshold: float = 3.0
+    fraud_velocity_window_seconds: float = 3600.0
+    fraud_velocity_limit: int = 3  # Applications per window before the rate counts against a customer
+    fraud_tracked_customers: int = 100000  # Least recently seen customers' statistics are dropped first
+    fraud_rescore_interval_seconds: float = 900.0  # Background re-scoring of pending loans; 0 runs it only on request
+
+    # Responses remembered for Idempotency-Key retries on the loan and transfer write endpoints
+    idempotency_cache_size: int = 100000
+    idempotency_ttl_seconds: float = 86400.0
+
+    # Loan event streams; with a Redis URL (needs the optional redis package),
+    # events reach subscribers in every worker process
+    events_redis_url: Optional[str] = None
+    events_channel_prefix: str = "banking."
+    events_queue_size: int = 1000  # Events buffered per stream before it is told to reset
+    events_keepalive_seconds: float = 15.0
+
+    # Background jobs; 0 workers leaves queued jobs for another process (or app.jobs.drain) to run
+    job_workers: int = 2
+    job_max_attempts: int = 5
+    job_backoff_base_seconds: float = 1.0  # Doubles with every failed attempt
+    job_backoff_max_seconds: float = 300.0
+    job_poll_interval_seconds: float = 1.0  # Also picks up jobs enqueued by other processes and retries coming due
+    job_stale_after_seconds: float = 300.0
+
+    # Audit trail, buffered in memory and written by a background flusher;
+    # sinks are "database" (queried by GET /auditors/audit) and/or "files"
+    audit_sinks: list[str] = ["database"]
+    audit_buffer_size: int = 100000
+    audit_flush_interval_seconds: float = 1.0  # 0 leaves flushing to app.audit.audit_log.flush()
+    audit_flush_batch: int = 1000  # Entries waiting before the flusher runs early
+    audit_segment_directory: str = "audit"
+    audit_segment_max_bytes: int = 67108864  # 64 MiB of compressed JSONL per segment file
+
+    # Transfers posted per ledger commit by the writer thread; 0 posts each in its request's transaction
+    ledger_max_batch: int = 256
+
+settings = Settings()
@@ -1,20 +1,89 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .metrics import instrument_engine, record_threadpool_wait
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+def is_sqlite(url: str) -> bool:
+    return url.split(":", 1)[0].split("+", 1)[0] == "sqlite"
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url.split("?", 1)[0] in ("sqlite://", "sqlite:///:memory:", "sqlite+aiosqlite://", "sqlite+aiosqlite:///:memory:") or "mode=memory" in url
+
+def engine_options(url: str) -> dict:
+    """Pool and driver options for create_engine/create_async_engine, taken from settings."""
+    options = {"pool_pre_ping": settings.db_pool_pre_ping, "pool_recycle": settings.db_pool_recycle}
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    if not _is_sqlite_memory(url):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+    cursor.close()
+
+def build_engine(url: str):
+    new_engine = create_engine(url, **engine_options(url))
+    if is_sqlite(url):
+        event.listen(new_engine, "connect", _set_sqlite_pragmas)
+    instrument_engine(new_engine)
+    return new_engine
+
+engine = build_engine(settings.database_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 def get_db():
+    # get_db is the first dependency FastAPI runs in its threadpool for most routes
+    record_threadpool_wait()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its async counterpart."""
+    scheme, sep, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r}")
+    return ASYNC_DRIVERS[backend] + sep + rest
+
+def create_async_session_factory(url: str):
+    # Imported lazily so the sync app does not need the asyncio extras installed
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    options = engine_options(url)
+    options.pop("connect_args", None)  # aiosqlite connections are not bound to a thread
+    async_engine = create_async_engine(url, **options)
+    if is_sqlite(url):
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    instrument_engine(async_engine)
+    return async_engine, async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_mode:
+    async_engine, AsyncSessionLocal = create_async_session_factory(
+        settings.async_database_url or to_async_url(settings.database_url)
+    )
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access requires ASYNC_MODE=true")
+    async with AsyncSessionLocal() as db:
+        yield db
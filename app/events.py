@@ -0,0 +1,234 @@
+"""
+Loan events pushed to dashboards over Server-Sent Events.
+
+Routes publish to the bus after they commit. publish() is thread-safe and
+never waits on subscribers: each subscriber has a bounded queue on its own
+event loop, and one that falls too far behind is sent a "reset" event and
+disconnected so it can reload the listing and reconnect.
+
+By default events are delivered within this process. With EVENTS_REDIS_URL
+set they are relayed through Redis pub/sub, so every worker process sees
+every event. Any client with the redis-py publish/pubsub interface can
+stand in for Redis.
+"""
+import asyncio
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
+from fastapi.responses import StreamingResponse
+from .config import settings
+from .schemas import AdminLoanResponse, LoanResponse
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+ADMIN_CHANNEL = "admins"
+_RESET = object()
+
+
+def customer_channel(customer_id: int) -> str:
+    return f"customers.{customer_id}"
+
+
+class Subscription:
+    """One stream's view of the bus; created and read on the stream's event loop."""
+
+    def __init__(self, channels: tuple, maxsize: int):
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def _put(self, data) -> None:
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # Too far behind to catch up: tell the reader to resync
+            self._reset()
+
+    def _reset(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_RESET)
+
+    async def get(self, timeout: float):
+        """Next event, or None if nothing arrived within timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisBroker:
+    """Relays published events through Redis pub/sub; a listener thread feeds local subscribers."""
+
+    def __init__(self, client, prefix: str):
+        self.client = client
+        self.prefix = prefix
+        self._thread = None
+        self._lock = threading.Lock()
+        # One thread keeps events in order and the blocking client off the async routes' event loop
+        self._publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="events-publish")
+
+    def publish(self, channel: str, data: str) -> None:
+        self._publisher.submit(self._publish, self.prefix + channel, data)
+
+    def _publish(self, channel: str, data: str) -> None:
+        try:
+            self.client.publish(channel, data)
+        except Exception:
+            logger.exception("Publishing an event to Redis failed")
+
+    def ensure_listening(self, bus: "EventBus") -> None:
+        with self._lock:
+            if self._thread is None:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + "*")
+                self._thread = threading.Thread(target=self._listen, args=(pubsub, bus), name="events-relay", daemon=True)
+                self._thread.start()
+
+    def _listen(self, pubsub, bus: "EventBus") -> None:
+        try:
+            for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                channel, data = message["channel"], message["data"]
+                if isinstance(channel, bytes):
+                    channel, data = channel.decode(), data.decode()
+                bus.deliver(channel[len(self.prefix):], data)
+        except Exception:
+            logger.exception("Event relay from Redis stopped")
+        with self._lock:
+            # The next subscriber starts a new listener
+            self._thread = None
+
+
+class EventBus:
+    def __init__(self, queue_size: int = 1000, broker: Optional[RedisBroker] = None):
+        self.queue_size = queue_size
+        self.broker = broker
+        self._subscribers: dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, *channels: str) -> Subscription:
+        """Subscribe the running event loop to channels."""
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        if self.broker is not None:
+            self.broker.ensure_listening(self)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def wants(self, channel: str) -> bool:
+        """Whether an event on channel can reach anyone; lets publishers skip building it."""
+        return self.broker is not None or channel in self._subscribers
+
+    def publish(self, channel: str, event: dict) -> None:
+        data = json.dumps(event)
+        if self.broker is not None:
+            self.broker.publish(channel, data)
+        else:
+            self.deliver(channel, data)
+
+    def deliver(self, channel: str, data: str) -> None:
+        """Hand data to this process's subscribers of channel, from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, data)
+            except RuntimeError:
+                # The subscriber's event loop has shut down
+                self.unsubscribe(subscription)
+
+    def disconnect_all(self) -> None:
+        """End every open stream with a reset event, e.g. before shutting down."""
+        with self._lock:
+            subscribers = {subscription for group in self._subscribers.values() for subscription in group}
+        for subscription in subscribers:
+            try:
+                # Queued events still go out before the reset
+                subscription.loop.call_soon_threadsafe(subscription._put, _RESET)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+    async def stream(self, *channels: str, keepalive: Optional[float] = None) -> AsyncIterator[str]:
+        """Server-Sent Events for channels, with a comment line whenever the stream is idle."""
+        keepalive = settings.events_keepalive_seconds if keepalive is None else keepalive
+        subscription = self.subscribe(*channels)
+        try:
+            # Tells the client the subscription is live before any event arrives
+            yield "retry: 3000\n\n"
+            while True:
+                data = await subscription.get(keepalive)
+                if data is None:
+                    yield ": keepalive\n\n"
+                elif data is _RESET:
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+                else:
+                    yield f"event: {json.loads(data)['type']}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+
+def _build_bus() -> EventBus:
+    broker = None
+    if settings.events_redis_url:
+        if redis is None:
+            raise RuntimeError("EVENTS_REDIS_URL is set but the redis package is not installed")
+        broker = RedisBroker(redis.Redis.from_url(settings.events_redis_url), settings.events_channel_prefix)
+    return EventBus(settings.events_queue_size, broker)
+
+
+bus = _build_bus()
+
+
+def event_stream_response(*channels: str) -> StreamingResponse:
+    # Proxies must not buffer or cache the stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(bus.stream(*channels), media_type="text/event-stream", headers=headers)
+
+
+def publish_loan_applied(loan) -> None:
+    """Announce a new application to admins (with its fraud score) and to its customer."""
+    event = {"type": "loan.applied"}
+    if bus.wants(ADMIN_CHANNEL):
+        bus.publish(ADMIN_CHANNEL, {**event, "loan": AdminLoanResponse.model_validate(loan).model_dump(mode="json")})
+    channel = customer_channel(loan.customer_id)
+    if bus.wants(channel):
+        bus.publish(channel, {**event, "loan": LoanResponse.model_validate(loan).model_dump(mode="json")})
+
+
+def publish_loan_decisions(decisions: list[tuple]) -> None:
+    """Announce decisions, each (loan_id, customer_id, status, emi), to admins and to each customer."""
+    by_customer: dict[int, list] = {}
+    for loan_id, customer_id, status, emi in decisions:
+        by_customer.setdefault(customer_id, []).append({
+            "id": loan_id, "customer_id": customer_id, "status": status,
+            "emi": float(emi) if emi is not None else None,
+        })
+    if bus.wants(ADMIN_CHANNEL):
+        bus.publish(ADMIN_CHANNEL, {"type": "loan.decided", "loans": [loan for loans in by_customer.values() for loan in loans]})
+    for customer_id, loans in by_customer.items():
+        channel = customer_channel(customer_id)
+        if bus.wants(channel):
+            bus.publish(channel, {"type": "loan.decided", "loans": loans})
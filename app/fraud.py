@@ -0,0 +1,141 @@
+"""
+Fraud scoring of loan applications.
+
+apply_for_loan scores each application inline against the in-memory
+statistics of the live scorer, which costs a few microseconds. The
+heavier pass, rescore_loans, replays every loan in application order into a
+fresh scorer, revises the scores of pending loans and then replaces the live
+scorer, so statistics lost to a restart or to eviction are rebuilt. It runs
+on a background thread every FRAUD_RESCORE_INTERVAL_SECONDS and on request.
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import SessionLocal
+from .metrics import Histogram, registry
+from .models import Loan
+from .utils.fraud import FraudScore, FraudScorer
+
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+fraud_rescore_latency = registry.register(Histogram(
+    "fraud_rescore_duration_seconds", "Time taken by a background fraud re-scoring pass.",
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+))
+
+
+def new_scorer() -> FraudScorer:
+    return FraudScorer(
+        threshold=settings.fraud_flag_threshold,
+        velocity_window=settings.fraud_velocity_window_seconds,
+        velocity_limit=settings.fraud_velocity_limit,
+        max_customers=settings.fraud_tracked_customers,
+    )
+
+
+scorer = new_scorer()
+
+
+def score_application(customer_id: int, loan) -> FraudScore:
+    """Score a LoanCreate for customer_id against the live statistics."""
+    # Periodic re-scoring starts with the first application, like the hash pool
+    if not worker.started and settings.fraud_rescore_interval_seconds > 0:
+        worker.ensure_started()
+    return scorer.score(customer_id, loan.loan_type, loan.amount, loan.tenure_months, loan.interest_rate)
+
+
+def _timestamp(applied_at: datetime) -> float:
+    # applied_at is stored as naive UTC
+    if applied_at.tzinfo is None:
+        applied_at = applied_at.replace(tzinfo=timezone.utc)
+    return applied_at.timestamp()
+
+
+def rescore_loans(db: Session) -> tuple[FraudScorer, int]:
+    """
+    Replay all loans into a fresh scorer and store revised scores of pending loans.
+
+    Returns the fresh scorer and the number of loans whose score changed.
+    """
+    fresh = new_scorer()
+    changes = []
+    rows = db.execute(
+        select(
+            Loan.id, Loan.customer_id, Loan.loan_type, Loan.amount, Loan.tenure_months,
+            Loan.interest_rate, Loan.applied_at, Loan.status, Loan.fraud_score, Loan.flagged,
+        )
+        .order_by(Loan.applied_at, Loan.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for row in rows:
+        terms = (row.customer_id, row.loan_type, row.amount, row.tenure_months, row.interest_rate, _timestamp(row.applied_at))
+        if row.status != "pending":
+            fresh.observe(*terms)
+            continue
+        result = fresh.score(*terms)
+        if result.score != row.fraud_score or result.flagged != row.flagged:
+            changes.append({"loan_id": row.id, "fraud_score": result.score, "flagged": result.flagged})
+
+    # Loans decided while the pass ran keep the score they were decided with
+    stmt = (
+        update(Loan.__table__)
+        .where(Loan.__table__.c.id == bindparam("loan_id"), Loan.__table__.c.status == "pending")
+        .values(fraud_score=bindparam("fraud_score"), flagged=bindparam("flagged"))
+    )
+    for start in range(0, len(changes), BATCH_SIZE):
+        db.execute(stmt, changes[start:start + BATCH_SIZE])
+    db.commit()
+    return fresh, len(changes)
+
+
+class RescoreWorker:
+    """Daemon thread running rescore_loans periodically and whenever trigger() is called."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.last_changed = None
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fraud-rescore", daemon=True)
+                self._thread.start()
+
+    def trigger(self) -> None:
+        self.ensure_started()
+        self._wake.set()
+
+    def run_once(self) -> int:
+        global scorer
+        with fraud_rescore_latency.time(), self.session_factory() as db:
+            fresh, changed = rescore_loans(db)
+        # Applications scored while the pass ran are missing from the fresh
+        # statistics; they are picked up again by the next pass
+        scorer = fresh
+        self.last_changed = changed
+        return changed
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(timeout=settings.fraud_rescore_interval_seconds or None)
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception:  # pragma: no cover - the next pass retries
+                logger.exception("Fraud re-scoring failed")
+
+
+worker = RescoreWorker()
+
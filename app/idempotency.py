@@ -0,0 +1,151 @@
+"""
+Idempotency-Key support for the loan and money-movement write endpoints.
+
+A request carrying an Idempotency-Key header is remembered per principal and
+key, together with a fingerprint of its method, path and body. A retry with
+the same key and request gets the stored response replayed without reaching
+the route, and so without touching the loans table. Reusing a key for a
+different request is rejected with 422, and a retry that arrives while the
+first attempt is still running gets 409. 5xx responses are not stored, so
+those can be retried.
+
+Keys live in a TTLCache in this process for IDEMPOTENCY_TTL_SECONDS.
+"""
+import hashlib
+import json
+import re
+from typing import NamedTuple
+from fastapi import HTTPException
+from .auth import verify_token
+from .config import settings
+from .utils.cache import TTLCache
+
+IDEMPOTENT_ROUTES = (
+    ("POST", re.compile(r"^/customers/loans$")),
+    ("PUT", re.compile(r"^/admins/loans/(\d+|bulk)$")),
+    ("POST", re.compile(r"^/customers/transfers$")),
+    ("POST", re.compile(r"^/admins/accounts/\d+/deposits$")),
+)
+MAX_KEY_LENGTH = 255
+
+
+class _InFlight(NamedTuple):
+    fingerprint: bytes
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: bytes
+    status: int
+    content_type: bytes
+    body: bytes
+
+
+idempotency_store = TTLCache(maxsize=settings.idempotency_cache_size, ttl=settings.idempotency_ttl_seconds)
+
+
+def _principal(headers: dict):
+    """(is_admin, user id or email) from the bearer token, or None if there is no valid one."""
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        token_data = verify_token(token, HTTPException(status_code=401))
+    except HTTPException:
+        return None
+    return token_data.is_admin, token_data.user_id or token_data.email
+
+
+async def _send_json(send, status: int, detail: str, extra_headers: tuple = ()) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *extra_headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware; requests without the header pass straight through."""
+
+    def __init__(self, app, store: TTLCache = idempotency_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(
+            scope["method"] == method and pattern.match(scope["path"]) for method, pattern in IDEMPOTENT_ROUTES
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key")
+        principal = _principal(headers) if key is not None else None
+        if principal is None:
+            # No key, or a request the route will reject as unauthenticated anyway
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(b"\0".join((scope["method"].encode(), scope["path"].encode(), body))).digest()
+
+        store_key = (principal, key)
+        reservation = _InFlight(fingerprint)
+        entry = self.store.setdefault(store_key, reservation)
+        if entry is not reservation:
+            if entry.fingerprint != fingerprint:
+                await _send_json(send, 422, "Idempotency-Key was already used for a different request")
+            elif isinstance(entry, _InFlight):
+                await _send_json(send, 409, "A request with this Idempotency-Key is still being processed", ((b"retry-after", b"1"),))
+            else:
+                await send({
+                    "type": "http.response.start",
+                    "status": entry.status,
+                    "headers": [
+                        (b"content-type", entry.content_type),
+                        (b"content-length", str(len(entry.body)).encode()),
+                        (b"idempotent-replayed", b"true"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        replayed_body = False
+
+        async def receive_body():
+            nonlocal replayed_body
+            if not replayed_body:
+                replayed_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "content_type": b"application/json", "body": []}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = dict(message.get("headers", [])).get(b"content-type", b"application/json")
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, capture)
+        except BaseException:
+            self.store.pop(store_key)
+            raise
+        if response["status"] >= 500:
+            self.store.pop(store_key)
+        else:
+            self.store.set(store_key, StoredResponse(
+                fingerprint, response["status"], response["content_type"], b"".join(response["body"]),
+            ))
@@ -0,0 +1,203 @@
+"""
+Durable background jobs for slow work that must not hold up a request.
+
+enqueue() adds a row to the jobs table in the caller's transaction, so a
+job exists exactly when the write that caused it commits, and wakes the
+workers once it has. JOB_WORKERS threads, started on the first enqueue,
+claim due jobs with a conditional UPDATE and run the handler registered for
+the job's kind. A handler that raises is retried with exponential backoff
+until it has been tried JOB_MAX_ATTEMPTS times, then kept as failed with its
+last error. Jobs left running by a process that died are requeued after
+JOB_STALE_AFTER_SECONDS.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import SessionLocal
+from .metrics import Histogram, registry
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+job_latency = registry.register(Histogram(
+    "job_duration_seconds", "Time taken by background job handlers.", ("kind",),
+))
+
+handlers: dict[str, Callable[[Session, dict], None]] = {}
+
+
+def handler(kind: str):
+    """Register the decorated function as the handler for jobs of kind; it gets a session and the payload."""
+    def register(fn):
+        handlers[kind] = fn
+        return fn
+    return register
+
+
+def _job_values(kind: str, payload: dict, now: datetime, delay: float) -> dict:
+    return {
+        "kind": kind, "payload": json.dumps(payload), "status": "queued", "attempts": 0,
+        "max_attempts": settings.job_max_attempts, "run_at": now + timedelta(seconds=delay), "created_at": now,
+    }
+
+
+def enqueue(db: Session, kind: str, payload: dict, delay: float = 0.0) -> Job:
+    """Add a job to db's transaction; it runs once that commits. Works with AsyncSession too."""
+    job = Job(**_job_values(kind, payload, datetime.utcnow(), delay))
+    db.add(job)
+    db.info["jobs_enqueued"] = True
+    return job
+
+
+def enqueue_many(db: Session, kind: str, payloads: list[dict]) -> None:
+    """Insert many jobs in db's transaction with one executemany."""
+    if payloads:
+        now = datetime.utcnow()
+        db.execute(insert(Job), [_job_values(kind, payload, now, 0.0) for payload in payloads])
+        db.info["jobs_enqueued"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+    if session.info.pop("jobs_enqueued", False):
+        pool.wake()
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before retrying a job that has failed attempts times."""
+    return min(settings.job_backoff_base_seconds * 2 ** (attempts - 1), settings.job_backoff_max_seconds)
+
+
+def _claim(db: Session, now: datetime):
+    due = (
+        select(Job.id)
+        .where(Job.status == "queued", Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    # Conditional on status, so two workers never claim the same job
+    row = db.execute(
+        update(Job)
+        .where(Job.id == due, Job.status == "queued")
+        .values(status="running", attempts=Job.attempts + 1, locked_at=now)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    return row
+
+
+def run_next(session_factory=SessionLocal, now: Optional[datetime] = None) -> bool:
+    """Claim and run one due job; False if none was due."""
+    with session_factory() as db:
+        job = _claim(db, now or datetime.utcnow())
+        if job is None:
+            return False
+        fn = handlers.get(job.kind)
+        try:
+            if fn is None:
+                raise LookupError(f"No handler for job kind {job.kind!r}")
+            with job_latency.time(job.kind):
+                fn(db, json.loads(job.payload))
+        except Exception as exc:
+            db.rollback()
+            error = f"{type(exc).__name__}: {exc}"
+            if job.attempts < job.max_attempts:
+                logger.warning("Job %d (%s) failed, retrying: %s", job.id, job.kind, error)
+                values = {"status": "queued", "run_at": datetime.utcnow() + timedelta(seconds=backoff(job.attempts))}
+            else:
+                logger.error("Job %d (%s) failed for good: %s", job.id, job.kind, error)
+                values = {"status": "failed"}
+            db.execute(update(Job).where(Job.id == job.id).values(locked_at=None, last_error=error, **values))
+        else:
+            db.execute(delete(Job).where(Job.id == job.id))
+        db.commit()
+        return True
+
+
+def drain(session_factory=SessionLocal, now: Optional[datetime] = None) -> int:
+    """Run due jobs until none is left; returns how many ran."""
+    count = 0
+    while run_next(session_factory, now):
+        count += 1
+    return count
+
+
+def requeue_stale(db: Session, now: Optional[datetime] = None) -> int:
+    """Return jobs stuck running since before JOB_STALE_AFTER_SECONDS to the queue."""
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=settings.job_stale_after_seconds)
+    result = db.execute(
+        update(Job).where(Job.status == "running", Job.locked_at < cutoff).values(status="queued", locked_at=None)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def queue_stats(db: Session, now: Optional[datetime] = None) -> dict:
+    """Jobs per status, and the lag in seconds of the oldest queued job that is due."""
+    counts = dict(db.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+    now = now or datetime.utcnow()
+    oldest = db.scalar(select(func.min(Job.run_at)).where(Job.status == "queued", Job.run_at <= now))
+    lag = (now - oldest).total_seconds() if oldest is not None else 0.0
+    return {"counts": counts, "lag_seconds": lag}
+
+
+class JobWorkerPool:
+    """JOB_WORKERS daemon threads running due jobs; they sleep until woken or JOB_POLL_INTERVAL_SECONDS."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._wake = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def wake(self) -> None:
+        if settings.job_workers <= 0:
+            return
+        if not self._threads:
+            self.ensure_started()
+        self._wake.set()
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            with self.session_factory() as db:
+                requeue_stale(db)
+            # A fresh event per start, so threads left over from a timed-out stop() still exit
+            self._stop = stop = threading.Event()
+            for index in range(settings.job_workers):
+                thread = threading.Thread(target=self._run, args=(stop,), name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Let the workers finish the job they are running and exit; the next wake() starts new ones."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._stop.set()
+        self._wake.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            # Cleared first so a wake during the pass starts another one
+            self._wake.clear()
+            try:
+                drain(self.session_factory)
+            except Exception:  # pragma: no cover - e.g. the database is unavailable; try again later
+                logger.exception("Job worker failed to claim a job")
+                time.sleep(settings.job_poll_interval_seconds)
+            self._wake.wait(timeout=settings.job_poll_interval_seconds)
+
+
+pool = JobWorkerPool()
@@ -0,0 +1,211 @@
+"""
+Posting engine for transfers between accounts.
+
+A transfer debits one account with a conditional UPDATE that only matches
+while the balance covers the amount, credits the other, and appends one
+ledger entry per leg carrying the balance it left. Account balances are
+running totals kept by these UPDATEs, never SUMs over the ledger, and there
+is no read-modify-write for concurrent transfers to race on.
+
+Requests hand their transfer to a single writer thread, which posts
+everything queued since its last commit, up to LEDGER_MAX_BATCH transfers,
+in one transaction. Under load many transfers share one commit; an idle
+writer posts a lone transfer straight away. With LEDGER_MAX_BATCH=0 each
+request posts its transfer in its own transaction instead.
+"""
+import logging
+import queue
+import threading
+import uuid
+from concurrent.futures import Future
+from decimal import Decimal
+from typing import NamedTuple, Optional
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import SessionLocal
+from .metrics import Histogram, registry
+from .models import Account, LedgerEntry
+
+logger = logging.getLogger(__name__)
+
+CASH_ACCOUNT_TYPE = "cash"
+ACCOUNT_TYPES = ("savings", "current")
+
+ledger_batch_size = registry.register(Histogram(
+    "ledger_batch_transfers", "Transfers posted per ledger commit.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+))
+
+
+class Transfer(NamedTuple):
+    from_account_id: int
+    to_account_id: int
+    amount_minor: int
+    reference: Optional[str] = None
+
+
+class PostedTransfer(NamedTuple):
+    transfer_id: str
+    from_balance_minor: int
+    to_balance_minor: int
+
+
+class TransferRefused(Exception):
+    """A transfer that was not posted; nothing it would have changed was written."""
+
+
+def to_minor(amount: Decimal) -> int:
+    return int(amount * 100)
+
+
+def from_minor(amount_minor: int) -> float:
+    return amount_minor / 100
+
+
+_accounts = Account.__table__
+
+
+def _debit_stmt(account_id: int, amount_minor: int):
+    return (
+        update(_accounts)
+        .where(
+            _accounts.c.id == account_id,
+            or_(_accounts.c.balance_minor >= amount_minor, _accounts.c.account_type == CASH_ACCOUNT_TYPE),
+        )
+        .values(balance_minor=_accounts.c.balance_minor - amount_minor)
+        .returning(_accounts.c.balance_minor)
+    )
+
+
+def _credit_stmt(account_id: int, amount_minor: int):
+    return (
+        update(_accounts)
+        .where(_accounts.c.id == account_id)
+        .values(balance_minor=_accounts.c.balance_minor + amount_minor)
+        .returning(_accounts.c.balance_minor)
+    )
+
+
+def post_transfers(db: Session, transfers: list[Transfer]) -> list:
+    """
+    Post transfers in order within db's transaction; the caller commits.
+
+    Returns a PostedTransfer, or the TransferRefused explaining why not, for each transfer.
+    """
+    results = []
+    entries = []
+    for transfer in transfers:
+        if transfer.amount_minor <= 0 or transfer.from_account_id == transfer.to_account_id:
+            results.append(TransferRefused("Invalid transfer"))
+            continue
+        from_balance = db.execute(_debit_stmt(transfer.from_account_id, transfer.amount_minor)).scalar_one_or_none()
+        if from_balance is None:
+            results.append(TransferRefused("Insufficient funds"))
+            continue
+        to_balance = db.execute(_credit_stmt(transfer.to_account_id, transfer.amount_minor)).scalar_one_or_none()
+        if to_balance is None:
+            # Put the debit back; later transfers in the batch see the restored balance
+            db.execute(_credit_stmt(transfer.from_account_id, transfer.amount_minor))
+            results.append(TransferRefused("Account not found"))
+            continue
+        transfer_id = uuid.uuid4().hex
+        entries.append({
+            "transfer_id": transfer_id, "account_id": transfer.from_account_id, "amount_minor": -transfer.amount_minor,
+            "balance_minor": from_balance, "reference": transfer.reference,
+        })
+        entries.append({
+            "transfer_id": transfer_id, "account_id": transfer.to_account_id, "amount_minor": transfer.amount_minor,
+            "balance_minor": to_balance, "reference": transfer.reference,
+        })
+        results.append(PostedTransfer(transfer_id, from_balance, to_balance))
+    if entries:
+        db.execute(insert(LedgerEntry), entries)
+    return results
+
+
+def cash_account_id(db: Session) -> int:
+    """Id of the bank's cash account, the source of deposits, creating it on first use."""
+    account_id = db.scalar(select(Account.id).where(Account.account_type == CASH_ACCOUNT_TYPE))
+    if account_id is not None:
+        return account_id
+    try:
+        account = Account(account_type=CASH_ACCOUNT_TYPE)
+        db.add(account)
+        db.commit()
+        return account.id
+    except IntegrityError:
+        # Created concurrently; the unique index keeps there being one
+        db.rollback()
+        return db.scalar(select(Account.id).where(Account.account_type == CASH_ACCOUNT_TYPE))
+
+
+class PostingEngine:
+    """Single writer thread that posts queued transfers in group commits; started on first use."""
+
+    def __init__(self, session_factory=SessionLocal, max_batch: Optional[int] = None):
+        self.session_factory = session_factory
+        self.max_batch = settings.ledger_max_batch if max_batch is None else max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, transfer: Transfer) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((transfer, future))
+        return future
+
+    def post(self, db: Session, transfer: Transfer) -> PostedTransfer:
+        """
+        Post transfer and wait for its commit; raises TransferRefused.
+
+        When the writer thread posts it, db is committed before waiting so
+        its connection goes back to the pool the writer draws from.
+        """
+        if self.max_batch <= 0:
+            result = post_transfers(db, [transfer])[0]
+            db.commit()
+            ledger_batch_size.observe(1)
+            if isinstance(result, TransferRefused):
+                raise result
+            return result
+        db.commit()
+        return self.submit(transfer).result()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._post_batch(batch)
+
+    def _post_batch(self, batch: list) -> None:
+        try:
+            with self.session_factory() as db:
+                results = post_transfers(db, [transfer for transfer, _ in batch])
+                db.commit()
+        except Exception as exc:
+            logger.exception("Posting a batch of %d transfers failed", len(batch))
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        ledger_batch_size.observe(len(batch))
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, TransferRefused):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+posting_engine = PostingEngine()
@@ -1,21 +1,125 @@
+import asyncio
+import logging
+import signal
+import threading
+from contextlib import asynccontextmanager
+import anyio.to_thread
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from .database import engine, Base
 from . import models
-from .routers import auth_router, customers_router, admins_router
+from .config import settings
+from .routers import auth_router, customers_router, admins_router, auditors_router, customers_async_router, admins_async_router
+from .migrations import add_missing_columns, create_missing_indexes, populate_loan_aggregates
+from .metrics import Gauge, MetricsMiddleware, registry
+from .idempotency import IdempotencyMiddleware, idempotency_store
+from .replicas import ReadYourWritesMiddleware, read_router
+from .auth import token_cache, user_cache
+from .auth.hashing import hash_queue_depth, shutdown_hash_pool
+from .events import bus
+from .ledger import posting_engine
+from . import audit, jobs
 
-# Create database tables
+# Create database tables, plus columns and indexes added to tables that already exist
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+create_missing_indexes(engine)
+populate_loan_aggregates(engine)
+
+logger = logging.getLogger(__name__)
+
+def _end_streams_on_exit_signal(loop: asyncio.AbstractEventLoop) -> None:
+    # uvicorn waits for open responses to finish before it runs the lifespan
+    # shutdown, and an event stream never does; so end the streams as soon as
+    # the exit signal arrives, then hand the signal on to the server
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(signum)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(bus.disconnect_all)
+            previous(signum, frame)
+
+        signal.signal(signum, handler)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _end_streams_on_exit_signal(asyncio.get_running_loop())
+    yield
+    bus.disconnect_all()
+    jobs.pool.stop()
+    try:
+        audit.audit_log.flush()
+    except Exception:
+        logger.exception("Writing the audit log at shutdown failed")
+    shutdown_hash_pool()
 
 app = FastAPI(
     title="HCL Banking Backend",
     description="Modular Banking Backend System for HCL Hackathon",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+# Added last so it is outermost and also times replayed idempotent responses
+app.add_middleware(MetricsMiddleware)
+
+def _threadpool_stats() -> dict:
+    stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {"busy": stats.borrowed_tokens, "waiting": stats.tasks_waiting, "limit": stats.total_tokens}
+
+registry.register(Gauge("threadpool_threads", "FastAPI threadpool tokens in use, waiting and total.", _threadpool_stats, ("state",)))
+registry.register(Gauge("password_hash_queue_depth", "Password hashes queued or running on the pool.", lambda: {(): hash_queue_depth()}))
+registry.register(Gauge(
+    "token_cache_lookups_total", "Decoded-token cache lookups by result.",
+    lambda: {"hit": token_cache.hits, "miss": token_cache.misses}, ("result",), kind="counter",
+))
+registry.register(Gauge("ledger_queue_depth", "Transfers waiting for the ledger writer.", lambda: {(): posting_engine.queue_depth()}))
+
+def _job_stats() -> dict:
+    with jobs.pool.session_factory() as db:
+        return jobs.queue_stats(db)
+
+registry.register(Gauge(
+    "job_queue_jobs", "Background jobs by status.",
+    lambda: {"queued": 0, "running": 0, "failed": 0, **_job_stats()["counts"]}, ("status",),
+))
+registry.register(Gauge("job_queue_lag_seconds", "Age of the oldest due job still queued.", lambda: {(): _job_stats()["lag_seconds"]}))
+registry.register(Gauge("audit_buffer_entries", "Audit entries waiting for the flusher.", lambda: {(): len(audit.audit_log)}))
+registry.register(Gauge(
+    "audit_dropped_total", "Audit entries overwritten because the buffer was full.",
+    lambda: {(): audit.audit_log.dropped}, kind="counter",
+))
+registry.register(Gauge(
+    "db_read_sessions_total", "Sessions opened by read-only routes, by database.",
+    lambda: dict(read_router.reads), ("target",), kind="counter",
+))
+registry.register(Gauge("idempotency_keys", "Idempotency keys remembered.", lambda: {(): len(idempotency_store)}))
+registry.register(Gauge(
+    "user_cache_lookups_total", "Cached user row lookups by result.",
+    lambda: {"hit": user_cache.hits, "miss": user_cache.misses}, ("result",), kind="counter",
+))
+
 app.include_router(auth_router)
+if settings.async_mode:
+    # Registered first so their routes take precedence over the sync versions;
+    # everything else keeps being served by the sync routers below
+    app.include_router(customers_async_router)
+    app.include_router(admins_async_router)
 app.include_router(customers_router)
 app.include_router(admins_router)
+app.include_router(auditors_router)
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to HCL Banking Backend API"}
\ No newline at end of file
+    return {"message": "Welcome to HCL Banking Backend API"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # async so the threadpool gauges are read on the event loop thread
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,197 @@
+"""
+In-process metrics rendered in the Prometheus text format on GET /metrics.
+
+Request latency and per-request SQL counts are recorded by MetricsMiddleware;
+SQL statement timing comes from engine events installed by instrument_engine.
+Everything is kept in plain dicts behind a lock, so recording costs a few
+microseconds per request.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(labelnames: tuple, labelvalues: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket counts (non-cumulative), then sum and count
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            inf = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """A gauge whose samples are read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], dict], labelnames: tuple = (), kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.kind = kind
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self._collect().items()):
+            labels = labels if isinstance(labels, tuple) else (labels,) if self.labelnames else ()
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"),
+))
+request_sql_queries = registry.register(Histogram(
+    "http_request_sql_queries", "SQL statements executed per HTTP request.", ("method", "route"), COUNT_BUCKETS,
+))
+request_sql_time = registry.register(Histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL per HTTP request.", ("method", "route"),
+))
+sql_statement_latency = registry.register(Histogram(
+    "sql_statement_duration_seconds", "Latency of individual SQL statements by verb.", ("verb",),
+))
+password_hash_latency = registry.register(Histogram(
+    "password_hash_duration_seconds", "Time spent hashing or verifying passwords, including pool queueing.", ("operation",),
+))
+jwt_decode_latency = registry.register(Histogram(
+    "jwt_decode_duration_seconds", "Time spent decoding and verifying JWTs on token cache misses.",
+))
+threadpool_wait = registry.register(Histogram(
+    "threadpool_queue_wait_seconds", "Time from request arrival until its first threadpool dependency starts.",
+))
+
+
+# Per-request accumulators: [request start, SQL statement count, SQL seconds, threadpool wait recorded]
+_request_state: ContextVar[Optional[list]] = ContextVar("request_metrics", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Time every SQL statement on engine and attribute it to the current request."""
+    target = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        sql_statement_latency.observe(elapsed, statement.lstrip()[:6].upper())
+        state = _request_state.get()
+        if state is not None:
+            state[1] += 1
+            state[2] += elapsed
+
+
+def record_threadpool_wait() -> None:
+    """Call from the first dependency that runs in the threadpool (get_db)."""
+    state = _request_state.get()
+    if state is not None and not state[3]:
+        state[3] = True
+        threadpool_wait.observe(time.perf_counter() - state[0])
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, cheaper per request than BaseHTTPMiddleware."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        state = [start, 0, 0.0, False]
+        token = _request_state.set(state)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_state.reset(token)
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            template = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            request_latency.observe(time.perf_counter() - start, method, template, status_code)
+            request_sql_queries.observe(state[1], method, template)
+            request_sql_time.observe(state[2], method, template)
@@ -0,0 +1,93 @@
+"""
+Bring an existing database up to the current models.
+
+create_all only creates missing tables, so columns and indexes added to
+tables that already exist have to be created here. Run with: python -m app.migrations
+"""
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.orm import Session
+from .database import Base, engine as default_engine
+from .models import Loan, LoanAggregate
+from .utils import calculate_emi_batch
+from .aggregates import rebuild_aggregates
+
+BATCH_SIZE = 1000
+
+
+def add_missing_columns(engine) -> list[str]:
+    """Add columns declared on the models that existing tables lack; they need a server default if NOT NULL."""
+    inspector = inspect(engine)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def create_missing_indexes(engine) -> list[str]:
+    """Create every index declared on the models that the database lacks."""
+    inspector = inspect(engine)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+    return created
+
+
+def backfill_loan_emi(engine) -> int:
+    """Store EMI on pending and approved loans created before it was persisted."""
+    updated = 0
+    with Session(engine) as db:
+        while True:
+            loans = (
+                db.query(Loan)
+                .filter(Loan.emi.is_(None), Loan.status != "rejected")
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not loans:
+                return updated
+            emis = calculate_emi_batch(
+                [loan.amount for loan in loans],
+                [loan.interest_rate for loan in loans],
+                [loan.tenure_months for loan in loans],
+            )
+            for loan, emi in zip(loans, emis):
+                loan.emi = emi
+            db.commit()
+            updated += len(loans)
+
+
+def populate_loan_aggregates(engine) -> int:
+    """Build loan_aggregates when it is empty but loans exist, as right after it was added."""
+    with Session(engine) as db:
+        if db.query(LoanAggregate).first() is not None or db.query(Loan.id).first() is None:
+            return 0
+        return rebuild_aggregates(db)
+
+
+def upgrade(engine=default_engine) -> None:
+    Base.metadata.create_all(bind=engine)
+    for name in add_missing_columns(engine):
+        print(f"Added column {name}")
+    for name in create_missing_indexes(engine):
+        print(f"Created index {name}")
+    print(f"Backfilled EMI on {backfill_loan_emi(engine)} loans")
+    print(f"Built {populate_loan_aggregates(engine)} loan aggregate groups")
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -1,3 +1,7 @@
 from .customer import Customer
 from .admin import BankAdmin
-from .loan import Loan
\ No newline at end of file
+from .loan import Loan, decide_loan
+from .loan_aggregate import LoanAggregate, AggregateDeltas
+from .account import Account, LedgerEntry
+from .job import Job
+from .audit import AuditEntry
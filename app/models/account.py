@@ -0,0 +1,46 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, CheckConstraint, Column, Integer, String, DateTime, ForeignKey, Index, event, text
+from sqlalchemy.sql import func
+from ..database import Base
+
+# Money is held in integer minor units (paise): SQLite does NUMERIC arithmetic
+# in floating point, and balances are updated in SQL
+
+class Account(Base):
+    __tablename__ = "accounts"
+    __table_args__ = (
+        # Only the bank's cash account, the counterparty of deposits, may go negative
+        CheckConstraint("balance_minor >= 0 OR account_type = 'cash'", name="ck_accounts_balance"),
+        Index("ix_accounts_customer_id", "customer_id"),
+        Index(
+            "ux_accounts_cash", "account_type", unique=True,
+            sqlite_where=text("account_type = 'cash'"),
+            postgresql_where=text("account_type = 'cash'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)  # None for the cash account
+    account_type = Column(String(20), nullable=False, default="savings")
+    # Running total of the account's ledger entries, kept by the posting engine
+    balance_minor = Column(BigInteger, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class LedgerEntry(Base):
+    """One leg of a transfer; the legs of a transfer sum to zero. Rows are never updated or deleted."""
+    __tablename__ = "ledger_entries"
+    # Account statements, newest first
+    __table_args__ = (Index("ix_ledger_entries_account_id_id", "account_id", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    transfer_id = Column(String(32), nullable=False, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    amount_minor = Column(BigInteger, nullable=False)  # Negative for the debited account
+    balance_minor = Column(BigInteger, nullable=False)  # Account balance after this entry
+    reference = Column(String(140), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
+
+@event.listens_for(LedgerEntry, "before_update")
+@event.listens_for(LedgerEntry, "before_delete")
+def _ledger_is_append_only(mapper, connection, target):
+    raise ValueError("Ledger entries are append-only; post a reversing transfer instead")
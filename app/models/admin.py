@@ -7,6 +7,9 @@ class BankAdmin(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(100), unique=True, nullable=False)
+    # The unique index on email is the lookup index for login and token auth
     email = Column(String(100), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped to revoke every token issued so far
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from ..database import Base
+
+class AuditEntry(Base):
+    """One state-changing action; written in bulk by the audit flusher and never updated."""
+    __tablename__ = "audit_entries"
+    # Auditor queries filter by one of these and page newest first
+    __table_args__ = (
+        Index("ix_audit_entries_resource", "resource_type", "resource_id", "id"),
+        Index("ix_audit_entries_actor", "actor_type", "actor_id", "id"),
+        Index("ix_audit_entries_action", "action", "id"),
+        Index("ix_audit_entries_at", "at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    at = Column(DateTime, nullable=False)  # Naive UTC, when the action committed
+    actor_type = Column(String(20), nullable=False)  # customer, admin or anonymous
+    actor_id = Column(Integer, nullable=True)
+    action = Column(String(50), nullable=False)  # e.g. loan.decide
+    resource_type = Column(String(30), nullable=False)
+    resource_id = Column(String(64), nullable=True)
+    detail = Column(Text, nullable=True)  # JSON
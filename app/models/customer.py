@@ -7,9 +7,12 @@ class Customer(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
+    # The unique index on email is the lookup index for login and token auth
     email = Column(String(100), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     age = Column(Integer, nullable=False)
     phone = Column(String(20))
     address = Column(String(255))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped to revoke every token issued so far
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
\ No newline at end of file
@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from ..database import Base
+
+class Job(Base):
+    """Work to run after the transaction that enqueued it commits; see app.jobs."""
+    __tablename__ = "jobs"
+    # Workers claim the oldest due job of a status
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(20), nullable=False, default="queued")  # queued, running or failed; done jobs are deleted
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False)
+    # Naive UTC, compared against times computed in Python
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
@@ -1,9 +1,28 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey
+from datetime import datetime
+from sqlalchemy import Boolean, Column, Float, Integer, String, Numeric, DateTime, ForeignKey, Index, event, false, inspect, text, update
 from sqlalchemy.sql import func
 from ..database import Base
+from ..utils import calculate_emi
+from .loan_aggregate import AggregateDeltas
 
 class Loan(Base):
     __tablename__ = "loans"
+    # Hot paths: admin pending queue and customer history, both paged by (applied_at, id)
+    __table_args__ = (
+        Index("ix_loans_status_applied_at", "status", "applied_at", "id"),
+        Index("ix_loans_customer_id_applied_at", "customer_id", "applied_at", "id"),
+        Index(
+            "ix_loans_pending_applied_at", "applied_at", "id",
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'"),
+        ),
+        # Review queue of flagged applications
+        Index(
+            "ix_loans_flagged_pending_applied_at", "applied_at", "id",
+            sqlite_where=text("flagged = 1 AND status = 'pending'"),
+            postgresql_where=text("flagged AND status = 'pending'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
@@ -13,5 +32,78 @@ class Loan(Base):
     interest_rate = Column(Numeric(5, 2), nullable=False)
     emi = Column(Numeric(12, 2), nullable=True)
     status = Column(String(20), nullable=False, default="pending")
-    applied_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), nullable=True, onupdate=func.now())
\ No newline at end of file
+    # Set client-side so the stored value round-trips exactly in keyset cursors
+    applied_at = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=True, onupdate=func.now())
+    # Set by the fraud scorer when the application comes in, revised by background re-scoring
+    fraud_score = Column(Float, nullable=True)
+    flagged = Column(Boolean, nullable=False, default=False, server_default=false())
+    # Bumped by every decision; see decide_loan
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
+EMI_TERMS = ("amount", "interest_rate", "tenure_months")
+
+def decide_loan(loan: Loan, status: str):
+    """
+    Conditional UPDATE moving loan, as read, from pending to status, its aggregate deltas and its new EMI.
+
+    The UPDATE matches no row if the loan was decided or its version bumped
+    since it was read, so two concurrent decisions cannot both succeed.
+    """
+    if status == "approved":
+        emi = loan.emi if loan.emi is not None else calculate_emi(loan.amount, loan.interest_rate, loan.tenure_months)
+    else:
+        emi = None
+    stmt = (
+        update(Loan)
+        .where(Loan.id == loan.id, Loan.status == "pending", Loan.version == loan.version)
+        .values(status=status, emi=emi, version=Loan.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    # A Core UPDATE skips the ORM listeners below
+    deltas = AggregateDeltas()
+    deltas.move(
+        ("pending", loan.loan_type, loan.applied_at, loan.amount, loan.emi),
+        (status, loan.loan_type, loan.applied_at, loan.amount, emi),
+    )
+    return stmt, deltas, emi
+
+@event.listens_for(Loan, "before_insert")
+def _set_emi_on_insert(mapper, connection, target):
+    # Loans created outside apply_for_loan still get their EMI stored once
+    if target.emi is None and target.status != "rejected":
+        target.emi = calculate_emi(target.amount, target.interest_rate, target.tenure_months)
+
+@event.listens_for(Loan, "before_update")
+def _refresh_emi_on_terms_change(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in EMI_TERMS):
+        target.emi = calculate_emi(target.amount, target.interest_rate, target.tenure_months)
+
+# loan_aggregates follows every ORM write to loans within the same flush;
+# Core UPDATEs (bulk decisions) record their own deltas
+AGGREGATE_KEYS = ("status", "loan_type", "applied_at", "amount", "emi")
+
+def _previous_value(state, name):
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), name)
+
+@event.listens_for(Loan, "after_insert")
+def _count_inserted_loan(mapper, connection, target):
+    deltas = AggregateDeltas()
+    deltas.add(*(getattr(target, name) for name in AGGREGATE_KEYS))
+    deltas.apply(connection)
+
+@event.listens_for(Loan, "after_update")
+def _move_updated_loan(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in AGGREGATE_KEYS):
+        return
+    deltas = AggregateDeltas()
+    deltas.move(
+        tuple(_previous_value(state, name) for name in AGGREGATE_KEYS),
+        tuple(getattr(target, name) for name in AGGREGATE_KEYS),
+    )
+    deltas.apply(connection)
@@ -0,0 +1,83 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import Column, Integer, String, Numeric, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from ..database import Base
+
+class LoanAggregate(Base):
+    """Running loan counts and totals per (status, loan_type, month applied), kept in step with loans."""
+    __tablename__ = "loan_aggregates"
+
+    status = Column(String(20), primary_key=True)
+    loan_type = Column(String(50), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM of applied_at
+    loan_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(16, 2), nullable=False, default=0)
+    total_emi = Column(Numeric(16, 2), nullable=False, default=0)
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def aggregate_month(applied_at) -> str:
+    return (applied_at or datetime.utcnow()).strftime("%Y-%m")
+
+class AggregateDeltas:
+    """Accumulates changes to loan_aggregates so they can be written in one statement."""
+
+    def __init__(self):
+        self._deltas = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+
+    def add(self, status: str, loan_type: str, applied_at, amount, emi, sign: int = 1) -> None:
+        delta = self._deltas[(status, loan_type, aggregate_month(applied_at))]
+        delta[0] += sign
+        delta[1] += sign * Decimal(str(amount))
+        if emi is not None:
+            delta[2] += sign * Decimal(str(emi))
+
+    def move(self, old: tuple, new: tuple) -> None:
+        """Move one loan from old to new, each (status, loan_type, applied_at, amount, emi)."""
+        self.add(*old, sign=-1)
+        self.add(*new)
+
+    def __bool__(self) -> bool:
+        return any(delta != [0, 0, 0] for delta in self._deltas.values())
+
+    def rows(self) -> list[dict]:
+        return [
+            {"status": status, "loan_type": loan_type, "month": month,
+             "loan_count": count, "total_amount": amount, "total_emi": emi}
+            for (status, loan_type, month), (count, amount, emi) in self._deltas.items()
+            if (count, amount, emi) != (0, 0, 0)
+        ]
+
+    def apply(self, connection) -> None:
+        """Add the deltas to loan_aggregates on connection, inside the caller's transaction."""
+        rows = self.rows()
+        if not rows:
+            return
+        table = LoanAggregate.__table__
+        upsert = _UPSERT_DIALECTS.get(connection.dialect.name)
+        if upsert is not None:
+            stmt = upsert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.status, table.c.loan_type, table.c.month],
+                set_={
+                    "loan_count": table.c.loan_count + stmt.excluded.loan_count,
+                    "total_amount": table.c.total_amount + stmt.excluded.total_amount,
+                    "total_emi": table.c.total_emi + stmt.excluded.total_emi,
+                },
+            )
+            connection.execute(stmt, rows)
+            return
+        for row in rows:
+            result = connection.execute(
+                update(table)
+                .where(table.c.status == row["status"], table.c.loan_type == row["loan_type"], table.c.month == row["month"])
+                .values(
+                    loan_count=table.c.loan_count + row["loan_count"],
+                    total_amount=table.c.total_amount + row["total_amount"],
+                    total_emi=table.c.total_emi + row["total_emi"],
+                )
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table), [row])
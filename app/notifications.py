@@ -0,0 +1,66 @@
+"""
+Notifications to customers and admins, delivered by background jobs.
+
+Routes call the notify_* helpers before they commit; the message goes out
+after the commit, from a job worker, and is retried if delivery fails.
+deliver() writes to the "app.notifications" log; an email or SMS gateway
+plugs in there.
+"""
+import logging
+from typing import Optional
+from sqlalchemy.orm import Session
+from .jobs import enqueue, enqueue_many, handler
+from .models import Customer
+
+logger = logging.getLogger("app.notifications")
+
+ADMINS = "admins"
+
+
+def deliver(recipient: str, subject: str, body: str) -> None:
+    logger.info("To %s: %s - %s", recipient, subject, body)
+
+
+@handler("notify")
+def _send(db: Session, payload: dict) -> None:
+    recipient = ADMINS
+    if payload.get("customer_id") is not None:
+        recipient = db.query(Customer.email).filter(Customer.id == payload["customer_id"]).scalar()
+        if recipient is None:
+            return  # The customer no longer exists
+    deliver(recipient, payload["subject"], payload["body"])
+
+
+def _message(customer_id: Optional[int], subject: str, body: str) -> dict:
+    return {"customer_id": customer_id, "subject": subject, "body": body}
+
+
+def notify(db: Session, customer_id: Optional[int], subject: str, body: str) -> None:
+    """Queue a message to a customer, or to the admins when customer_id is None, in db's transaction."""
+    enqueue(db, "notify", _message(customer_id, subject, body))
+
+
+def notify_registered(db: Session, customer) -> None:
+    notify(db, customer.id, "Welcome", f"Welcome to HCL Bank, {customer.name}.")
+
+
+def notify_loan_applied(db: Session, loan) -> None:
+    notify(db, loan.customer_id, "Loan application received", f"Your {loan.loan_type} loan application #{loan.id} is under review.")
+    if loan.flagged:
+        notify(db, None, "Loan application flagged", f"Loan #{loan.id} scored {loan.fraud_score} for fraud and needs review.")
+
+
+def _decision_message(loan_id: int, customer_id: int, status: str, emi) -> dict:
+    body = f"Your loan application #{loan_id} has been {status}."
+    if emi is not None:
+        body += f" Your EMI is {float(emi):.2f}."
+    return _message(customer_id, f"Loan {status}", body)
+
+
+def notify_loan_decided(db: Session, loan_id: int, customer_id: int, status: str, emi) -> None:
+    enqueue(db, "notify", _decision_message(loan_id, customer_id, status, emi))
+
+
+def notify_loan_decisions(db: Session, decisions: list[tuple]) -> None:
+    """Queue a message per decision, each (loan_id, customer_id, status, emi), in one insert; sync sessions only."""
+    enqueue_many(db, "notify", [_decision_message(*decision) for decision in decisions])
@@ -0,0 +1,117 @@
+"""
+Read replicas for the heavy read-only routes.
+
+Routes that depend on get_read_db instead of get_db read from one of
+DATABASE_REPLICA_URLS, taken round-robin; with none configured they read
+from the primary as before. Replicas lag the primary, so a client that has
+just committed a write would not see it there: ReadYourWritesMiddleware
+notices any commit made while handling a request and sets a cookie that
+keeps that client's reads on the primary for
+REPLICA_READ_YOUR_WRITES_SECONDS. The cookie travels with the client, so
+this holds across worker processes.
+"""
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.requests import cookie_parser
+from .config import settings
+from .database import AsyncSessionLocal, SessionLocal, build_engine, create_async_session_factory, to_async_url
+from .metrics import record_threadpool_wait
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+# Per-request state set by the middleware: {"primary_until": float, "committed": bool}
+_client = ContextVar("replica_client", default=None)
+
+
+class ReadRouter:
+    """Picks the session factory for a read: the primary for a client that has just written, else the next replica."""
+
+    def __init__(self, primary, replicas: list):
+        self.primary = primary
+        self.replicas = replicas
+        self.reads = {"primary": 0, "replica": 0}
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def session_factory(self, primary_until: float = 0.0):
+        # Sync reads pick their session on threadpool threads, so the counters are shared
+        with self._lock:
+            if not self.replicas or time.time() < primary_until:
+                self.reads["primary"] += 1
+                return self.primary
+            self.reads["replica"] += 1
+            return self.replicas[next(self._next) % len(self.replicas)]
+
+    def for_current_client(self):
+        client = _client.get()
+        return self.session_factory(client["primary_until"] if client else 0.0)
+
+
+read_router = ReadRouter(SessionLocal, [
+    sessionmaker(autocommit=False, autoflush=False, bind=build_engine(url)) for url in settings.database_replica_urls
+])
+async_read_router = None
+if settings.async_mode:
+    async_read_router = ReadRouter(AsyncSessionLocal, [
+        create_async_session_factory(to_async_url(url))[1] for url in settings.database_replica_urls
+    ])
+
+
+@event.listens_for(Session, "after_commit")
+def _note_commit(session: Session) -> None:
+    # Commits made outside a request (job workers, the ledger writer) see no client
+    client = _client.get()
+    if client is not None:
+        client["committed"] = True
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware; sets READ_PRIMARY_COOKIE on responses to requests that committed."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not read_router.replicas:
+            await self.app(scope, receive, send)
+            return
+        cookies = cookie_parser(dict(scope["headers"]).get(b"cookie", b"").decode("latin-1"))
+        try:
+            primary_until = float(cookies.get(READ_PRIMARY_COOKIE, 0))
+        except ValueError:
+            primary_until = 0.0
+        client = {"primary_until": primary_until, "committed": False}
+        token = _client.set(client)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and client["committed"]:
+                window = settings.replica_read_your_writes_seconds
+                cookie = f"{READ_PRIMARY_COOKIE}={time.time() + window:.3f}; Max-Age={int(window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": [*message["headers"], (b"set-cookie", cookie.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _client.reset(token)
+
+
+def get_read_db():
+    """Session for read-only routes: a replica, or the primary when none is configured or the client just wrote."""
+    record_threadpool_wait()
+    db = read_router.for_current_client()()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    if async_read_router is None:
+        raise RuntimeError("Async database access requires ASYNC_MODE=true")
+    async with async_read_router.for_current_client()() as db:
+        yield db
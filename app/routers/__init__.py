@@ -1,3 +1,6 @@
 from .auth import router as auth_router
 from .customers import router as customers_router
-from .admins import router as admins_router
\ No newline at end of file
+from .admins import router as admins_router
+from .customers_async import router as customers_async_router
+from .admins_async import router as admins_async_router
+from .auditors import router as auditors_router
\ No newline at end of file
@@ -1,32 +1,248 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..auth import get_current_admin
-from ..models import Loan
-from ..schemas import LoanResponse, LoanUpdate
-from ..utils import calculate_emi
+from ..replicas import get_read_db
+from ..auth import get_admin_principal
+from ..models import Account, Loan, AggregateDeltas, decide_loan
+from ..schemas import LoanResponse, LoanUpdate, AdminLoanList, LoanDecision, LoanDecisionResult, DepositCreate, TransferResponse
+from ..utils import calculate_emi_batch
+from .. import fraud
+from ..ledger import CASH_ACCOUNT_TYPE, Transfer, TransferRefused, cash_account_id, from_minor, posting_engine, to_minor
+from ..notifications import notify_loan_decided, notify_loan_decisions
+from .. import audit
+from ..events import ADMIN_CHANNEL, event_stream_response, publish_loan_decisions
+from ..utils.pagination import LoanFilters, filter_loans, paginate_loans
+from ..utils.serialization import ADMIN_LOAN_COLUMNS, admin_loan_page
+from ..utils.export import iter_csv, iter_ndjson
+from ..utils.amortization import PORTFOLIO_COLUMNS, portfolio_schedules
 
 router = APIRouter(prefix="/admins", tags=["admins"])
 
-@router.get("/loans", response_model=list[LoanResponse])
-def get_pending_loans(db: Session = Depends(get_db), current_admin=Depends(get_current_admin)):
-    loans = db.query(Loan).filter(Loan.status == "pending").all()
-    # Calculate EMI for each pending loan so admin can see it before approval
-    for loan in loans:
-        loan.emi = calculate_emi(loan.amount, loan.interest_rate, loan.tenure_months)
-    return loans
+EXPORT_COLUMNS = (
+    "id", "customer_id", "loan_type", "amount", "tenure_months",
+    "interest_rate", "emi", "status", "applied_at", "updated_at", "fraud_score", "flagged",
+)
+EXPORT_BATCH_SIZE = 1000
+BULK_DECISION_LIMIT = 10000
+BULK_CHUNK_SIZE = 500  # Keeps IN (...) lists well under SQLite's bound-parameter limit
+
+@router.get("/loans", response_model=AdminLoanList)
+def get_pending_loans(
+    filters: LoanFilters = Depends(),
+    flagged: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_admin=Depends(get_admin_principal),
+):
+    if filters.status is None:
+        filters.status = "pending"
+    query = filter_loans(db.query(*ADMIN_LOAN_COLUMNS), filters)
+    if flagged is not None:
+        query = query.filter(Loan.flagged == flagged)
+    # EMI is stored when the loan is created, so the listing is a plain read
+    try:
+        loans, next_cursor = paginate_loans(query, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return admin_loan_page.response(loans, next_cursor)
+
+@router.get("/events")
+def loan_events(db: Session = Depends(get_db), current_admin=Depends(get_admin_principal)):
+    """Server-Sent Events: loan.applied for every new application, loan.decided for every decision."""
+    # Hand back any connection the auth check used; the stream can stay open for hours
+    db.close()
+    return event_stream_response(ADMIN_CHANNEL)
+
+@router.post("/loans/rescore", status_code=202)
+def rescore_loans(current_admin=Depends(get_admin_principal)):
+    # Replays every loan, so it runs on the background worker rather than in the request
+    fraud.worker.trigger()
+    audit.record("admin", current_admin.user_id, "fraud.rescore", "loans")
+    return {"detail": "Re-scoring started"}
+
+@router.get("/loans/export")
+def export_loans(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: LoanFilters = Depends(),
+    db: Session = Depends(get_read_db),
+    current_admin=Depends(get_admin_principal),
+):
+    # Plain column tuples fetched through a server-side cursor, so memory stays
+    # flat and the first rows go out before the query has been fully read
+    query = filter_loans(db.query(*(getattr(Loan, name) for name in EXPORT_COLUMNS)), filters)
+    rows = query.order_by(Loan.applied_at, Loan.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    if format == "csv":
+        return StreamingResponse(
+            iter_csv(rows, EXPORT_COLUMNS),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="loans.csv"'},
+        )
+    return StreamingResponse(iter_ndjson(rows, EXPORT_COLUMNS), media_type="application/x-ndjson")
+
+@router.get("/loans/schedules")
+def export_loan_schedules(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: LoanFilters = Depends(),
+    db: Session = Depends(get_db),
+    current_admin=Depends(get_admin_principal),
+):
+    # Repayment schedules for a whole portfolio, generated loan by loan as the
+    # streamed query is read; defaults to approved loans
+    if filters.status is None:
+        filters.status = "approved"
+    query = filter_loans(
+        db.query(Loan.id, Loan.amount, Loan.interest_rate, Loan.tenure_months, Loan.emi), filters,
+    )
+    loans = query.order_by(Loan.applied_at, Loan.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    rows = portfolio_schedules(loans)
+    if format == "csv":
+        return StreamingResponse(
+            iter_csv(rows, PORTFOLIO_COLUMNS),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="schedules.csv"'},
+        )
+    return StreamingResponse(iter_ndjson(rows, PORTFOLIO_COLUMNS), media_type="application/x-ndjson")
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _apply_decisions(db: Session, status: str, loan_ids: list[int]) -> dict[int, tuple[int, Optional[float]]]:
+    """Move pending loans to status with set-based UPDATEs; returns (customer_id, EMI) of each updated loan."""
+    updated = {}
+    deltas = AggregateDeltas()
+    for chunk in _chunks(loan_ids):
+        stmt = (
+            update(Loan)
+            .where(Loan.id.in_(chunk), Loan.status == "pending")
+            .values(status=status, version=Loan.version + 1)
+            .returning(Loan.id, Loan.customer_id, Loan.loan_type, Loan.applied_at, Loan.amount, Loan.interest_rate, Loan.tenure_months, Loan.emi)
+            .execution_options(synchronize_session=False)
+        )
+        rows = db.execute(stmt).all()
+        if status == "approved":
+            new_emi = {row.id: float(row.emi) for row in rows if row.emi is not None}
+            missing = [row for row in rows if row.emi is None]
+            if missing:
+                # Legacy loans without a stored EMI get it in one batch computation
+                emis = calculate_emi_batch(
+                    [row.amount for row in missing],
+                    [row.interest_rate for row in missing],
+                    [row.tenure_months for row in missing],
+                )
+                db.execute(update(Loan), [{"id": row.id, "emi": emi} for row, emi in zip(missing, emis)])
+                new_emi.update((row.id, emi) for row, emi in zip(missing, emis))
+        else:
+            # Cleared separately so RETURNING above still reports the pending EMI for the aggregates
+            new_emi = {}
+            if rows:
+                db.execute(
+                    update(Loan).where(Loan.id.in_([row.id for row in rows])).values(emi=None)
+                    .execution_options(synchronize_session=False)
+                )
+        for row in rows:
+            updated[row.id] = (row.customer_id, new_emi.get(row.id))
+            deltas.move(
+                ("pending", row.loan_type, row.applied_at, row.amount, row.emi),
+                (status, row.loan_type, row.applied_at, row.amount, new_emi.get(row.id)),
+            )
+    deltas.apply(db.connection())
+    return updated
+
+@router.put("/loans/bulk", response_model=list[LoanDecisionResult])
+def bulk_update_loan_status(
+    decisions: list[LoanDecision] = Body(..., max_length=BULK_DECISION_LIMIT),
+    db: Session = Depends(get_db),
+    current_admin=Depends(get_admin_principal),
+):
+    # Only the first decision per loan counts; repeats report as conflicts
+    by_status: dict[str, list[int]] = {}
+    seen = set()
+    for decision in decisions:
+        if decision.loan_id not in seen:
+            seen.add(decision.loan_id)
+            by_status.setdefault(decision.status, []).append(decision.loan_id)
+
+    updated: dict[int, tuple[str, Optional[float]]] = {}
+    decided = []
+    for status, loan_ids in by_status.items():
+        for loan_id, (customer_id, emi) in _apply_decisions(db, status, loan_ids).items():
+            updated[loan_id] = (status, emi)
+            decided.append((loan_id, customer_id, status, emi))
+
+    # Anything not updated either exists with another status or does not exist
+    current = {}
+    not_updated = [loan_id for loan_id in seen if loan_id not in updated]
+    for chunk in _chunks(not_updated):
+        for row in db.execute(select(Loan.id, Loan.status, Loan.emi).where(Loan.id.in_(chunk))):
+            current[row.id] = (row.status, float(row.emi) if row.emi is not None else None)
+    notify_loan_decisions(db, decided)
+    db.commit()
+    for loan_id, _, status, _ in decided:
+        audit.record("admin", current_admin.user_id, "loan.decide", "loan", loan_id, status=status, bulk=True)
+    publish_loan_decisions(decided)
+
+    results = []
+    reported = set()
+    for decision in decisions:
+        loan_id = decision.loan_id
+        if loan_id in updated:
+            status, emi = updated[loan_id]
+            result = "conflict" if loan_id in reported else "updated"
+            results.append(LoanDecisionResult(loan_id=loan_id, result=result, status=status, emi=emi))
+        elif loan_id in current:
+            status, emi = current[loan_id]
+            results.append(LoanDecisionResult(loan_id=loan_id, result="conflict", status=status, emi=emi))
+        else:
+            results.append(LoanDecisionResult(loan_id=loan_id, result="not_found"))
+        reported.add(loan_id)
+    return results
 
 @router.put("/loans/{loan_id}", response_model=LoanResponse)
-def update_loan_status(loan_id: int, update: LoanUpdate, db: Session = Depends(get_db), current_admin=Depends(get_current_admin)):
+def update_loan_status(loan_id: int, update: LoanUpdate, db: Session = Depends(get_db), current_admin=Depends(get_admin_principal)):
     loan = db.query(Loan).filter(Loan.id == loan_id).first()
     if not loan:
         raise HTTPException(status_code=404, detail="Loan not found")
     if loan.status != "pending":
         raise HTTPException(status_code=400, detail="Loan is not pending")
-    loan.status = update.status
-    if update.status == "approved":
-        emi = calculate_emi(loan.amount, loan.interest_rate, loan.tenure_months)
-        loan.emi = emi
+    if update.version is not None and update.version != loan.version:
+        raise HTTPException(status_code=409, detail="Loan was modified since it was read")
+    stmt, deltas, emi = decide_loan(loan, update.status)
+    if db.execute(stmt).rowcount != 1:
+        # Another decision committed between the read and the UPDATE
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Loan was modified since it was read")
+    deltas.apply(db.connection())
+    notify_loan_decided(db, loan.id, loan.customer_id, update.status, emi)
     db.commit()
     db.refresh(loan)
-    return loan
\ No newline at end of file
+    audit.record("admin", current_admin.user_id, "loan.decide", "loan", loan.id, status=loan.status, version=loan.version)
+    publish_loan_decisions([(loan.id, loan.customer_id, loan.status, loan.emi)])
+    return loan
+
+@router.post("/accounts/{account_id}/deposits", response_model=TransferResponse)
+def deposit(account_id: int, deposit: DepositCreate, db: Session = Depends(get_db), current_admin=Depends(get_admin_principal)):
+    """Credit a customer account from the bank's cash account, e.g. for cash paid in at a branch."""
+    if not db.query(Account.id).filter(Account.id == account_id, Account.account_type != CASH_ACCOUNT_TYPE).first():
+        raise HTTPException(status_code=404, detail="Account not found")
+    source_id = cash_account_id(db)
+    amount_minor = to_minor(deposit.amount)
+    try:
+        posted = posting_engine.post(db, Transfer(source_id, account_id, amount_minor, deposit.reference))
+    except TransferRefused as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    audit.record(
+        "admin", current_admin.user_id, "account.deposit", "transfer", posted.transfer_id,
+        to_account_id=account_id, amount_minor=amount_minor,
+    )
+    return {
+        "transfer_id": posted.transfer_id,
+        "from_account_id": source_id,
+        "to_account_id": account_id,
+        "amount": from_minor(amount_minor),
+        "balance": from_minor(posted.to_balance_minor),
+    }
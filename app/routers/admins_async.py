@@ -0,0 +1,60 @@
+"""Async versions of the hot admin routes, mounted ahead of the sync ones when ASYNC_MODE is on."""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from ..database import get_async_db
+from ..replicas import get_async_read_db
+from ..auth import get_admin_principal_async
+from ..models import Loan, decide_loan
+from ..schemas import LoanResponse, LoanUpdate, AdminLoanList
+from ..notifications import notify_loan_decided
+from .. import audit
+from ..events import publish_loan_decisions
+from ..utils.pagination import LoanFilters, filter_loans, keyset_page, split_page
+from ..utils.serialization import ADMIN_LOAN_COLUMNS, admin_loan_page
+
+router = APIRouter(prefix="/admins", tags=["admins"])
+
+@router.get("/loans", response_model=AdminLoanList)
+async def get_pending_loans(
+    filters: LoanFilters = Depends(),
+    flagged: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db=Depends(get_async_read_db),
+    current_admin=Depends(get_admin_principal_async),
+):
+    if filters.status is None:
+        filters.status = "pending"
+    query = filter_loans(select(*ADMIN_LOAN_COLUMNS), filters)
+    if flagged is not None:
+        query = query.where(Loan.flagged == flagged)
+    try:
+        query = keyset_page(query, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    loans, next_cursor = split_page((await db.execute(query)).all(), limit)
+    return admin_loan_page.response(loans, next_cursor)
+
+# The int convertor keeps this from shadowing the sync PUT /admins/loans/bulk
+@router.put("/loans/{loan_id:int}", response_model=LoanResponse)
+async def update_loan_status(loan_id: int, update: LoanUpdate, db=Depends(get_async_db), current_admin=Depends(get_admin_principal_async)):
+    loan = await db.get(Loan, loan_id)
+    if not loan:
+        raise HTTPException(status_code=404, detail="Loan not found")
+    if loan.status != "pending":
+        raise HTTPException(status_code=400, detail="Loan is not pending")
+    if update.version is not None and update.version != loan.version:
+        raise HTTPException(status_code=409, detail="Loan was modified since it was read")
+    stmt, deltas, emi = decide_loan(loan, update.status)
+    if (await db.execute(stmt)).rowcount != 1:
+        # Another decision committed between the read and the UPDATE
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Loan was modified since it was read")
+    await db.run_sync(lambda session: deltas.apply(session.connection()))
+    notify_loan_decided(db, loan.id, loan.customer_id, update.status, emi)
+    await db.commit()
+    await db.refresh(loan)
+    audit.record("admin", current_admin.user_id, "loan.decide", "loan", loan.id, status=loan.status, version=loan.version)
+    publish_loan_decisions([(loan.id, loan.customer_id, loan.status, loan.emi)])
+    return loan
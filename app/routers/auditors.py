@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from ..replicas import get_read_db
+from ..auth import get_admin_principal
+from ..models import AuditEntry, LoanAggregate
+from ..schemas import AuditLogPage, PortfolioReport
+
+router = APIRouter(prefix="/auditors", tags=["auditors"])
+
+MONTH_PATTERN = r"^\d{4}-\d{2}$"
+
+@router.get("/portfolio", response_model=PortfolioReport)
+def get_portfolio(
+    status: Optional[str] = None,
+    loan_type: Optional[str] = None,
+    month_from: Optional[str] = Query(None, pattern=MONTH_PATTERN),
+    month_to: Optional[str] = Query(None, pattern=MONTH_PATTERN),
+    db: Session = Depends(get_read_db),
+    current_admin=Depends(get_admin_principal),
+):
+    # Reads the precomputed groups, so the cost does not grow with the loans table
+    query = db.query(LoanAggregate).filter(LoanAggregate.loan_count != 0)
+    if status is not None:
+        query = query.filter(LoanAggregate.status == status)
+    if loan_type is not None:
+        query = query.filter(LoanAggregate.loan_type == loan_type)
+    if month_from is not None:
+        query = query.filter(LoanAggregate.month >= month_from)
+    if month_to is not None:
+        query = query.filter(LoanAggregate.month <= month_to)
+    groups = query.order_by(LoanAggregate.month, LoanAggregate.status, LoanAggregate.loan_type).all()
+    return {
+        "groups": groups,
+        "loan_count": sum(group.loan_count for group in groups),
+        "total_amount": float(sum(group.total_amount for group in groups)),
+        "total_emi": float(sum(group.total_emi for group in groups)),
+    }
+
+def _naive_utc(value: datetime) -> datetime:
+    """Audit times are stored as naive UTC; times without an offset are taken to be UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+@router.get("/audit", response_model=AuditLogPage)
+def get_audit_log(
+    actor_type: Optional[str] = None,
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_admin=Depends(get_admin_principal),
+):
+    """Audit entries, newest first; entries appear once the flusher has written them, within about a second."""
+    query = db.query(AuditEntry)
+    if actor_type is not None:
+        query = query.filter(AuditEntry.actor_type == actor_type)
+    if actor_id is not None:
+        query = query.filter(AuditEntry.actor_id == actor_id)
+    if action is not None:
+        query = query.filter(AuditEntry.action == action)
+    if resource_type is not None:
+        query = query.filter(AuditEntry.resource_type == resource_type)
+    if resource_id is not None:
+        query = query.filter(AuditEntry.resource_id == resource_id)
+    if since is not None:
+        query = query.filter(AuditEntry.at >= _naive_utc(since))
+    if until is not None:
+        query = query.filter(AuditEntry.at < _naive_utc(until))
+    if cursor is not None:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(AuditEntry.id < int(cursor))
+    entries = query.order_by(AuditEntry.id.desc()).limit(limit + 1).all()
+    next_cursor = str(entries[limit - 1].id) if len(entries) > limit else None
+    return {
+        "entries": [{
+            "id": entry.id, "at": entry.at, "actor_type": entry.actor_type, "actor_id": entry.actor_id,
+            "action": entry.action, "resource_type": entry.resource_type, "resource_id": entry.resource_id,
+            "detail": json.loads(entry.detail) if entry.detail else None,
+        } for entry in entries[:limit]],
+        "next_cursor": next_cursor,
+    }
@@ -1,24 +1,26 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import Customer, BankAdmin
 from ..schemas.customer import CustomerCreate, CustomerResponse
 from ..schemas.auth import LoginRequest, Token
 from fastapi.security import OAuth2PasswordRequestForm
-from ..auth import get_password_hash, verify_password, create_access_token
+from ..auth import hash_password, verify_and_update_password, create_access_token, token_claims, lookup_principal
 from ..config import settings
+from ..notifications import notify_registered
+from .. import audit
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=CustomerResponse)
 def register_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
-    # Check if email already exists
-    db_customer = db.query(Customer).filter(Customer.email == customer.email).first()
-    if db_customer:
+    # Check if email already exists, for a customer or an admin
+    if lookup_principal(db, customer.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(customer.password)
+    hashed_password = hash_password(customer.password)
     db_customer = Customer(
         name=customer.name,
         email=customer.email,
@@ -28,29 +30,34 @@ def register_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
         address=customer.address
     )
     db.add(db_customer)
+    db.flush()
+    notify_registered(db, db_customer)
     db.commit()
     db.refresh(db_customer)
+    audit.record("customer", db_customer.id, "customer.register", "customer", db_customer.id)
     return db_customer
 
 @router.post("/token", response_model=Token)
 def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    # Determine if admin based on username
-    is_admin = form_data.username == "admin@example.com"
-    
-    if is_admin:
-        user = db.query(BankAdmin).filter(BankAdmin.email == form_data.username).first()
-    else:
-        user = db.query(Customer).filter(Customer.email == form_data.username).first()
-    
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # One round trip finds the user whichever role they have
+    user = lookup_principal(db, form_data.username)
+    verified, new_hash = verify_and_update_password(form_data.password, user.password_hash) if user else (False, None)
+    if not verified:
+        audit.record("anonymous", None, "auth.login_failed", "principal", None, username=form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+    if new_hash:
+        # Hashing policy changed since this password was stored
+        model = BankAdmin if user.is_admin else Customer
+        db.execute(update(model).where(model.id == user.id).values(password_hash=new_hash))
+        db.commit()
+    audit.record("admin" if user.is_admin else "customer", user.id, "auth.login", "principal", user.id, rehashed=bool(new_hash))
+
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.email, "is_admin": is_admin}, expires_delta=access_token_expires
+        data=token_claims(user, user.is_admin), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
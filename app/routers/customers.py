@@ -1,9 +1,26 @@
-from fastapi import APIRouter, Depends
+from itertools import islice
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..auth import get_current_customer
-from ..models import Loan
-from ..schemas import LoanCreate, LoanResponse, CustomerResponse
+from ..replicas import get_read_db
+from ..auth import get_current_customer, get_customer_principal
+from ..models import Account, LedgerEntry, Loan
+from ..schemas import (
+    LoanCreate, LoanResponse, LoanList, LoanSchedule, CustomerResponse,
+    AccountCreate, AccountResponse, AccountStatement, TransferCreate, TransferResponse,
+)
+from ..utils import calculate_emi
+from ..fraud import score_application
+from ..ledger import ACCOUNT_TYPES, CASH_ACCOUNT_TYPE, Transfer, TransferRefused, from_minor, posting_engine, to_minor
+from ..notifications import notify_loan_applied
+from .. import audit
+from ..events import customer_channel, event_stream_response, publish_loan_applied
+from ..utils.amortization import SCHEDULE_COLUMNS, amortization_schedule
+from ..utils.export import iter_ndjson
+from ..utils.pagination import LoanFilters, filter_loans, paginate_loans
+from ..utils.serialization import LOAN_COLUMNS, loan_page
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
@@ -12,21 +29,161 @@ def get_customer_profile(current_customer=Depends(get_current_customer)):
     return current_customer
 
 @router.post("/loans", response_model=LoanResponse)
-def apply_for_loan(loan: LoanCreate, db: Session = Depends(get_db), current_customer=Depends(get_current_customer)):
+def apply_for_loan(loan: LoanCreate, db: Session = Depends(get_db), principal=Depends(get_customer_principal)):
+    fraud = score_application(principal.user_id, loan)
     db_loan = Loan(
-        customer_id=current_customer.id,
+        customer_id=principal.user_id,
         loan_type=loan.loan_type,
         amount=loan.amount,
         tenure_months=loan.tenure_months,
         interest_rate=loan.interest_rate,
-        status="pending"
+        emi=calculate_emi(loan.amount, loan.interest_rate, loan.tenure_months),
+        status="pending",
+        fraud_score=fraud.score,
+        flagged=fraud.flagged,
     )
     db.add(db_loan)
+    db.flush()
+    notify_loan_applied(db, db_loan)
     db.commit()
     db.refresh(db_loan)
+    audit.record("customer", principal.user_id, "loan.apply", "loan", db_loan.id, amount=loan.amount, flagged=fraud.flagged)
+    publish_loan_applied(db_loan)
     return db_loan
 
-@router.get("/loans", response_model=list[LoanResponse])
-def get_customer_loans(db: Session = Depends(get_db), current_customer=Depends(get_current_customer)):
-    loans = db.query(Loan).filter(Loan.customer_id == current_customer.id).all()
-    return loans
\ No newline at end of file
+@router.get("/events")
+def loan_events(db: Session = Depends(get_db), principal=Depends(get_customer_principal)):
+    """Server-Sent Events for the customer's own loans: loan.applied and loan.decided."""
+    # Hand back any connection the auth check used; the stream can stay open for hours
+    db.close()
+    return event_stream_response(customer_channel(principal.user_id))
+
+@router.get("/loans", response_model=LoanList)
+def get_customer_loans(
+    filters: LoanFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    principal=Depends(get_customer_principal),
+):
+    query = filter_loans(db.query(*LOAN_COLUMNS).filter(Loan.customer_id == principal.user_id), filters)
+    try:
+        loans, next_cursor = paginate_loans(query, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return loan_page.response(loans, next_cursor)
+
+@router.get("/loans/{loan_id}/schedule", response_model=LoanSchedule)
+def get_loan_schedule(
+    loan_id: int,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(120, ge=1, le=500),
+    db: Session = Depends(get_db),
+    principal=Depends(get_customer_principal),
+):
+    loan = (
+        db.query(Loan.id, Loan.amount, Loan.interest_rate, Loan.tenure_months, Loan.emi)
+        .filter(Loan.id == loan_id, Loan.customer_id == principal.user_id)
+        .first()
+    )
+    if not loan:
+        raise HTTPException(status_code=404, detail="Loan not found")
+    emi = loan.emi if loan.emi is not None else calculate_emi(loan.amount, loan.interest_rate, loan.tenure_months)
+    # Rows are generated lazily; only the requested page is ever materialized
+    schedule = islice(amortization_schedule(loan.amount, loan.interest_rate, loan.tenure_months, emi), offset, None)
+    if format == "ndjson":
+        # Streams every installment from offset onwards
+        return StreamingResponse(iter_ndjson(schedule, SCHEDULE_COLUMNS), media_type="application/x-ndjson")
+    rows = list(islice(schedule, limit))
+    next_offset = offset + limit if offset + limit < loan.tenure_months else None
+    return {
+        "loan_id": loan.id,
+        "emi": emi,
+        "installments": loan.tenure_months,
+        "rows": [row._asdict() for row in rows],
+        "next_offset": next_offset,
+    }
+
+def _account_response(account) -> dict:
+    return {
+        "id": account.id, "customer_id": account.customer_id, "account_type": account.account_type,
+        "balance": from_minor(account.balance_minor), "created_at": account.created_at,
+    }
+
+@router.post("/accounts", response_model=AccountResponse)
+def open_account(account: AccountCreate, db: Session = Depends(get_db), principal=Depends(get_customer_principal)):
+    if account.account_type not in ACCOUNT_TYPES:
+        raise HTTPException(status_code=400, detail=f"account_type must be one of {', '.join(ACCOUNT_TYPES)}")
+    db_account = Account(customer_id=principal.user_id, account_type=account.account_type)
+    db.add(db_account)
+    db.commit()
+    db.refresh(db_account)
+    audit.record("customer", principal.user_id, "account.open", "account", db_account.id, account_type=account.account_type)
+    return _account_response(db_account)
+
+@router.get("/accounts", response_model=list[AccountResponse])
+def get_accounts(db: Session = Depends(get_db), principal=Depends(get_customer_principal)):
+    accounts = db.query(Account).filter(Account.customer_id == principal.user_id).order_by(Account.id).all()
+    return [_account_response(account) for account in accounts]
+
+@router.get("/accounts/{account_id}/entries", response_model=AccountStatement)
+def get_account_statement(
+    account_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    principal=Depends(get_customer_principal),
+):
+    balance = (
+        db.query(Account.balance_minor)
+        .filter(Account.id == account_id, Account.customer_id == principal.user_id)
+        .scalar()
+    )
+    if balance is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    query = db.query(LedgerEntry).filter(LedgerEntry.account_id == account_id)
+    if cursor is not None:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(LedgerEntry.id < int(cursor))
+    entries = query.order_by(LedgerEntry.id.desc()).limit(limit + 1).all()
+    next_cursor = str(entries[limit - 1].id) if len(entries) > limit else None
+    return {
+        "account_id": account_id,
+        "balance": from_minor(balance),
+        "entries": [{
+            "id": entry.id, "transfer_id": entry.transfer_id, "amount": from_minor(entry.amount_minor),
+            "balance": from_minor(entry.balance_minor), "reference": entry.reference, "created_at": entry.created_at,
+        } for entry in entries[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+@router.post("/transfers", response_model=TransferResponse)
+def transfer_money(transfer: TransferCreate, db: Session = Depends(get_db), principal=Depends(get_customer_principal)):
+    if transfer.from_account_id == transfer.to_account_id:
+        raise HTTPException(status_code=400, detail="Cannot transfer to the same account")
+    owned = db.query(Account.id).filter(
+        Account.id == transfer.from_account_id, Account.customer_id == principal.user_id,
+    ).first()
+    target = db.query(Account.id).filter(
+        Account.id == transfer.to_account_id, Account.account_type != CASH_ACCOUNT_TYPE,
+    ).first()
+    if not owned or not target:
+        raise HTTPException(status_code=404, detail="Account not found")
+    amount_minor = to_minor(transfer.amount)
+    try:
+        posted = posting_engine.post(db, Transfer(transfer.from_account_id, transfer.to_account_id, amount_minor, transfer.reference))
+    except TransferRefused as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    audit.record(
+        "customer", principal.user_id, "transfer.create", "transfer", posted.transfer_id,
+        from_account_id=transfer.from_account_id, to_account_id=transfer.to_account_id, amount_minor=amount_minor,
+    )
+    return {
+        "transfer_id": posted.transfer_id,
+        "from_account_id": transfer.from_account_id,
+        "to_account_id": transfer.to_account_id,
+        "amount": from_minor(amount_minor),
+        "balance": from_minor(posted.from_balance_minor),
+    }
@@ -0,0 +1,61 @@
+"""Async versions of the hot customer routes, mounted ahead of the sync ones when ASYNC_MODE is on."""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from ..database import get_async_db
+from ..replicas import get_async_read_db
+from ..auth import get_current_customer_async, get_customer_principal_async
+from ..models import Loan
+from ..schemas import LoanCreate, LoanResponse, LoanList, CustomerResponse
+from ..utils import calculate_emi
+from ..fraud import score_application
+from ..notifications import notify_loan_applied
+from .. import audit
+from ..events import publish_loan_applied
+from ..utils.pagination import LoanFilters, filter_loans, keyset_page, split_page
+from ..utils.serialization import LOAN_COLUMNS, loan_page
+
+router = APIRouter(prefix="/customers", tags=["customers"])
+
+@router.get("/me", response_model=CustomerResponse)
+async def get_customer_profile(current_customer=Depends(get_current_customer_async)):
+    return current_customer
+
+@router.post("/loans", response_model=LoanResponse)
+async def apply_for_loan(loan: LoanCreate, db=Depends(get_async_db), principal=Depends(get_customer_principal_async)):
+    fraud = score_application(principal.user_id, loan)
+    db_loan = Loan(
+        customer_id=principal.user_id,
+        loan_type=loan.loan_type,
+        amount=loan.amount,
+        tenure_months=loan.tenure_months,
+        interest_rate=loan.interest_rate,
+        emi=calculate_emi(loan.amount, loan.interest_rate, loan.tenure_months),
+        status="pending",
+        fraud_score=fraud.score,
+        flagged=fraud.flagged,
+    )
+    db.add(db_loan)
+    await db.flush()
+    notify_loan_applied(db, db_loan)
+    await db.commit()
+    await db.refresh(db_loan)
+    audit.record("customer", principal.user_id, "loan.apply", "loan", db_loan.id, amount=loan.amount, flagged=fraud.flagged)
+    publish_loan_applied(db_loan)
+    return db_loan
+
+@router.get("/loans", response_model=LoanList)
+async def get_customer_loans(
+    filters: LoanFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db=Depends(get_async_read_db),
+    principal=Depends(get_customer_principal_async),
+):
+    query = filter_loans(select(*LOAN_COLUMNS).where(Loan.customer_id == principal.user_id), filters)
+    try:
+        query = keyset_page(query, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    loans, next_cursor = split_page((await db.execute(query)).all(), limit)
+    return loan_page.response(loans, next_cursor)
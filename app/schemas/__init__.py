@@ -1,3 +1,5 @@
 from .customer import CustomerCreate, CustomerLogin, CustomerResponse
 from .auth import Token, TokenData, LoginRequest
-from .loan import LoanCreate, LoanResponse, LoanUpdate, LoanList
\ No newline at end of file
+from .loan import LoanCreate, LoanResponse, AdminLoanResponse, LoanUpdate, LoanList, AdminLoanList, LoanDecision, LoanDecisionResult, ScheduleEntry, LoanSchedule
+from .auditor import PortfolioAggregate, PortfolioReport, AuditEntryResponse, AuditLogPage
+from .account import AccountCreate, AccountResponse, TransferCreate, DepositCreate, TransferResponse, LedgerEntryResponse, AccountStatement
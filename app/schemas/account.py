@@ -0,0 +1,48 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from decimal import Decimal
+from typing import Annotated, Optional, List
+
+# Amounts are in rupees with at most two decimal places
+Amount = Annotated[Decimal, Field(gt=0, max_digits=14, decimal_places=2)]
+
+class AccountCreate(BaseModel):
+    account_type: str = "savings"  # 'savings' or 'current'
+
+class AccountResponse(BaseModel):
+    id: int
+    customer_id: int
+    account_type: str
+    balance: float
+    created_at: Optional[datetime]
+
+class TransferCreate(BaseModel):
+    from_account_id: int  # Must belong to the caller
+    to_account_id: int
+    amount: Amount
+    reference: Optional[str] = Field(None, max_length=140)
+
+class DepositCreate(BaseModel):
+    amount: Amount
+    reference: Optional[str] = Field(None, max_length=140)
+
+class TransferResponse(BaseModel):
+    transfer_id: str
+    from_account_id: int
+    to_account_id: int
+    amount: float
+    balance: float  # After the transfer: the debited account for transfers, the credited one for deposits
+
+class LedgerEntryResponse(BaseModel):
+    id: int
+    transfer_id: str
+    amount: float  # Negative for debits
+    balance: float  # Account balance after this entry
+    reference: Optional[str]
+    created_at: datetime
+
+class AccountStatement(BaseModel):
+    account_id: int
+    balance: float
+    entries: List[LedgerEntryResponse]  # Newest first
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch older entries
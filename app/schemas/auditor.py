@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class PortfolioAggregate(BaseModel):
+    status: str
+    loan_type: str
+    month: str  # YYYY-MM the loans were applied in
+    loan_count: int
+    total_amount: float
+    total_emi: float
+
+    class Config:
+        from_attributes = True
+
+class PortfolioReport(BaseModel):
+    groups: List[PortfolioAggregate]
+    loan_count: int
+    total_amount: float
+    total_emi: float
+
+class AuditEntryResponse(BaseModel):
+    id: int
+    at: datetime  # UTC
+    actor_type: str  # customer, admin or anonymous
+    actor_id: Optional[int]
+    action: str
+    resource_type: str
+    resource_id: Optional[str]
+    detail: Optional[Dict[str, Any]]
+
+class AuditLogPage(BaseModel):
+    entries: List[AuditEntryResponse]  # Newest first
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch older entries
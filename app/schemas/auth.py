@@ -8,6 +8,8 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[EmailStr] = None
     is_admin: bool = False
+    user_id: Optional[int] = None  # Absent in tokens issued before ids were embedded
+    token_version: int = 0
 
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -1,12 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 
 class LoanCreate(BaseModel):
     loan_type: str
-    amount: float
-    tenure_months: int
-    interest_rate: float  # Annual interest rate in percentage, e.g., 12.5
+    amount: float = Field(gt=0)
+    tenure_months: int = Field(gt=0)
+    interest_rate: float = Field(ge=0)  # Annual interest rate in percentage, e.g., 12.5
 
 class LoanResponse(BaseModel):
     id: int
@@ -19,12 +19,46 @@ class LoanResponse(BaseModel):
     status: str
     applied_at: datetime
     updated_at: Optional[datetime]
+    version: int = 0  # Pass back in LoanUpdate to decide only this version
 
     class Config:
         from_attributes = True
 
+class AdminLoanResponse(LoanResponse):
+    fraud_score: Optional[float] = None
+    flagged: bool = False  # Scored at or above FRAUD_FLAG_THRESHOLD
+
 class LoanUpdate(BaseModel):
     status: str  # 'approved' or 'rejected'
+    version: Optional[int] = None  # Fail with 409 unless the loan is still at this version
+
+class LoanDecision(BaseModel):
+    loan_id: int
+    status: str  # 'approved' or 'rejected'
+
+class LoanDecisionResult(BaseModel):
+    loan_id: int
+    result: str  # 'updated', 'conflict' (no longer pending) or 'not_found'
+    status: Optional[str] = None  # Status of the loan after the batch
+    emi: Optional[float] = None
 
 class LoanList(BaseModel):
-    loans: List[LoanResponse]
\ No newline at end of file
+    loans: List[LoanResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
+
+class AdminLoanList(LoanList):
+    loans: List[AdminLoanResponse]
+
+class ScheduleEntry(BaseModel):
+    installment: int
+    payment: float
+    principal: float
+    interest: float
+    balance: float  # Outstanding principal after this installment
+
+class LoanSchedule(BaseModel):
+    loan_id: int
+    emi: float
+    installments: int  # Total installments over the loan's tenure
+    rows: List[ScheduleEntry]
+    next_offset: Optional[int] = None  # Pass back as ?offset= to fetch the next page
@@ -1 +1 @@
-from .emi import calculate_emi
\ No newline at end of file
+from .emi import calculate_emi, calculate_emi_batch
@@ -0,0 +1,60 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .emi import calculate_emi
+
+_CENT = Decimal("0.01")
+
+
+class ScheduleRow(NamedTuple):
+    installment: int
+    payment: Decimal
+    principal: Decimal
+    interest: Decimal
+    balance: Decimal
+
+
+SCHEDULE_COLUMNS = ScheduleRow._fields
+PORTFOLIO_COLUMNS = ("loan_id",) + SCHEDULE_COLUMNS
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def amortization_schedule(
+    principal: float,
+    annual_rate: float,
+    tenure_months: int,
+    emi: Optional[float] = None,
+) -> Iterator[ScheduleRow]:
+    """
+    Yield the repayment schedule one installment at a time.
+
+    Interest is charged on the outstanding balance each month and rounded to
+    the cent; the rest of the EMI repays principal. The last installment pays
+    off whatever balance is left, so rounding never leaves a residue.
+    """
+    balance = _money(principal)
+    monthly_rate = Decimal(str(annual_rate)) / 1200
+    payment = _money(emi if emi is not None else calculate_emi(principal, annual_rate, tenure_months))
+    for installment in range(1, tenure_months + 1):
+        interest = (balance * monthly_rate).quantize(_CENT, rounding=ROUND_HALF_UP)
+        if installment == tenure_months:
+            repaid = balance
+        else:
+            repaid = min(max(payment - interest, Decimal(0)), balance)
+        balance -= repaid
+        yield ScheduleRow(installment, repaid + interest, repaid, interest, balance)
+
+
+def portfolio_schedules(loans: Iterable) -> Iterator[tuple]:
+    """
+    Yield (loan_id, *row) for every installment of every loan, loan by loan.
+
+    Loans need id, amount, interest_rate, tenure_months and emi attributes;
+    they are consumed lazily, so this pairs with a streamed query.
+    """
+    for loan in loans:
+        for row in amortization_schedule(loan.amount, loan.interest_rate, loan.tenure_months, loan.emi):
+            yield (loan.id, *row)
@@ -1,3 +1,19 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+_CENT = Decimal("0.01")
+
+
+def round_money(value: float) -> float:
+    """Round half-up to 2 decimal places on the decimal representation of value."""
+    return float(Decimal(repr(float(value))).quantize(_CENT, rounding=ROUND_HALF_UP))
+
+
 def calculate_emi(principal: float, annual_rate: float, tenure_months: int) -> float:
     """
     Calculate EMI using the formula: EMI = (P*r*(1+r)^n)/((1+r)^n-1)
@@ -6,8 +22,46 @@ def calculate_emi(principal: float, annual_rate: float, tenure_months: int) -> f
     r = monthly interest rate (annual_rate / 100 / 12)
     n = tenure in months
     """
-    monthly_rate = annual_rate / 100 / 12
+    principal = float(principal)
+    monthly_rate = float(annual_rate) / 100 / 12
     if monthly_rate == 0 or tenure_months == 0:
-        return principal / tenure_months if tenure_months > 0 else 0
-    emi = (principal * monthly_rate * (1 + monthly_rate) ** tenure_months) / ((1 + monthly_rate) ** tenure_months - 1)
-    return round(emi, 2)
\ No newline at end of file
+        return round_money(principal / tenure_months) if tenure_months > 0 else 0
+    factor = (1 + monthly_rate) ** tenure_months
+    emi = principal * monthly_rate * factor / (factor - 1)
+    return round_money(emi)
+
+
+def calculate_emi_batch(
+    principals: Sequence[float],
+    annual_rates: Sequence[float],
+    tenures: Sequence[int],
+) -> list[float]:
+    """
+    Calculate EMIs for many loans in one pass.
+
+    Uses NumPy when it is installed and falls back to calling calculate_emi
+    per loan otherwise. Results are identical to calculate_emi either way.
+    """
+    if not len(principals) == len(annual_rates) == len(tenures):
+        raise ValueError("principals, annual_rates and tenures must have the same length")
+    if np is None:
+        return [calculate_emi(p, r, n) for p, r, n in zip(principals, annual_rates, tenures)]
+
+    p = np.asarray(principals, dtype=np.float64)
+    r = np.asarray(annual_rates, dtype=np.float64) / 100 / 12
+    n = np.asarray(tenures, dtype=np.int64)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        factor = np.power(1 + r, n)
+        amortized = p * r * factor / (factor - 1)
+        flat = np.where(n > 0, p / np.where(n == 0, 1, n), 0.0)
+    emis = np.where((r == 0) | (n == 0), flat, amortized)
+
+    # Round half-up in bulk; values sitting within float noise of a half cent
+    # are re-rounded through Decimal so the result matches calculate_emi.
+    scaled = emis * 100
+    rounded = np.floor(scaled + 0.5) / 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    result = rounded.tolist()
+    for i in np.flatnonzero(near_tie).tolist():
+        result[i] = round_money(emis[i])
+    return result
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, Sequence
+
+EXPORT_CHUNK_ROWS = 500
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_ndjson(rows: Iterable[Sequence], columns: Sequence[str]) -> Iterator[str]:
+    """Encode rows as newline-delimited JSON, yielding a chunk every EXPORT_CHUNK_ROWS rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps({name: _json_value(value) for name, value in zip(columns, row)}))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def iter_csv(rows: Iterable[Sequence], columns: Sequence[str]) -> Iterator[str]:
+    """Encode rows as CSV with a header line, yielding a chunk every EXPORT_CHUNK_ROWS rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    count = 0
+    for row in rows:
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+        count += 1
+        if count >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if count:
+        yield buffer.getvalue()
@@ -0,0 +1,139 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple, Optional
+
+
+class RunningStats:
+    """Welford's online mean and variance; constant memory per series."""
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def zscore(self, value: float, min_std: float) -> float:
+        """Standard score of value; std is floored at min_std so a flat history is not infinitely strict."""
+        std = math.sqrt(self._m2 / self.count) if self.count else 0.0
+        return (value - self.mean) / max(std, min_std)
+
+
+def _log_amount(amount) -> float:
+    # Legacy rows may hold non-positive amounts; they count as the smallest loan rather than raising
+    return math.log1p(max(float(amount), 0.0))
+
+
+class _Customer:
+    __slots__ = ("amounts", "recent")
+
+    def __init__(self, history: int):
+        self.amounts = RunningStats()
+        self.recent = deque(maxlen=history)
+
+
+class FraudScore(NamedTuple):
+    score: float
+    flagged: bool
+    reasons: tuple
+
+
+class FraudScorer:
+    """
+    Streaming anomaly score for loan applications.
+
+    Each application adds up to four signals, each the amount by which it
+    exceeds what is normal: more than velocity_limit applications from the
+    customer within velocity_window seconds, an amount far above the
+    customer's own history, an amount far above other loans of the same type,
+    and an interest rate unusual for the tenure. Amounts are compared on a
+    log scale. Scoring and updating the statistics are O(1).
+    """
+
+    MIN_HISTORY = 3  # Applications a customer needs before their own history counts
+    MIN_POPULATION = 30  # Loans needed before a loan-type or tenure baseline counts
+    CUSTOMER_Z = 2.0  # Standard scores below these add nothing
+    POPULATION_Z = 3.0
+    AMOUNT_MIN_STD = 0.1  # log-amount, roughly 10%
+    RATE_MIN_STD = 0.25  # percentage points
+
+    def __init__(self, threshold: float, velocity_window: float, velocity_limit: int, max_customers: int):
+        self.threshold = threshold
+        self.velocity_window = velocity_window
+        self.velocity_limit = velocity_limit
+        self.max_customers = max_customers
+        self.flagged_count = 0
+        self._customers: OrderedDict[int, _Customer] = OrderedDict()
+        self._amounts_by_type: dict[str, RunningStats] = {}
+        self._rates_by_tenure: dict[int, RunningStats] = {}
+        self._lock = threading.Lock()
+
+    def _customer(self, customer_id: int) -> _Customer:
+        customer = self._customers.get(customer_id)
+        if customer is None:
+            customer = self._customers[customer_id] = _Customer(4 * self.velocity_limit)
+            if len(self._customers) > self.max_customers:
+                self._customers.popitem(last=False)
+        else:
+            self._customers.move_to_end(customer_id)
+        return customer
+
+    def score(
+        self, customer_id: int, loan_type: str, amount: float, tenure_months: int, interest_rate: float,
+        at: Optional[float] = None,
+    ) -> FraudScore:
+        """Score an application, then add it to the statistics."""
+        at = time.time() if at is None else at
+        log_amount = _log_amount(amount)
+        rate = float(interest_rate)
+        reasons = []
+        score = 0.0
+        with self._lock:
+            customer = self._customer(customer_id)
+            recent = sum(1 for seen in customer.recent if at - seen < self.velocity_window) + 1
+            if recent > self.velocity_limit:
+                score += recent - self.velocity_limit
+                reasons.append("velocity")
+            if customer.amounts.count >= self.MIN_HISTORY:
+                excess = customer.amounts.zscore(log_amount, self.AMOUNT_MIN_STD) - self.CUSTOMER_Z
+                if excess > 0:
+                    score += excess
+                    reasons.append("amount_vs_history")
+            by_type = self._amounts_by_type.get(loan_type)
+            if by_type is not None and by_type.count >= self.MIN_POPULATION:
+                excess = by_type.zscore(log_amount, self.AMOUNT_MIN_STD) - self.POPULATION_Z
+                if excess > 0:
+                    score += excess
+                    reasons.append("amount_vs_loan_type")
+            by_tenure = self._rates_by_tenure.get(tenure_months)
+            if by_tenure is not None and by_tenure.count >= self.MIN_POPULATION:
+                excess = abs(by_tenure.zscore(rate, self.RATE_MIN_STD)) - self.POPULATION_Z
+                if excess > 0:
+                    score += excess
+                    reasons.append("rate_for_tenure")
+            self._observe(customer, loan_type, log_amount, tenure_months, rate, at)
+            flagged = score >= self.threshold
+            if flagged:
+                self.flagged_count += 1
+        return FraudScore(round(score, 3), flagged, tuple(reasons))
+
+    def observe(
+        self, customer_id: int, loan_type: str, amount: float, tenure_months: int, interest_rate: float, at: float,
+    ) -> None:
+        """Add an application to the statistics without scoring it."""
+        with self._lock:
+            self._observe(self._customer(customer_id), loan_type, _log_amount(amount), tenure_months, float(interest_rate), at)
+
+    def _observe(self, customer: _Customer, loan_type: str, log_amount: float, tenure_months: int, rate: float, at: float) -> None:
+        customer.amounts.add(log_amount)
+        customer.recent.append(at)
+        self._amounts_by_type.setdefault(loan_type, RunningStats()).add(log_amount)
+        self._rates_by_tenure.setdefault(tenure_months, RunningStats()).add(rate)
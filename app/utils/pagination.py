@@ -0,0 +1,85 @@
+import base64
+from datetime import datetime
+from typing import Optional
+from fastapi import Query
+from sqlalchemy import and_, or_
+from ..models import Loan
+
+
+class LoanFilters:
+    """Query-string filters shared by the loan listing endpoints."""
+
+    def __init__(
+        self,
+        status: Optional[str] = None,
+        loan_type: Optional[str] = None,
+        min_amount: Optional[float] = Query(None, ge=0),
+        max_amount: Optional[float] = Query(None, ge=0),
+        applied_from: Optional[datetime] = Query(None, description="Inclusive lower bound on applied_at"),
+        applied_to: Optional[datetime] = Query(None, description="Exclusive upper bound on applied_at"),
+    ):
+        self.status = status
+        self.loan_type = loan_type
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.applied_from = applied_from
+        self.applied_to = applied_to
+
+
+def filter_loans(query, filters: LoanFilters):
+    if filters.status is not None:
+        query = query.filter(Loan.status == filters.status)
+    if filters.loan_type is not None:
+        query = query.filter(Loan.loan_type == filters.loan_type)
+    if filters.min_amount is not None:
+        query = query.filter(Loan.amount >= filters.min_amount)
+    if filters.max_amount is not None:
+        query = query.filter(Loan.amount <= filters.max_amount)
+    if filters.applied_from is not None:
+        query = query.filter(Loan.applied_at >= filters.applied_from)
+    if filters.applied_to is not None:
+        query = query.filter(Loan.applied_at < filters.applied_to)
+    return query
+
+
+def encode_cursor(applied_at: datetime, loan_id: int) -> str:
+    raw = f"{applied_at.isoformat()}|{loan_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        applied_at, loan_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(applied_at), int(loan_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def keyset_page(query, cursor: Optional[str], limit: int):
+    """
+    Restrict a Query or Select to the page after cursor, ordered by (applied_at, id).
+
+    One extra row is fetched so split_page can tell whether another page exists.
+    """
+    if cursor:
+        applied_at, loan_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Loan.applied_at > applied_at,
+            and_(Loan.applied_at == applied_at, Loan.id > loan_id),
+        ))
+    return query.order_by(Loan.applied_at, Loan.id).limit(limit + 1)
+
+
+def split_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """Return one page of loans and the cursor for the next page, or None when there are no more rows."""
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.applied_at, last.id)
+
+
+def paginate_loans(query, cursor: Optional[str], limit: int) -> tuple[list, Optional[str]]:
+    """Keyset pagination over (applied_at, id) for a Query."""
+    return split_page(keyset_page(query, cursor, limit).all(), limit)
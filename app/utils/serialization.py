@@ -0,0 +1,50 @@
+"""
+JSON fast path for the loan listings.
+
+The listings select just the response's columns as row tuples, with Numeric
+columns read as floats, and write the page with a TypeAdapter over a
+TypedDict mirroring the response model. pydantic-core turns the rows into
+JSON bytes directly: no ORM objects are built and no field is validated.
+The routes keep their response_model, so the OpenAPI schema is unchanged.
+"""
+from typing import Optional
+from typing_extensions import TypedDict
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Float, Numeric, type_coerce
+from ..models import Loan
+from ..schemas import AdminLoanResponse, LoanResponse
+
+
+def response_columns(entity, model: type[BaseModel]) -> list:
+    """entity's columns for each of model's fields, Numeric ones read as float as the schema declares."""
+    columns = []
+    for name in model.model_fields:
+        column = getattr(entity, name)
+        if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+            column = type_coerce(column, Float).label(name)
+        columns.append(column)
+    return columns
+
+
+class PageSerializer:
+    """Writes {items_key: [...], "next_cursor": ...} pages of rows selected with response_columns."""
+
+    def __init__(self, model: type[BaseModel], items_key: str):
+        fields = {name: field.annotation for name, field in model.model_fields.items()}
+        row_type = TypedDict(f"{model.__name__}Row", fields)
+        page_type = TypedDict(f"{model.__name__}Page", {items_key: list[row_type], "next_cursor": Optional[str]})
+        self._adapter = TypeAdapter(page_type)
+        self.items_key = items_key
+
+    def dump_json(self, rows: list, next_cursor: Optional[str]) -> bytes:
+        return self._adapter.dump_json({self.items_key: [row._asdict() for row in rows], "next_cursor": next_cursor})
+
+    def response(self, rows: list, next_cursor: Optional[str]) -> Response:
+        return Response(self.dump_json(rows, next_cursor), media_type="application/json")
+
+
+LOAN_COLUMNS = response_columns(Loan, LoanResponse)
+ADMIN_LOAN_COLUMNS = response_columns(Loan, AdminLoanResponse)
+loan_page = PageSerializer(LoanResponse, "loans")
+admin_loan_page = PageSerializer(AdminLoanResponse, "loans")
@@ -0,0 +1,64 @@
+"""
+Compare read throughput of the sync and async (ASYNC_MODE) database paths.
+
+Seeds a SQLite file, then runs uvicorn once per mode and hammers
+GET /customers/loans and GET /admins/loans from concurrent clients.
+
+    python -m benchmarks.bench_async --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+import httpx
+
+from benchmarks._common import drive, run_server, write_report
+from benchmarks.seed import ADMIN_EMAIL, ADMIN_PASSWORD, PASSWORD, customer_email, seed
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> dict:
+    response = await client.post("/auth/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_mode(base_url: str, customers: int, concurrency: int, duration: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        admin = await login(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+        users = [await login(client, customer_email(i), PASSWORD) for i in range(min(customers, concurrency))]
+
+        async def customer_loans(client, index, iteration):
+            return await client.get("/customers/loans", headers=users[index % len(users)])
+
+        async def admin_loans(client, index, iteration):
+            return await client.get("/admins/loans", headers=admin)
+
+        return {
+            "customer_loans": await drive(client, customer_loans, concurrency, duration),
+            "admin_loans": await drive(client, admin_loans, concurrency, duration),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--loans", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        seed(url, args.customers, args.loans)
+        results = {}
+        for mode, async_mode in (("sync", "false"), ("async", "true")):
+            with run_server({"DATABASE_URL": url, "ASYNC_MODE": async_mode}) as base_url:
+                results[mode] = asyncio.run(run_mode(base_url, args.customers, args.concurrency, args.duration))
+    write_report("async_vs_sync", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
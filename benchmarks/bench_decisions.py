@@ -0,0 +1,141 @@
+"""
+Concurrent loan decisions: optimistic conditional UPDATE vs row locking.
+
+"optimistic" is what PUT /admins/loans/{id} does: a plain read, then
+decide_loan's UPDATE ... WHERE id = ? AND status = 'pending' AND version = ?,
+with a lost race reported by the row count. "locking" reads the loan with
+SELECT ... FOR UPDATE and updates it through the ORM. SQLite has no row
+locks, so there the locking transaction starts with BEGIN IMMEDIATE, which
+takes the database write lock up front.
+
+Threads pick loans at random from a window of --hot pending loans that moves
+on as loans are decided, so a smaller window means more contention.
+
+    python -m benchmarks.bench_decisions --threads 16 --duration 10 --hot 8
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.aggregates import verify_aggregates
+from app.database import build_engine, is_sqlite
+from app.models import Loan, decide_loan
+from app.utils import calculate_emi
+from benchmarks._common import summarize, write_report
+from benchmarks.seed import seed
+
+
+def decide_optimistic(db, loan_id: int, status: str) -> str:
+    loan = db.get(Loan, loan_id)
+    if loan.status != "pending":
+        return "stale"
+    stmt, deltas, _ = decide_loan(loan, status)
+    if db.execute(stmt).rowcount != 1:
+        db.rollback()
+        return "conflict"
+    deltas.apply(db.connection())
+    db.commit()
+    return "decided"
+
+
+def decide_locking(db, loan_id: int, status: str) -> str:
+    if is_sqlite(str(db.get_bind().url)):
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+    loan = db.scalars(select(Loan).where(Loan.id == loan_id).with_for_update()).one()
+    if loan.status != "pending":
+        db.rollback()
+        return "stale"
+    loan.status = status
+    if status == "approved":
+        if loan.emi is None:
+            loan.emi = calculate_emi(loan.amount, loan.interest_rate, loan.tenure_months)
+    else:
+        loan.emi = None
+    loan.version += 1
+    db.commit()
+    return "decided"
+
+
+STRATEGIES = {"optimistic": decide_optimistic, "locking": decide_locking}
+
+
+def run(engine, strategy, threads: int, duration: float, hot: int) -> dict:
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    with SessionLocal() as db:
+        loan_ids = db.scalars(select(Loan.id).where(Loan.status == "pending").order_by(Loan.id)).all()
+    latencies: list[float] = []
+    outcomes = {"decided": 0, "conflict": 0, "stale": 0}
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        nonlocal errors
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            # The window starts at the oldest loan that may still be pending
+            with lock:
+                start_at = outcomes["decided"]
+            if start_at >= len(loan_ids):
+                return
+            loan_id = loan_ids[min(len(loan_ids) - 1, start_at + rng.randrange(hot))]
+            status = rng.choice(("approved", "rejected"))
+            start = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    outcome = strategy(db, loan_id, status)
+            except OperationalError:  # "database is locked"
+                with lock:
+                    errors += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "decided":
+                    latencies.append(elapsed)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    result = summarize(latencies, time.perf_counter() - start, errors)
+    result.update(outcomes)
+    with SessionLocal() as db:
+        # Must be 0: every decision kept loan_aggregates in step
+        result["aggregate_mismatches"] = len(verify_aggregates(db))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database to seed and use; defaults to a temporary SQLite file per strategy")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--loans", type=int, default=50000, help="Pending loans to seed")
+    parser.add_argument("--hot", type=int, default=8, help="Pending loans threads compete for at any time")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.strategies.split(","):
+            url = args.url or f"sqlite:///{Path(tmp) / f'{name}.db'}"
+            seed(url, customers=1000, loans=args.loans, pending_ratio=1.0)
+            engine = build_engine(url)
+            results[name] = run(engine, STRATEGIES[name], args.threads, args.duration, args.hot)
+            engine.dispose()
+    write_report("concurrent_decisions", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
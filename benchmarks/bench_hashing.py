@@ -0,0 +1,70 @@
+"""
+Password verification throughput: logins per second, in total and per core.
+
+Runs verify_password in the calling thread, then verify_and_update_password
+on the process pool with each worker count, driven from several threads the
+way the request threadpool would.
+
+    python -m benchmarks.bench_hashing --workers 1 2 4 --duration 5
+"""
+import argparse
+import os
+import threading
+import time
+
+from app.auth import get_password_hash, verify_password, verify_and_update_password, shutdown_hash_pool
+from app.config import settings
+from benchmarks._common import summarize, write_report
+
+PASSWORD = "password123"
+
+
+def run(verify, threads: int, duration: float) -> dict:
+    hashed = get_password_hash(PASSWORD)
+    latencies: list[float] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            verify(PASSWORD, hashed)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--threads", type=int, default=16, help="Caller threads for the pool runs")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rounds", type=int, help="Override PASSWORD_HASH_ROUNDS")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    if args.rounds:
+        settings.password_hash_rounds = args.rounds
+
+    results = {"inline_1_thread": run(verify_password, 1, args.duration)}
+    results["inline_1_thread"]["logins_per_core"] = results["inline_1_thread"]["throughput_rps"]
+    for workers in sorted(set(args.workers)):
+        settings.password_hash_workers = workers
+        shutdown_hash_pool()
+        verify_and_update_password(PASSWORD, get_password_hash(PASSWORD))  # start the pool outside the timing
+        result = run(verify_and_update_password, args.threads, args.duration)
+        result["logins_per_core"] = round(result["throughput_rps"] / workers, 1)
+        results[f"pool_{workers}_workers"] = result
+    shutdown_hash_pool()
+    write_report("password_hashing", {**vars(args), "scheme": settings.password_hash_scheme}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
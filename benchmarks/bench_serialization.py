@@ -0,0 +1,89 @@
+"""
+Loan listing pages, from query to JSON bytes: ORM + response_model vs row fast path.
+
+"orm" is what GET /admins/loans used to do: load Loan objects, then let
+FastAPI validate the page against AdminLoanList (from attributes) and dump
+it as JSON. "rows" is what it does now: select ADMIN_LOAN_COLUMNS as row
+tuples and write them with admin_loan_page, skipping ORM objects and
+validation. Both read the same keyset pages of pending loans; the report
+gives rows per second for each page size.
+
+    python -m benchmarks.bench_serialization --loans 50000 --limits 50 500
+"""
+import argparse
+import statistics
+import tempfile
+import timeit
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import build_engine
+from app.models import Loan
+from app.schemas import AdminLoanList
+from app.utils.pagination import paginate_loans
+from app.utils.serialization import ADMIN_LOAN_COLUMNS, admin_loan_page
+from benchmarks._common import write_report
+from benchmarks.seed import seed
+
+
+def orm_page(db, limit: int) -> bytes:
+    loans, next_cursor = paginate_loans(db.query(Loan).filter(Loan.status == "pending"), None, limit)
+    return AdminLoanList.model_validate({"loans": loans, "next_cursor": next_cursor}).model_dump_json().encode()
+
+
+def rows_page(db, limit: int) -> bytes:
+    loans, next_cursor = paginate_loans(db.query(*ADMIN_LOAN_COLUMNS).filter(Loan.status == "pending"), None, limit)
+    return admin_loan_page.dump_json(loans, next_cursor)
+
+
+PATHS = {"orm": orm_page, "rows": rows_page}
+
+
+def measure(SessionLocal, path, limit: int, number: int, repeat: int) -> dict:
+    def page():
+        # A fresh session per page, as a request gets, so the identity map starts empty
+        with SessionLocal() as db:
+            path(db, limit)
+
+    runs = [total / number for total in timeit.repeat(page, number=number, repeat=repeat)]
+    return {
+        "pages_per_run": number,
+        "best_ms": round(min(runs) * 1000, 3),
+        "median_ms": round(statistics.median(runs) * 1000, 3),
+        "rows_per_s": round(limit / min(runs)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database to seed and use; defaults to a temporary SQLite file")
+    parser.add_argument("--loans", type=int, default=50000, help="Loans to seed, half of them pending")
+    parser.add_argument("--limits", type=int, nargs="+", default=[50, 500], help="Page sizes")
+    parser.add_argument("--number", type=int, default=50, help="Pages per timed run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{Path(tmp) / 'serialization.db'}"
+        seed(url, customers=1000, loans=args.loans)
+        engine = build_engine(url)
+        SessionLocal = sessionmaker(bind=engine, autoflush=False)
+        with SessionLocal() as db:
+            # Same rows, same bytes: the fast path must not change the response
+            assert orm_page(db, max(args.limits)) == rows_page(db, max(args.limits))
+        for limit in args.limits:
+            results[f"limit_{limit}"] = {
+                name: measure(SessionLocal, path, limit, args.number, args.repeat) for name, path in PATHS.items()
+            }
+            results[f"limit_{limit}"]["speedup"] = round(
+                results[f"limit_{limit}"]["rows"]["rows_per_s"] / results[f"limit_{limit}"]["orm"]["rows_per_s"], 2
+            )
+        engine.dispose()
+    write_report("listing_serialization", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Concurrent loan-application writes against SQLite, untuned vs tuned engine.
+
+"untuned" is the engine app.database used to build (driver defaults, rollback
+journal, synchronous=FULL); "tuned" is build_engine with the pool settings and
+connect-time PRAGMAs from Settings.
+
+    python -m benchmarks.bench_sqlite_writes --threads 16 --duration 10
+"""
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import build_engine
+from app.models import Loan
+from benchmarks._common import summarize, write_report
+from benchmarks.seed import seed
+
+
+def run(engine, threads: int, duration: float) -> dict:
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    db.add(Loan(customer_id=index % 100 + 1, loan_type="personal", amount=50000,
+                                tenure_months=24, interest_rate=12.5, status="pending"))
+                    db.commit()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+            except OperationalError:  # "database is locked"
+                with lock:
+                    errors += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("untuned", "tuned"):
+            url = f"sqlite:///{Path(tmp) / f'{name}.db'}"
+            seed(url, customers=100, loans=0)
+            if name == "untuned":
+                engine = create_engine(url, connect_args={"check_same_thread": False})
+            else:
+                engine = build_engine(url)
+            results[name] = run(engine, args.threads, args.duration)
+            engine.dispose()
+    write_report("sqlite_concurrent_writes", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Concurrent transfers through the ledger posting engine, group commit vs one commit per transfer.
+
+Threads move random amounts between --accounts funded accounts for
+--duration seconds; fewer accounts means more transfers contending for the
+same balances. "group" posts through the writer thread with
+LEDGER_MAX_BATCH transfers per commit, "inline" commits every transfer in
+its own transaction from the calling thread. After each run the ledger is
+checked: balances must equal their entries and total money must be unchanged.
+
+    python -m benchmarks.bench_transfers --threads 16 --accounts 100 --duration 10
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, build_engine
+from app.ledger import PostingEngine, Transfer, TransferRefused
+from app.models import Account, LedgerEntry
+from benchmarks._common import summarize, write_report
+
+OPENING_BALANCE = 1_000_000  # Minor units per account
+
+
+def check_ledger(db) -> dict:
+    balances = dict(db.execute(select(Account.id, Account.balance_minor)).all())
+    sums = dict(db.execute(select(LedgerEntry.account_id, func.sum(LedgerEntry.amount_minor)).group_by(LedgerEntry.account_id)).all())
+    return {
+        "total_balance": sum(balances.values()),
+        "balance_mismatches": sum(1 for account_id, balance in balances.items() if balance != sums.get(account_id, 0)),
+    }
+
+
+def run(url: str, mode: str, threads: int, duration: float, accounts: int, max_batch: int) -> dict:
+    engine = build_engine(url)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    posting = PostingEngine(SessionLocal, max_batch=max_batch if mode == "group" else 0)
+    with SessionLocal() as db:
+        cash = Account(account_type="cash")
+        funded = [Account(account_type="savings") for _ in range(accounts)]
+        db.add_all([cash, *funded])
+        db.commit()
+        account_ids = [account.id for account in funded]
+        for account_id in account_ids:
+            posting.post(db, Transfer(cash.id, account_id, OPENING_BALANCE))
+
+    latencies: list[float] = []
+    refused = 0
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        nonlocal refused, errors
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            source, target = rng.sample(account_ids, 2)
+            transfer = Transfer(source, target, rng.randint(1, OPENING_BALANCE // 10))
+            start = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    posting.post(db, transfer)
+            except TransferRefused:
+                with lock:
+                    refused += 1
+                continue
+            except OperationalError:  # "database is locked"
+                with lock:
+                    errors += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    result = summarize(latencies, time.perf_counter() - start, errors)
+    result["refused"] = refused
+    with SessionLocal() as db:
+        result.update(check_ledger(db))
+    # Deposits came out of the cash account, so all money still sums to zero
+    result["money_conserved"] = result["total_balance"] == 0 and result["balance_mismatches"] == 0
+    engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--max-batch", type=int, default=settings.ledger_max_batch)
+    parser.add_argument("--modes", default="inline,group")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes.split(","):
+            url = f"sqlite:///{Path(tmp) / f'{mode}.db'}"
+            results[mode] = run(url, mode, args.threads, args.duration, args.accounts, args.max_batch)
+    write_report("ledger_transfers", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
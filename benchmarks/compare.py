@@ -0,0 +1,69 @@
+"""
+Compare two JSON benchmark reports and flag regressions.
+
+Latencies (*_ms, *_us) regress when they grow and throughput (*_rps) when
+it shrinks, by more than --threshold percent. Exits 1 if anything regressed.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+LOWER_IS_BETTER = ("_ms", "_us")
+HIGHER_IS_BETTER = ("_rps",)
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and key.endswith(LOWER_IS_BETTER + HIGHER_IS_BETTER):
+            flat[path] = value
+    return flat
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[dict]:
+    old, new = flatten(baseline["results"]), flatten(candidate["results"])
+    rows = []
+    for path in sorted(old.keys() & new.keys()):
+        before, after = old[path], new[path]
+        change = (after - before) / before * 100 if before else 0.0
+        worse = change if path.endswith(LOWER_IS_BETTER) else -change
+        rows.append({
+            "metric": path,
+            "baseline": before,
+            "candidate": after,
+            "change_pct": round(change, 1),
+            "regression": worse > threshold,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed change in percent")
+    args = parser.parse_args()
+    baseline = json.loads(Path(args.baseline).read_text())
+    candidate = json.loads(Path(args.candidate).read_text())
+    if baseline["benchmark"] != candidate["benchmark"]:
+        parser.error(f"reports are from different benchmarks: {baseline['benchmark']} vs {candidate['benchmark']}")
+
+    rows = compare(baseline, candidate, args.threshold)
+    print(json.dumps({
+        "benchmark": baseline["benchmark"],
+        "baseline_commit": baseline["commit"],
+        "candidate_commit": candidate["commit"],
+        "threshold_pct": args.threshold,
+        "metrics": rows,
+    }, indent=2))
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
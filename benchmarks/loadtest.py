@@ -0,0 +1,123 @@
+"""
+End-to-end load test of the main API flows against a local uvicorn.
+
+Seeds a database (or reuses one with --no-seed), starts uvicorn on it and
+drives each flow in turn for --duration seconds from --concurrency clients:
+
+    register        POST /auth/register with fresh emails
+    token           POST /auth/token for seeded customers
+    apply_loan      POST /customers/loans
+    list_loans      GET /customers/loans
+    admin_decision  PUT /admins/loans/{id} on distinct pending loans
+
+    python -m benchmarks.loadtest --customers 100000 --loans 1000000 --concurrency 32 --output run.json
+"""
+import argparse
+import asyncio
+import tempfile
+import uuid
+from itertools import count
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine, select
+
+from app.models import Loan
+from benchmarks._common import drive, run_server, write_report
+from benchmarks.seed import ADMIN_EMAIL, ADMIN_PASSWORD, LOAN_TYPES, PASSWORD, customer_email, seed
+
+FLOWS = ("register", "token", "apply_loan", "list_loans", "admin_decision")
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> dict:
+    response = await client.post("/auth/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def pending_loan_ids(url: str, limit: int) -> list[int]:
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        ids = conn.scalars(select(Loan.id).where(Loan.status == "pending").order_by(Loan.id).limit(limit)).all()
+    engine.dispose()
+    return list(ids)
+
+
+async def run_flows(base_url: str, url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    run_id = uuid.uuid4().hex[:8]
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        admin = await login(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+        users = [await login(client, customer_email(i), PASSWORD) for i in range(min(args.customers, args.concurrency))]
+        decisions = iter(pending_loan_ids(url, args.max_decisions))
+        sequence = count()
+
+        async def register(client, index, iteration):
+            return await client.post("/auth/register", json={
+                "name": "Load Test",
+                "email": f"load-{run_id}-{next(sequence)}@example.com",
+                "password": PASSWORD,
+                "age": 30,
+            })
+
+        async def token(client, index, iteration):
+            email = customer_email((index * 7919 + iteration) % args.customers)
+            return await client.post("/auth/token", data={"username": email, "password": PASSWORD})
+
+        async def apply_loan(client, index, iteration):
+            return await client.post("/customers/loans", headers=users[index % len(users)], json={
+                "loan_type": LOAN_TYPES[iteration % len(LOAN_TYPES)],
+                "amount": 100000 + iteration,
+                "tenure_months": 60,
+                "interest_rate": 9.5,
+            })
+
+        async def list_loans(client, index, iteration):
+            return await client.get("/customers/loans", headers=users[index % len(users)])
+
+        async def admin_decision(client, index, iteration):
+            # Once the pending ids run out the 404s are reported as errors
+            loan_id = next(decisions, 0)
+            status = "approved" if iteration % 2 else "rejected"
+            return await client.put(f"/admins/loans/{loan_id}", headers=admin, json={"status": status})
+
+        handlers = {
+            "register": register, "token": token, "apply_loan": apply_loan,
+            "list_loans": list_loans, "admin_decision": admin_decision,
+        }
+        return {
+            flow: await drive(client, handlers[flow], args.concurrency, args.duration)
+            for flow in args.flows
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database URL; defaults to a temporary SQLite file")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the data already at --url")
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--loans", type=int, default=100000)
+    parser.add_argument("--flows", nargs="+", choices=FLOWS, default=list(FLOWS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per flow")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--async-mode", action="store_true", help="Run the server with ASYNC_MODE=true")
+    parser.add_argument("--max-decisions", type=int, default=100000, help="Pending loans reserved for admin_decision")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    if args.no_seed and not args.url:
+        parser.error("--no-seed needs --url")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{Path(tmp) / 'loadtest.db'}"
+        seeding = None if args.no_seed else seed(url, args.customers, args.loans)
+        env = {"DATABASE_URL": url, "ASYNC_MODE": str(args.async_mode).lower()}
+        with run_server(env, workers=args.workers) as base_url:
+            results = asyncio.run(run_flows(base_url, url, args))
+    if seeding:
+        results["seed"] = seeding
+    write_report("loadtest", {**vars(args), "url": args.url}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmarks for the hot pure-Python paths, in-process with timeit.
+
+Covers calculate_emi, calculate_emi_batch, create_access_token,
+verify_token (token cache cold and warm), fraud scoring and the password
+hashing functions. Each case reports the best and median time per call
+over --repeat runs.
+
+    python -m benchmarks.micro --repeat 5 --output micro.json
+"""
+import argparse
+import random
+import statistics
+import timeit
+
+from fastapi import HTTPException
+
+from app.auth import create_access_token, get_password_hash, token_cache, verify_password, verify_token
+from app.config import settings
+from app.utils import calculate_emi, calculate_emi_batch
+from app.fraud import new_scorer
+from benchmarks._common import write_report
+
+PASSWORD = "password123"
+CREDENTIALS_ERROR = HTTPException(status_code=401)
+
+
+def measure(func, number: int, repeat: int) -> dict:
+    """Per-call timings in microseconds."""
+    runs = [total / number * 1e6 for total in timeit.repeat(func, number=number, repeat=repeat)]
+    return {
+        "calls_per_run": number,
+        "best_us": round(min(runs), 3),
+        "median_us": round(statistics.median(runs), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=10000, help="Loans per calculate_emi_batch call")
+    parser.add_argument("--rounds", type=int, help="Override PASSWORD_HASH_ROUNDS")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    if args.rounds:
+        settings.password_hash_rounds = args.rounds
+
+    rng = random.Random(42)
+    amounts = [round(rng.uniform(10000, 5000000), 2) for _ in range(args.batch_size)]
+    rates = [round(rng.uniform(6, 18), 2) for _ in range(args.batch_size)]
+    tenures = [rng.choice((12, 24, 36, 60, 120, 240, 360)) for _ in range(args.batch_size)]
+    token = create_access_token({"sub": "customer0@example.com", "uid": 1, "role": "customer", "ver": 0})
+    hashed = get_password_hash(PASSWORD)
+
+    def verify_cold():
+        token_cache.clear()
+        verify_token(token, CREDENTIALS_ERROR)
+
+    scorer = new_scorer()
+    applications = iter(range(10 ** 9))
+
+    token_cache.clear()
+    results = {
+        "calculate_emi": measure(lambda: calculate_emi(250000, 10.5, 60), 100000, args.repeat),
+        "calculate_emi_batch": measure(lambda: calculate_emi_batch(amounts, rates, tenures), 10, args.repeat),
+        "create_access_token": measure(
+            lambda: create_access_token({"sub": "customer0@example.com", "uid": 1, "role": "customer", "ver": 0}),
+            2000, args.repeat,
+        ),
+        "verify_token_cold": measure(verify_cold, 2000, args.repeat),
+        "verify_token_cached": measure(lambda: verify_token(token, CREDENTIALS_ERROR), 100000, args.repeat),
+        "fraud_score": measure(
+            lambda: scorer.score(next(applications) % 10000, "personal", 250000, 60, 10.5), 100000, args.repeat,
+        ),
+        "get_password_hash": measure(lambda: get_password_hash(PASSWORD), 5, args.repeat),
+        "verify_password": measure(lambda: verify_password(PASSWORD, hashed), 5, args.repeat),
+    }
+    results["calculate_emi_batch"]["per_loan_us"] = round(results["calculate_emi_batch"]["best_us"] / args.batch_size, 4)
+    write_report("micro", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,28 @@
+import argparse
 from app.database import SessionLocal
 from app.models import BankAdmin
-from app.auth import get_password_hash
+from app.auth import get_password_hash, lookup_principal
+
+parser = argparse.ArgumentParser(description="Create a bank admin account")
+parser.add_argument("--username", default="admin")
+parser.add_argument("--email", default="admin@example.com")
+parser.add_argument("--password", default="admin123")
+args = parser.parse_args()
 
 db = SessionLocal()
 
-# Check if admin already exists
-existing_admin = db.query(BankAdmin).filter(BankAdmin.email == "admin@example.com").first()
-if existing_admin:
-    print("Admin already exists")
+# Check if the email is already used by an admin or a customer
+existing = lookup_principal(db, args.email)
+if existing:
+    print("Admin already exists" if existing.is_admin else "Email already registered to a customer")
 else:
     admin = BankAdmin(
-        username="admin",
-        email="admin@example.com",
-        password_hash=get_password_hash("admin123")
+        username=args.username,
+        email=args.email,
+        password_hash=get_password_hash(args.password)
     )
     db.add(admin)
     db.commit()
-    print("Admin created: username=admin, email=admin@example.com, password=admin123")
+    print(f"Admin created: username={args.username}, email={args.email}, password={args.password}")
 
-db.close()
\ No newline at end of file
+db.close()
@@ -1,23 +1,45 @@
+import os
 import pytest
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
+
+# Background fraud re-scoring would run against the default database; tests call it directly
+os.environ.setdefault("FRAUD_RESCORE_INTERVAL_SECONDS", "0")
+# Likewise queued jobs stay queued until a test drains them
+os.environ.setdefault("JOB_WORKERS", "0")
+# and audit entries stay buffered until a test flushes them
+os.environ.setdefault("AUDIT_FLUSH_INTERVAL_SECONDS", "0")
+# Passwords are hashed in-process: the app's shutdown stops the hashing pool after every client
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+from app import audit, fraud, jobs
+from app.ledger import posting_engine
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, build_engine, get_db
+from app.replicas import get_read_db
 from app.models import Customer, BankAdmin
-from app.auth import get_password_hash
+from app.auth import get_password_hash, user_cache, token_cache
+from app.idempotency import idempotency_store
 
 # Create test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The ledger writer thread opens its own sessions
+posting_engine.session_factory = TestingSessionLocal
+jobs.pool.session_factory = TestingSessionLocal
+audit.audit_log.sinks = [audit.DatabaseSink(TestingSessionLocal)]
 
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test."""
+    # Ids restart with every database, so rows cached by a previous test are stale
+    user_cache.clear()
+    token_cache.clear()
+    idempotency_store.clear()
+    audit.audit_log.clear()
+    fraud.scorer = fraud.new_scorer()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -36,6 +58,7 @@ def client(db_session):
             db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as c:
         yield c
 
@@ -0,0 +1,85 @@
+from datetime import datetime
+from sqlalchemy import insert, update
+from app.aggregates import main as aggregates_main, rebuild_aggregates, verify_aggregates
+from app.migrations import populate_loan_aggregates
+from app.models import Loan, LoanAggregate
+from app.utils import calculate_emi
+from tests.conftest import engine
+
+LOAN = {"loan_type": "home", "amount": 200000, "tenure_months": 120, "interest_rate": 8.5}
+
+def _portfolio(client, headers, **params):
+    response = client.get("/auditors/portfolio", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+def test_portfolio_follows_applications_and_decisions(client, auth_headers, admin_auth_headers, db_session):
+    """Test aggregates move with each application and decision."""
+    first = client.post("/customers/loans", json=LOAN, headers=auth_headers).json()
+    second = client.post("/customers/loans", json={**LOAN, "loan_type": "car", "amount": 50000}, headers=auth_headers).json()
+    emi = calculate_emi(200000, 8.5, 120)
+
+    data = _portfolio(client, admin_auth_headers)
+    assert data["loan_count"] == 2
+    assert data["total_amount"] == 250000
+    month = datetime.utcnow().strftime("%Y-%m")
+    home = next(group for group in data["groups"] if group["loan_type"] == "home")
+    assert home == {"status": "pending", "loan_type": "home", "month": month, "loan_count": 1, "total_amount": 200000, "total_emi": emi}
+
+    client.put(f"/admins/loans/{first['id']}", json={"status": "approved"}, headers=admin_auth_headers)
+    client.put(f"/admins/loans/{second['id']}", json={"status": "rejected"}, headers=admin_auth_headers)
+
+    assert _portfolio(client, admin_auth_headers, status="pending")["loan_count"] == 0
+    approved = _portfolio(client, admin_auth_headers, status="approved")
+    assert (approved["loan_count"], approved["total_amount"], approved["total_emi"]) == (1, 200000, emi)
+    rejected = _portfolio(client, admin_auth_headers, status="rejected")
+    assert (rejected["loan_count"], rejected["total_amount"], rejected["total_emi"]) == (1, 50000, 0)
+    assert verify_aggregates(db_session) == []
+
+def test_portfolio_follows_bulk_decisions(client, auth_headers, admin_auth_headers, db_session):
+    """Test bulk decisions keep the aggregates in step with the loans table."""
+    ids = [client.post("/customers/loans", json=LOAN, headers=auth_headers).json()["id"] for _ in range(4)]
+    decisions = [{"loan_id": ids[0], "status": "approved"}, {"loan_id": ids[1], "status": "approved"},
+                 {"loan_id": ids[2], "status": "rejected"}, {"loan_id": ids[2], "status": "approved"}]
+    assert client.put("/admins/loans/bulk", json=decisions, headers=admin_auth_headers).status_code == 200
+
+    counts = {status: _portfolio(client, admin_auth_headers, status=status)["loan_count"] for status in ("pending", "approved", "rejected")}
+    assert counts == {"pending": 1, "approved": 2, "rejected": 1}
+    assert verify_aggregates(db_session) == []
+
+def test_portfolio_month_filters(client, admin_auth_headers, test_customer, db_session):
+    """Test month range filters select groups by application month."""
+    for month in (1, 2, 3):
+        db_session.add(Loan(customer_id=test_customer.id, applied_at=datetime(2026, month, 15), **LOAN))
+    db_session.commit()
+
+    data = _portfolio(client, admin_auth_headers, month_from="2026-02", month_to="2026-03")
+    assert [group["month"] for group in data["groups"]] == ["2026-02", "2026-03"]
+    assert data["loan_count"] == 2
+
+def test_portfolio_requires_admin(client, auth_headers):
+    """Test customers cannot read the portfolio report."""
+    assert client.get("/auditors/portfolio", headers=auth_headers).status_code == 403
+
+def test_rebuild_repairs_drift(test_customer, db_session, capsys):
+    """Test verify reports drifted groups and a rebuild recomputes them from loans."""
+    db_session.add_all([Loan(customer_id=test_customer.id, **LOAN) for _ in range(3)])
+    db_session.commit()
+    db_session.execute(update(LoanAggregate).values(loan_count=7))
+    db_session.commit()
+
+    assert aggregates_main(["--verify"], engine=engine) == 1
+    assert "1 loan aggregate groups differ" in capsys.readouterr().out
+    assert aggregates_main([], engine=engine) == 0
+    assert verify_aggregates(db_session) == []
+    assert db_session.query(LoanAggregate).one().loan_count == 3
+
+def test_populate_loan_aggregates_on_existing_loans(test_customer, db_session):
+    """Test loans written before the aggregates table existed are counted once on upgrade."""
+    db_session.execute(insert(Loan), [{"customer_id": test_customer.id, "emi": 100, **LOAN}] * 2)
+    db_session.commit()
+
+    assert populate_loan_aggregates(engine) == 1
+    assert populate_loan_aggregates(engine) == 0
+    assert verify_aggregates(db_session) == []
+    assert rebuild_aggregates(db_session) == 1
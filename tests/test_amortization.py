@@ -0,0 +1,52 @@
+import types
+from decimal import Decimal
+from itertools import islice
+from app.utils import calculate_emi
+from app.utils.amortization import amortization_schedule, portfolio_schedules
+
+def test_schedule_repays_principal_exactly():
+    """Test a 30-year schedule has 360 rows and ends with a zero balance."""
+    rows = list(amortization_schedule(5000000, 8.5, 360))
+    assert len(rows) == 360
+    assert sum(row.principal for row in rows) == Decimal("5000000.00")
+    assert rows[-1].balance == 0
+    emi = Decimal(str(calculate_emi(5000000, 8.5, 360)))
+    assert all(row.payment == emi for row in rows[:-1])
+
+def test_schedule_rows_are_consistent():
+    """Test each payment splits into principal and interest on the running balance."""
+    balance = Decimal("100000.00")
+    for row in amortization_schedule(100000, 12, 12):
+        assert row.payment == row.principal + row.interest
+        assert row.interest == (balance * Decimal("0.01")).quantize(Decimal("0.01"))
+        balance -= row.principal
+        assert row.balance == balance
+    assert balance == 0
+
+def test_schedule_final_installment_reconciles_rounding():
+    """Test the last installment absorbs rounding left by the rounded EMI."""
+    rows = list(amortization_schedule(10000, 0, 7))
+    assert [row.payment for row in rows[:-1]] == [Decimal("1428.57")] * 6
+    assert rows[-1].payment == Decimal("1428.58")
+
+def test_schedule_is_lazy():
+    """Test rows are generated on demand."""
+    schedule = amortization_schedule(250000, 9, 360)
+    assert [row.installment for row in islice(schedule, 2)] == [1, 2]
+    assert next(schedule).installment == 3
+
+def test_schedule_zero_tenure():
+    """Test a zero-month loan has no installments."""
+    assert list(amortization_schedule(10000, 10, 0)) == []
+
+def test_portfolio_schedules():
+    """Test bulk generation yields every loan's rows tagged with its id."""
+    loans = [
+        types.SimpleNamespace(id=1, amount=10000, interest_rate=10, tenure_months=12, emi=None),
+        types.SimpleNamespace(id=2, amount=Decimal("20000.00"), interest_rate=Decimal("8.50"), tenure_months=6, emi=Decimal("3416.46")),
+    ]
+    rows = list(portfolio_schedules(loans))
+    assert len(rows) == 18
+    assert [row[0] for row in rows] == [1] * 12 + [2] * 6
+    assert rows[12][2] == Decimal("3416.46")
+    assert rows[-1][-1] == 0
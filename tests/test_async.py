@@ -0,0 +1,111 @@
+import pytest
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.database import get_db, get_async_db, create_async_session_factory, to_async_url
+from app.replicas import get_async_read_db
+from app.models import Job
+from app.routers import auth_router, customers_router, admins_router, customers_async_router, admins_async_router
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+@pytest.fixture(scope="function")
+def async_client(db_session):
+    """Create a test client with the async routers mounted ahead of the sync ones."""
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.include_router(customers_async_router)
+    app.include_router(admins_async_router)
+    app.include_router(customers_router)
+    app.include_router(admins_router)
+    async_engine, session_factory = create_async_session_factory(to_async_url(SQLALCHEMY_DATABASE_URL))
+
+    def override_get_db():
+        yield db_session
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    with TestClient(app) as c:
+        yield c
+        c.portal.call(async_engine.dispose)
+
+@pytest.fixture(scope="function")
+def customer_headers(async_client, test_customer):
+    response = async_client.post("/auth/token", data={"username": test_customer.email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="function")
+def admin_headers(async_client, test_admin):
+    response = async_client.post("/auth/token", data={"username": test_admin.email, "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_to_async_url():
+    """Test sync URLs map onto their async drivers."""
+    assert to_async_url("sqlite:///./banking.db") == "sqlite+aiosqlite:///./banking.db"
+    assert to_async_url("postgresql+psycopg2://u:p@db/bank") == "postgresql+asyncpg://u:p@db/bank"
+    with pytest.raises(ValueError):
+        to_async_url("oracle://db")
+
+def test_async_customer_flow(async_client, customer_headers):
+    """Test profile, loan application and history through the async routes."""
+    response = async_client.get("/customers/me", headers=customer_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "test@example.com"
+
+    loan_data = {"loan_type": "personal", "amount": 100000, "tenure_months": 12, "interest_rate": 12}
+    response = async_client.post("/customers/loans", json=loan_data, headers=customer_headers)
+    assert response.status_code == 200
+    assert response.json()["emi"] == 8884.88
+
+    response = async_client.get("/customers/loans", params={"limit": 1}, headers=customer_headers)
+    assert response.status_code == 200
+    assert [loan["loan_type"] for loan in response.json()["loans"]] == ["personal"]
+    assert response.json()["next_cursor"] is None
+
+def test_async_admin_flow(async_client, admin_headers, customer_headers, db_session):
+    """Test admin listing and decision through the async routes; bulk stays on the sync router."""
+    loan_data = {"loan_type": "car", "amount": 30000, "tenure_months": 36, "interest_rate": 10}
+    loan_ids = [async_client.post("/customers/loans", json=loan_data, headers=customer_headers).json()["id"] for _ in range(2)]
+
+    response = async_client.get("/admins/loans", headers=admin_headers)
+    assert response.status_code == 200
+    assert [loan["id"] for loan in response.json()["loans"]] == loan_ids
+
+    response = async_client.put(f"/admins/loans/{loan_ids[0]}", json={"status": "rejected", "version": 1}, headers=admin_headers)
+    assert response.status_code == 409
+
+    response = async_client.put(f"/admins/loans/{loan_ids[0]}", json={"status": "rejected", "version": 0}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "rejected"
+    assert response.json()["emi"] is None
+    assert response.json()["version"] == 1
+
+    response = async_client.put(f"/admins/loans/{loan_ids[0]}", json={"status": "approved"}, headers=admin_headers)
+    assert response.status_code == 400
+
+    response = async_client.put("/admins/loans/bulk", json=[{"loan_id": loan_ids[1], "status": "approved"}], headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()[0]["result"] == "updated"
+    # Application and decision notifications, queued from both routers
+    assert db_session.query(Job).count() == 4
+
+def test_async_auth_rejects_wrong_role(async_client, customer_headers, admin_headers):
+    """Test the async dependencies enforce roles like the sync ones."""
+    assert async_client.get("/admins/loans", headers=customer_headers).status_code == 403
+    assert async_client.get("/customers/me", headers=admin_headers).status_code == 403
+    assert async_client.get("/customers/me", headers={"Authorization": "Bearer invalid"}).status_code == 401
+
+def test_async_principal_uses_cache_and_honours_revocation(async_client, customer_headers, test_customer, db_session):
+    """Test async routes share user_cache with the sync ones and refuse revoked tokens after a miss."""
+    from app.auth import revoke_tokens, user_cache
+    assert async_client.get("/customers/loans", headers=customer_headers).status_code == 200
+    assert user_cache.peek((False, test_customer.id)) is not None
+    revoke_tokens(db_session, test_customer, is_admin=False)
+    user_cache.clear()
+    assert async_client.get("/customers/loans", headers=customer_headers).status_code == 401
@@ -0,0 +1,140 @@
+import gzip
+import json
+import time
+import pytest
+from app import audit
+from app.audit import AuditLog, SegmentSink
+from app.config import settings
+from app.models import AuditEntry
+
+LOAN = {"loan_type": "personal", "amount": 50000, "tenure_months": 24, "interest_rate": 12.5}
+
+class ListSink:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    def write(self, entries):
+        if self.fail:
+            raise OSError("disk full")
+        self.batches.append(entries)
+
+def test_actions_are_audited_without_request_writes(client, auth_headers, admin_auth_headers, test_customer, test_admin, db_session):
+    """Test state changes are buffered, written by the flusher and served to auditors."""
+    loan_id = client.post("/customers/loans", json=LOAN, headers=auth_headers).json()["id"]
+    client.put(f"/admins/loans/{loan_id}", json={"status": "approved"}, headers=admin_auth_headers)
+    client.post("/auth/token", data={"username": "test@example.com", "password": "wrong"})
+    assert db_session.query(AuditEntry).count() == 0  # Nothing written in the requests
+
+    assert audit.audit_log.flush() == 5  # Two logins, the application, the decision and the failed login
+    response = client.get(f"/auditors/audit?resource_type=loan&resource_id={loan_id}", headers=admin_auth_headers)
+    assert response.status_code == 200
+    entries = response.json()["entries"]
+    assert [(entry["action"], entry["actor_type"], entry["actor_id"]) for entry in entries] == [
+        ("loan.decide", "admin", test_admin.id), ("loan.apply", "customer", test_customer.id),
+    ]
+    assert entries[0]["detail"] == {"status": "approved", "version": 1}
+
+    failed = client.get("/auditors/audit?action=auth.login_failed", headers=admin_auth_headers).json()["entries"]
+    assert failed[0]["detail"] == {"username": "test@example.com"}
+    mine = client.get(f"/auditors/audit?actor_type=customer&actor_id={test_customer.id}", headers=admin_auth_headers).json()
+    assert {entry["action"] for entry in mine["entries"]} == {"auth.login", "loan.apply"}
+
+def test_audit_log_paging_and_access(client, auth_headers, admin_auth_headers):
+    """Test keyset paging newest first, and that customers cannot read the trail."""
+    for _ in range(3):
+        client.post("/customers/loans", json=LOAN, headers=auth_headers)
+    audit.audit_log.flush()
+    first = client.get("/auditors/audit?action=loan.apply&limit=2", headers=admin_auth_headers).json()
+    second = client.get(f"/auditors/audit?action=loan.apply&cursor={first['next_cursor']}", headers=admin_auth_headers).json()
+    ids = [entry["id"] for entry in first["entries"] + second["entries"]]
+    assert len(ids) == 3 and ids == sorted(ids, reverse=True)
+    assert second["next_cursor"] is None
+    assert client.get("/auditors/audit?since=2000-01-01T00:00:00Z", headers=admin_auth_headers).json()["entries"]
+    assert client.get("/auditors/audit?cursor=x", headers=admin_auth_headers).status_code == 400
+    assert client.get("/auditors/audit", headers=auth_headers).status_code == 403
+
+def test_ring_buffer_overwrites_oldest():
+    """Test a full buffer keeps the newest entries and counts what it dropped."""
+    sink = ListSink()
+    log = AuditLog(3, [sink])
+    for index in range(5):
+        log.record("admin", 1, "loan.decide", "loan", index)
+    assert log.dropped == 2
+    assert log.flush() == 3
+    assert [entry["resource_id"] for entry in sink.batches[0]] == ["2", "3", "4"]
+    assert log.flush() == 0
+
+def test_failed_flush_keeps_entries():
+    """Test entries survive a sink failure, ahead of newer ones."""
+    sink = ListSink(fail=True)
+    log = AuditLog(10, [sink])
+    log.record("admin", 1, "loan.decide", "loan", 1)
+    with pytest.raises(OSError):
+        log.flush()
+    log.record("admin", 1, "loan.decide", "loan", 2)
+    sink.fail = False
+    assert log.flush() == 2
+    assert [entry["resource_id"] for entry in sink.batches[0]] == ["1", "2"]
+
+def test_segment_sink_rotates_compressed_files(tmp_path):
+    """Test batches land in gzip JSONL segments that rotate by size."""
+    sink = SegmentSink(str(tmp_path), max_bytes=1)
+    log = AuditLog(100, [sink])
+    for batch in range(3):
+        log.record("customer", 7, "transfer.create", "transfer", f"t{batch}", amount_minor=100)
+        log.flush()
+    segments = sorted(tmp_path.glob("audit-*.jsonl.gz"))
+    assert len(segments) == 3
+    lines = [json.loads(line) for segment in segments for line in gzip.open(segment, "rt")]
+    assert {line["resource_id"] for line in lines} == {"t0", "t1", "t2"}
+    assert lines[0]["detail"] == {"amount_minor": 100}
+
+def test_flusher_thread_writes_in_background(monkeypatch):
+    """Test the flusher drains the buffer on its own once started."""
+    monkeypatch.setattr(settings, "audit_flush_interval_seconds", 0.01)
+    sink = ListSink()
+    log = AuditLog(10, [sink])
+    log.record("admin", 1, "fraud.rescore", "loans")
+    deadline = time.monotonic() + 5
+    while not sink.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [entry["action"] for entry in sink.batches[0]] == ["fraud.rescore"]
+
+def test_audit_time_filters_convert_offsets(client, admin_auth_headers, db_session):
+    """Test since/until with a non-UTC offset are converted to UTC, not just stripped."""
+    from datetime import datetime
+    db_session.add(AuditEntry(at=datetime(2026, 10, 18, 5, 0), actor_type="system", action="test.tz", resource_type="app"))
+    db_session.commit()
+
+    def actions(**params):
+        response = client.get("/auditors/audit", params={"action": "test.tz", **params}, headers=admin_auth_headers)
+        assert response.status_code == 200
+        return [entry["action"] for entry in response.json()["entries"]]
+
+    # 10:30+05:30 is 05:00 UTC
+    assert actions(since="2026-10-18T10:30:00+05:30") == ["test.tz"]
+    assert actions(since="2026-10-18T10:31:00+05:30") == []
+    assert actions(until="2026-10-18T10:30:00+05:30") == []
+    assert actions(until="2026-10-18T10:31:00+05:30") == ["test.tz"]
+    assert actions(since="2026-10-18T05:00:00") == ["test.tz"]
+
+def test_failed_sink_retries_alone():
+    """Test a batch one sink took is not written to it again when another sink fails."""
+    database, files = ListSink(), ListSink(fail=True)
+    log = AuditLog(3, [database, files])
+    log.record("admin", 1, "loan.decide", "loan", 1)
+    with pytest.raises(OSError):
+        log.flush()
+    assert len(log) == 1
+    for index in range(2, 5):
+        log.record("admin", 1, "loan.decide", "loan", index)
+    with pytest.raises(OSError):
+        log.flush()
+    # The failing sink's backlog is bounded by the capacity too, and what it loses is counted
+    assert log.dropped == 1
+    files.fail = False
+    assert log.flush() == 3
+    assert [[entry["resource_id"] for entry in batch] for batch in database.batches] == [["1"], ["2", "3", "4"]]
+    assert [entry["resource_id"] for entry in files.batches[0]] == ["2", "3", "4"]
+    assert len(log) == 0
@@ -197,4 +197,187 @@ def test_invalid_token_admin_endpoint(client):
     headers = {"Authorization": "Bearer invalid_token"}
     response = client.get("/admins/loans", headers=headers)
     assert response.status_code == 401
-    assert "Could not validate credentials" in response.json()["detail"]
\ No newline at end of file
+    assert "Could not validate credentials" in response.json()["detail"]
+
+@pytest.fixture
+def statements():
+    """Collect SQL statements executed on the test engine."""
+    from sqlalchemy import event
+    from tests.conftest import engine
+    collected = []
+    def record(conn, cursor, statement, *args):
+        collected.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    yield collected
+    event.remove(engine, "before_cursor_execute", record)
+
+def test_login_token_carries_id_role_and_version(client, test_customer):
+    """Test issued tokens embed the user id, role and token version."""
+    from jose import jwt
+    from app.config import settings
+    response = client.post("/auth/token", data={"username": test_customer.email, "password": "password123"})
+    payload = jwt.decode(response.json()["access_token"], settings.secret_key, algorithms=[settings.algorithm])
+    assert payload["uid"] == test_customer.id
+    assert payload["role"] == "customer"
+    assert payload["ver"] == 0
+
+def test_principal_routes_skip_user_lookup(client, auth_headers, statements):
+    """Test loan routes check the customer's row once and then serve it from the cache."""
+    for _ in range(3):
+        assert client.get("/customers/loans", headers=auth_headers).status_code == 200
+    assert len([s for s in statements if "FROM customers" in s]) == 1
+    assert len([s for s in statements if "FROM loans" in s]) == 3
+
+def test_full_row_dependency_uses_cache(client, auth_headers, statements):
+    """Test /customers/me loads the customer row once and then serves it from the cache."""
+    assert client.get("/customers/me", headers=auth_headers).json()["email"] == "test@example.com"
+    assert client.get("/customers/me", headers=auth_headers).json()["email"] == "test@example.com"
+    assert len([s for s in statements if "FROM customers" in s]) == 1
+
+def test_revoke_tokens(client, auth_headers, test_customer, db_session):
+    """Test bumping the token version rejects previously issued tokens."""
+    from app.auth import revoke_tokens
+    assert client.get("/customers/me", headers=auth_headers).status_code == 200
+    revoke_tokens(db_session, test_customer, is_admin=False)
+    assert client.get("/customers/me", headers=auth_headers).status_code == 401
+    assert client.get("/customers/loans", headers=auth_headers).status_code == 401
+
+    response = client.post("/auth/token", data={"username": "test@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/customers/me", headers=headers).status_code == 200
+
+def test_token_without_user_id_still_accepted(client, test_customer):
+    """Test tokens issued before ids were embedded fall back to an email lookup."""
+    token = create_access_token({"sub": test_customer.email, "is_admin": False})
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/customers/loans", headers=headers).status_code == 200
+    assert client.get("/customers/me", headers=headers).json()["email"] == test_customer.email
+
+def test_verify_token_cache_skips_decode(monkeypatch):
+    """Test a repeated token is served from the cache without signature verification."""
+    from app.auth import auth as auth_module, token_cache
+    token_cache.clear()
+    token = create_access_token({"sub": "cached@example.com", "uid": 5, "role": "customer", "ver": 0})
+    first = verify_token(token, Exception("invalid"))
+    assert token_cache.stats()["misses"] == 1
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("jwt.decode should not run on a cache hit")
+    monkeypatch.setattr(auth_module.jwt, "decode", fail_decode)
+    assert verify_token(token, Exception("invalid")) is first
+    assert token_cache.stats()["hits"] == 1
+
+def test_verify_token_cache_entry_expires_with_token():
+    """Test cached tokens expire at the token's exp, not later."""
+    from datetime import timedelta
+    from app.auth import token_cache
+    token_cache.clear()
+    token = create_access_token({"sub": "short@example.com"}, expires_delta=timedelta(seconds=1))
+    verify_token(token, Exception("invalid"))
+    key = next(iter(token_cache._data))
+    expires_at, _ = token_cache._data[key]
+    import time
+    assert expires_at - time.monotonic() <= 1
+
+def test_verify_token_invalid_not_cached():
+    """Test tokens that fail verification are never cached."""
+    from fastapi import HTTPException
+    from app.auth import token_cache
+    token_cache.clear()
+    with pytest.raises(HTTPException):
+        verify_token("invalid_token", HTTPException(status_code=401))
+    assert len(token_cache) == 0
+
+def test_hash_password_on_pool(monkeypatch):
+    """Test hashes produced by the process pool verify in-process."""
+    from app.config import settings
+    from app.auth import hash_password, shutdown_hash_pool, verify_and_update_password
+    monkeypatch.setattr(settings, "password_hash_workers", 2)
+    hashed = hash_password("pooled")
+    shutdown_hash_pool()
+    assert verify_password("pooled", hashed)
+    assert verify_and_update_password("pooled", hashed) == (True, None)
+    assert verify_and_update_password("wrong", hashed) == (False, None)
+
+def test_hash_password_inline(monkeypatch):
+    """Test hashing runs in the calling thread when the pool is disabled."""
+    from app.config import settings
+    from app.auth import hash_password
+    monkeypatch.setattr(settings, "password_hash_workers", 0)
+    assert verify_password("inline", hash_password("inline"))
+
+def test_login_rehashes_on_policy_change(client, test_customer, db_session, monkeypatch):
+    """Test a successful login upgrades a hash made under an older policy."""
+    from app.config import settings
+    from app.models import Customer
+    customer_id, email, old_hash = test_customer.id, test_customer.email, test_customer.password_hash
+    monkeypatch.setattr(settings, "password_hash_rounds", 30000)
+    response = client.post("/auth/token", data={"username": email, "password": "password123"})
+    assert response.status_code == 200
+    new_hash = db_session.query(Customer.password_hash).filter(Customer.id == customer_id).scalar()
+    assert new_hash != old_hash
+    assert "$30000$" in new_hash
+    assert verify_password("password123", new_hash)
+
+def test_hashing_backpressure(monkeypatch):
+    """Test callers get a 503 when the hashing queue stays full."""
+    import threading
+    from fastapi import HTTPException
+    from app.config import settings
+    from app.auth import hashing
+    monkeypatch.setattr(settings, "password_hash_workers", 2)
+    monkeypatch.setattr(settings, "password_hash_queue_timeout", 0.01)
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(hashing, "_slots", full)
+    with pytest.raises(HTTPException) as exc_info:
+        hashing.hash_password("busy")
+    assert exc_info.value.status_code == 503
+
+def test_login_any_admin_account(client, db_session, statements):
+    """Test admins other than admin@example.com can log in, with a single lookup query."""
+    from jose import jwt
+    from app.config import settings
+    from app.models import BankAdmin
+    db_session.add(BankAdmin(username="second", email="second.admin@example.com", password_hash=get_password_hash("secret")))
+    db_session.commit()
+    statements.clear()
+
+    response = client.post("/auth/token", data={"username": "second.admin@example.com", "password": "secret"})
+    assert response.status_code == 200
+    assert len(statements) == 1
+    payload = jwt.decode(response.json()["access_token"], settings.secret_key, algorithms=[settings.algorithm])
+    assert payload["role"] == "admin"
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/admins/loans", headers=headers).status_code == 200
+
+def test_lookup_principal(db_session, test_customer, test_admin):
+    """Test the unified lookup finds customers and admins and prefers admins on a clash."""
+    from app.auth import lookup_principal
+    from app.models import Customer
+    customer = lookup_principal(db_session, "test@example.com")
+    assert (customer.is_admin, customer.id) == (False, test_customer.id)
+    admin = lookup_principal(db_session, "admin@example.com")
+    assert (admin.is_admin, admin.id) == (True, test_admin.id)
+    assert lookup_principal(db_session, "nobody@example.com") is None
+
+    db_session.add(Customer(name="Clash", email="admin@example.com", password_hash="x", age=30))
+    db_session.commit()
+    assert lookup_principal(db_session, "admin@example.com").is_admin is True
+
+def test_customer_registration_admin_email(client, test_admin):
+    """Test customers cannot register with an admin's email."""
+    customer_data = {"name": "Impostor", "email": "admin@example.com", "password": "password123", "age": 30}
+    response = client.post("/auth/register", json=customer_data)
+    assert response.status_code == 400
+    assert "Email already registered" in response.json()["detail"]
+
+def test_revocation_enforced_after_cache_expiry(client, auth_headers, test_customer, db_session):
+    """Test a revoked token is refused once the cached row is gone, as in another worker process."""
+    from app.auth import revoke_tokens, user_cache
+    assert client.get("/customers/loans", headers=auth_headers).status_code == 200
+    revoke_tokens(db_session, test_customer, is_admin=False)
+    user_cache.clear()
+    assert client.get("/customers/loans", headers=auth_headers).status_code == 401
+    user_cache.clear()
+    assert client.post("/customers/accounts", json={"account_type": "savings"}, headers=auth_headers).status_code == 401
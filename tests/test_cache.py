@@ -0,0 +1,58 @@
+from app.utils.cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_ttl_cache_expires_entries():
+    """Test entries disappear after the cache TTL or a shorter per-entry TTL."""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+    assert cache.get("a") == 1
+    assert cache.get("b") == 2
+    clock.now = 6
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    clock.now = 61
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 0, "maxsize": 10, "hits": 3, "misses": 2}
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test the least recently used entry is evicted when full."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.peek("b") is None
+    assert cache.peek("a") == 1
+    assert cache.peek("c") == 3
+
+def test_ttl_cache_pop_and_clear():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    cache.set("b", 2)
+    cache.clear()
+    assert len(cache) == 0
+
+def test_ttl_cache_ignores_non_positive_ttl():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.peek("a") is None
+
+def test_ttl_cache_setdefault():
+    """Test setdefault keeps a live entry and replaces an expired one."""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    assert cache.setdefault("a", 1) == 1
+    assert cache.setdefault("a", 2) == 1
+    clock.now = 61
+    assert cache.setdefault("a", 3) == 3
+    assert cache.get("a") == 3
@@ -0,0 +1,37 @@
+import pytest
+from app.config import settings
+from app.database import build_engine, engine_options, is_sqlite
+
+def test_sqlite_connections_get_pragmas(tmp_path):
+    """Test every new SQLite connection is tuned from settings."""
+    engine = build_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+    with engine.connect() as conn:
+        pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == settings.sqlite_busy_timeout_ms
+        assert pragma("cache_size") == settings.sqlite_cache_size
+    engine.dispose()
+
+def test_engine_options_pool_settings(monkeypatch):
+    """Test pool sizing comes from settings for file and server databases."""
+    monkeypatch.setattr(settings, "db_pool_size", 7)
+    monkeypatch.setattr(settings, "db_max_overflow", 3)
+    options = engine_options("postgresql://u:p@db/bank")
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["pool_pre_ping"] is True
+    assert "connect_args" not in options
+    assert engine_options("sqlite:///./banking.db")["connect_args"] == {"check_same_thread": False}
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+def test_engine_options_memory_sqlite_has_no_pool_sizing(url):
+    """Test in-memory SQLite does not receive QueuePool arguments."""
+    options = engine_options(url)
+    assert "pool_size" not in options
+    build_engine(url).dispose()
+
+def test_is_sqlite():
+    assert is_sqlite("sqlite:///./banking.db")
+    assert is_sqlite("sqlite+aiosqlite:///./banking.db")
+    assert not is_sqlite("postgresql://u:p@db/bank")
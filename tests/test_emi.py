@@ -1,5 +1,5 @@
 import pytest
-from app.utils import calculate_emi
+from app.utils import calculate_emi, calculate_emi_batch
 
 def test_calculate_emi_basic():
     """Test basic EMI calculation."""
@@ -53,4 +53,38 @@ def test_calculate_emi_precision():
     tenure = 12
     emi = calculate_emi(principal, rate, tenure)
     # Should be rounded to 2 decimal places
-    assert emi == round(emi, 2)
\ No newline at end of file
+    assert emi == round(emi, 2)
+
+def test_calculate_emi_rounds_half_up():
+    """Test EMI rounding is half-up on the decimal value."""
+    assert calculate_emi(2.675, 0, 1) == 2.68
+    assert calculate_emi(1.005, 0, 1) == 1.01
+
+def test_calculate_emi_batch_matches_scalar():
+    """Test batch EMI matches calculate_emi for every loan."""
+    principals = [100000, 50000, 100000, 50000, 100000, 2.675]
+    rates = [12, 0, 10, 25, 8, 0]
+    tenures = [12, 10, 0, 24, 240, 1]
+    expected = [calculate_emi(p, r, n) for p, r, n in zip(principals, rates, tenures)]
+    assert calculate_emi_batch(principals, rates, tenures) == expected
+
+def test_calculate_emi_batch_pure_python_fallback(monkeypatch):
+    """Test batch EMI without NumPy."""
+    from app.utils import emi as emi_module
+    monkeypatch.setattr(emi_module, "np", None)
+    assert emi_module.calculate_emi_batch([100000], [12], [12]) == [8884.88]
+
+def test_calculate_emi_batch_accepts_decimals():
+    """Test batch EMI with Decimal inputs as loaded from the database."""
+    from decimal import Decimal
+    emis = calculate_emi_batch([Decimal("100000.00")], [Decimal("12.00")], [12])
+    assert emis == [8884.88]
+
+def test_calculate_emi_batch_empty():
+    """Test batch EMI with no loans."""
+    assert calculate_emi_batch([], [], []) == []
+
+def test_calculate_emi_batch_length_mismatch():
+    """Test batch EMI rejects inputs of different lengths."""
+    with pytest.raises(ValueError):
+        calculate_emi_batch([100000], [12, 10], [12])
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+from app.events import ADMIN_CHANNEL, EventBus, RedisBroker, bus, customer_channel
+
+LOAN = {"loan_type": "personal", "amount": 50000, "tenure_months": 24, "interest_rate": 12.5}
+
+def _events(body):
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":") and ": " in line)
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def _stream_while(client, path, headers, channel, action):
+    """Open an event stream, run action once it is subscribed, then end the stream and return its events."""
+    result = {}
+    reader = threading.Thread(target=lambda: result.setdefault("response", client.get(path, headers=headers)))
+    reader.start()
+    deadline = time.monotonic() + 5
+    while not bus.subscriber_count(channel) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    action()
+    bus.disconnect_all()
+    reader.join(5)
+    response = result["response"]
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return _events(response.text)
+
+def test_publish_from_another_thread_reaches_subscribers():
+    """Test events published from worker threads arrive on the subscriber's event loop."""
+    async def scenario():
+        local = EventBus(queue_size=10)
+        subscription = local.subscribe("a")
+        other = local.subscribe("b")
+        threading.Thread(target=local.publish, args=("a", {"type": "x", "n": 1})).start()
+        assert json.loads(await subscription.get(1)) == {"type": "x", "n": 1}
+        assert await other.get(0.05) is None
+        local.unsubscribe(subscription)
+        assert not local.wants("a")
+    asyncio.run(scenario())
+
+def test_slow_subscriber_is_reset():
+    """Test a subscriber whose queue overflows gets a reset instead of a stale backlog."""
+    async def scenario():
+        local = EventBus(queue_size=2)
+        chunks = []
+        stream = local.stream("a", keepalive=1)
+        chunks.append(await stream.__anext__())
+        for n in range(5):
+            local.publish("a", {"type": "x", "n": n})
+        await asyncio.sleep(0)
+        async for chunk in stream:
+            chunks.append(chunk)
+        assert chunks == ["retry: 3000\n\n", "event: reset\ndata: {}\n\n"]
+        assert local.subscriber_count("a") == 0
+    asyncio.run(scenario())
+
+def test_stream_sends_keepalives():
+    """Test idle streams emit comment lines."""
+    async def scenario():
+        local = EventBus()
+        stream = local.stream("a", keepalive=0.01)
+        assert await stream.__anext__() == "retry: 3000\n\n"
+        assert await stream.__anext__() == ": keepalive\n\n"
+        await stream.aclose()
+        assert local.subscriber_count("a") == 0
+    asyncio.run(scenario())
+
+class FakeRedis:
+    """Minimal stand-in for the redis-py publish/pubsub interface."""
+
+    def __init__(self):
+        self.messages = queue.Queue()
+        self.publish_threads = []
+
+    def publish(self, channel, data):
+        self.publish_threads.append(threading.current_thread())
+        self.messages.put({"type": "pmessage", "pattern": b"test.*", "channel": channel.encode(), "data": data.encode()})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self
+
+    def psubscribe(self, pattern):
+        self.pattern = pattern
+
+    def listen(self):
+        while True:
+            yield self.messages.get()
+
+def test_redis_broker_relays_events():
+    """Test events published through a Redis-compatible broker reach local subscribers."""
+    async def scenario():
+        client = FakeRedis()
+        local = EventBus(broker=RedisBroker(client, "test."))
+        subscription = local.subscribe("a")
+        assert client.pattern == "test.*"
+        assert local.wants("b")  # Other processes may be listening
+        local.publish("a", {"type": "x"})
+        assert json.loads(await subscription.get(2)) == {"type": "x"}
+        # The blocking client call never runs on the event loop
+        assert threading.current_thread() not in client.publish_threads
+    asyncio.run(scenario())
+
+def test_admin_stream_receives_applications_and_decisions(client, auth_headers, admin_auth_headers):
+    """Test admins are pushed new applications and decisions."""
+    def act():
+        loan = client.post("/customers/loans", json=LOAN, headers=auth_headers).json()
+        client.put(f"/admins/loans/{loan['id']}", json={"status": "approved"}, headers=admin_auth_headers)
+
+    events = _stream_while(client, "/admins/events", admin_auth_headers, ADMIN_CHANNEL, act)
+    assert [name for name, _ in events] == ["loan.applied", "loan.decided", "reset"]
+    applied, decided = events[0][1], events[1][1]
+    assert applied["loan"]["status"] == "pending"
+    assert applied["loan"]["flagged"] is False
+    assert decided["loans"] == [{"id": applied["loan"]["id"], "customer_id": applied["loan"]["customer_id"],
+                                 "status": "approved", "emi": applied["loan"]["emi"]}]
+
+def test_customer_stream_receives_own_decisions(client, auth_headers, admin_auth_headers, test_customer):
+    """Test customers are pushed bulk decisions on their loans, without fraud fields."""
+    loan_ids = [client.post("/customers/loans", json=LOAN, headers=auth_headers).json()["id"] for _ in range(2)]
+    customer_id = test_customer.id
+
+    def act():
+        decisions = [{"loan_id": loan_ids[0], "status": "approved"}, {"loan_id": loan_ids[1], "status": "rejected"}]
+        client.put("/admins/loans/bulk", json=decisions, headers=admin_auth_headers)
+
+    events = _stream_while(client, "/customers/events", auth_headers, customer_channel(customer_id), act)
+    assert events[0][0] == "loan.decided"
+    assert [(loan["id"], loan["status"]) for loan in events[0][1]["loans"]] == [(loan_ids[0], "approved"), (loan_ids[1], "rejected")]
+    assert events[0][1]["loans"][1]["emi"] is None
+
+def test_event_streams_require_matching_role(client, auth_headers, admin_auth_headers):
+    """Test each stream is limited to its role."""
+    assert client.get("/admins/events", headers=auth_headers).status_code == 403
+    assert client.get("/customers/events", headers=admin_auth_headers).status_code == 403
+
+def test_shutdown_ends_streams_and_flushes(db_session, monkeypatch):
+    """Test the app's shutdown disconnects streams, stops job workers, flushes the audit log and the hash pool."""
+    from fastapi.testclient import TestClient
+    from app import audit, jobs, main
+    from app.models import AuditEntry
+    calls = []
+    monkeypatch.setattr(bus, "disconnect_all", lambda: calls.append("events"))
+    monkeypatch.setattr(jobs.pool, "stop", lambda: calls.append("jobs"))
+    monkeypatch.setattr(main, "shutdown_hash_pool", lambda: calls.append("hashing"))
+    with TestClient(main.app):
+        audit.record("system", None, "test.shutdown", "app")
+    assert calls == ["events", "jobs", "hashing"]
+    assert len(audit.audit_log) == 0
+    assert db_session.query(AuditEntry).filter(AuditEntry.action == "test.shutdown").count() == 1
+
+def test_exit_signal_disconnects_streams_before_the_server_handler(monkeypatch):
+    """Test SIGTERM ends the open streams, which the server would otherwise wait on, and still reaches its handler."""
+    import signal
+    from app.main import _end_streams_on_exit_signal
+    calls = []
+    monkeypatch.setattr(bus, "disconnect_all", lambda: calls.append("events"))
+    previous = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+    loop = asyncio.new_event_loop()
+    try:
+        signal.signal(signal.SIGTERM, lambda signum, frame: calls.append("server"))
+        _end_streams_on_exit_signal(loop)
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        loop.close()
+    assert calls == ["server", "events"]
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from app import fraud
+from app.models import Loan
+from app.utils.fraud import FraudScorer
+from tests.conftest import TestingSessionLocal
+
+LOAN = {"loan_type": "personal", "amount": 50000, "tenure_months": 24, "interest_rate": 12.5}
+
+def _scorer(**overrides):
+    options = {"threshold": 3.0, "velocity_window": 3600, "velocity_limit": 3, "max_customers": 100}
+    options.update(overrides)
+    return FraudScorer(**options)
+
+def test_ordinary_applications_score_zero():
+    """Test applications in line with history are not flagged."""
+    scorer = _scorer()
+    for day in range(5):
+        result = scorer.score(1, "personal", 50000 + day * 1000, 24, 12.5, at=day * 86400)
+        assert result.score == 0 and not result.flagged
+
+def test_velocity_flags_bursts():
+    """Test many applications within the window are flagged."""
+    scorer = _scorer()
+    results = [scorer.score(1, "personal", 50000, 24, 12.5, at=i) for i in range(6)]
+    assert [result.score for result in results] == [0, 0, 0, 1, 2, 3]
+    assert results[-1].flagged and results[-1].reasons == ("velocity",)
+    # Outside the window the rate no longer counts
+    assert scorer.score(1, "personal", 50000, 24, 12.5, at=7200).score == 0
+
+def test_amount_far_above_history_is_flagged():
+    """Test an amount far above the customer's own history is flagged."""
+    scorer = _scorer()
+    for day in range(4):
+        scorer.score(1, "personal", 50000, 24, 12.5, at=day * 86400)
+    result = scorer.score(1, "personal", 5000000, 24, 12.5, at=5 * 86400)
+    assert result.flagged
+    assert "amount_vs_history" in result.reasons
+
+def test_unusual_rate_for_tenure_is_flagged():
+    """Test a rate far from other loans of the same tenure adds to the score."""
+    scorer = _scorer()
+    for customer_id in range(40):
+        scorer.score(customer_id, "home", 200000, 240, 8.5 + (customer_id % 3) * 0.1, at=0)
+    result = scorer.score(99, "home", 200000, 240, 1.0, at=0)
+    assert result.reasons == ("rate_for_tenure",)
+    assert result.flagged
+
+def test_tracked_customers_are_bounded():
+    """Test the least recently seen customers are evicted."""
+    scorer = _scorer(max_customers=2)
+    for customer_id in range(3):
+        scorer.score(customer_id, "personal", 50000, 24, 12.5, at=0)
+    for _ in range(3):
+        scorer.score(0, "personal", 50000, 24, 12.5, at=0)
+    assert len(scorer._customers) == 2
+
+def test_apply_stores_score_and_admin_filters_flagged(client, auth_headers, admin_auth_headers):
+    """Test applications are scored inline and admins can list the flagged ones."""
+    responses = [client.post("/customers/loans", json=LOAN, headers=auth_headers) for _ in range(6)]
+    assert "flagged" not in responses[-1].json()  # Customers do not see fraud scores
+
+    response = client.get("/admins/loans", params={"flagged": True}, headers=admin_auth_headers)
+    assert response.status_code == 200
+    loans = response.json()["loans"]
+    assert [loan["id"] for loan in loans] == [responses[-1].json()["id"]]
+    assert loans[0]["fraud_score"] == 3.0
+
+    unflagged = client.get("/admins/loans", params={"flagged": False}, headers=admin_auth_headers).json()["loans"]
+    assert len(unflagged) == 5
+
+def test_rescore_loans_revises_pending_scores(test_customer, db_session):
+    """Test the background pass rebuilds statistics and only touches pending loans."""
+    start = datetime(2026, 1, 1)
+    loans = [Loan(customer_id=test_customer.id, applied_at=start + timedelta(days=i), status="approved", **LOAN) for i in range(4)]
+    loans.append(Loan(customer_id=test_customer.id, applied_at=start + timedelta(days=5), **{**LOAN, "amount": 5000000}))
+    loans.append(Loan(customer_id=test_customer.id, applied_at=start + timedelta(days=6), **LOAN))
+    db_session.add_all(loans)
+    db_session.commit()
+    ids = [loan.id for loan in loans]
+
+    worker = fraud.RescoreWorker(session_factory=TestingSessionLocal)
+    assert worker.run_once() == 2
+    scores = {loan.id: (loan.fraud_score, loan.flagged) for loan in db_session.query(Loan).populate_existing()}
+    assert scores[ids[0]] == (None, False)
+    assert scores[ids[4]][1] is True
+    assert scores[ids[5]] == (0.0, False)
+    # The replayed statistics become the live ones
+    assert fraud.scorer._customers[test_customer.id].amounts.count == 6
+    assert worker.run_once() == 0
+
+def test_invalid_loan_terms_are_rejected(client, auth_headers):
+    """Test non-positive amounts and tenures and negative rates get a 422 before scoring."""
+    for terms in ({"amount": -5}, {"amount": 0}, {"tenure_months": 0}, {"interest_rate": -1}):
+        response = client.post("/customers/loans", json={**LOAN, **terms}, headers=auth_headers)
+        assert response.status_code == 422
+
+def test_rescore_tolerates_legacy_non_positive_amounts(test_customer, db_session):
+    """Test a stored loan with a negative amount neither breaks scoring nor the replay."""
+    assert _scorer().score(1, "personal", -5, 24, 12.5).flagged is False
+    db_session.add_all([
+        Loan(customer_id=test_customer.id, status="approved", **{**LOAN, "amount": -5}),
+        Loan(customer_id=test_customer.id, **{**LOAN, "amount": -1}),
+    ])
+    db_session.commit()
+    assert fraud.RescoreWorker(session_factory=TestingSessionLocal).run_once() == 1
+
+def test_rescore_endpoint_triggers_worker(client, admin_auth_headers, auth_headers, monkeypatch):
+    """Test admins can request a background re-scoring pass."""
+    calls = []
+    monkeypatch.setattr(fraud.worker, "trigger", lambda: calls.append(True))
+    assert client.post("/admins/loans/rescore", headers=auth_headers).status_code == 403
+    response = client.post("/admins/loans/rescore", headers=admin_auth_headers)
+    assert response.status_code == 202
+    assert calls == [True]
@@ -0,0 +1,96 @@
+import asyncio
+from app.idempotency import IdempotencyMiddleware
+from app.models import Loan
+from app.utils.cache import TTLCache
+
+LOAN = {"loan_type": "personal", "amount": 50000, "tenure_months": 24, "interest_rate": 12.5}
+
+def test_retried_application_creates_one_loan(client, auth_headers, db_session):
+    """Test a retried POST with the same key replays the first response."""
+    headers = {**auth_headers, "Idempotency-Key": "apply-1"}
+    first = client.post("/customers/loans", json=LOAN, headers=headers)
+    second = client.post("/customers/loans", json=LOAN, headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert db_session.query(Loan).count() == 1
+
+    # A new key is a new application
+    client.post("/customers/loans", json=LOAN, headers={**auth_headers, "Idempotency-Key": "apply-2"})
+    assert db_session.query(Loan).count() == 2
+
+def test_retried_decision_returns_original_result(client, auth_headers, admin_auth_headers):
+    """Test a retried decision gets the original 200 instead of 'Loan is not pending'."""
+    loan_id = client.post("/customers/loans", json=LOAN, headers=auth_headers).json()["id"]
+    headers = {**admin_auth_headers, "Idempotency-Key": "decide-1"}
+    first = client.put(f"/admins/loans/{loan_id}", json={"status": "approved"}, headers=headers)
+    second = client.put(f"/admins/loans/{loan_id}", json={"status": "approved"}, headers=headers)
+    assert second.status_code == 200
+    assert second.json() == first.json()
+
+    without_key = client.put(f"/admins/loans/{loan_id}", json={"status": "approved"}, headers=admin_auth_headers)
+    assert without_key.status_code == 400
+
+def test_key_reused_for_different_request(client, auth_headers):
+    """Test a key cannot be reused with another body."""
+    headers = {**auth_headers, "Idempotency-Key": "apply-1"}
+    client.post("/customers/loans", json=LOAN, headers=headers)
+    response = client.post("/customers/loans", json={**LOAN, "amount": 60000}, headers=headers)
+    assert response.status_code == 422
+
+def test_keys_are_scoped_per_principal(client, auth_headers, admin_auth_headers, db_session):
+    """Test the same key from different users does not collide."""
+    from app.models import Customer
+    from app.auth import get_password_hash
+    db_session.add(Customer(name="Other", email="other@example.com", password_hash=get_password_hash("password123"), age=30))
+    db_session.commit()
+    token = client.post("/auth/token", data={"username": "other@example.com", "password": "password123"}).json()["access_token"]
+
+    client.post("/customers/loans", json=LOAN, headers={**auth_headers, "Idempotency-Key": "k"})
+    response = client.post("/customers/loans", json=LOAN, headers={"Authorization": f"Bearer {token}", "Idempotency-Key": "k"})
+    assert "idempotent-replayed" not in response.headers
+    assert db_session.query(Loan).count() == 2
+
+def test_invalid_key_rejected(client, auth_headers):
+    """Test overlong keys are rejected."""
+    response = client.post("/customers/loans", json=LOAN, headers={**auth_headers, "Idempotency-Key": "k" * 256})
+    assert response.status_code == 400
+
+def test_in_flight_retry_and_server_errors(client, auth_headers):
+    """Test a concurrent retry gets 409 and 5xx responses are not remembered."""
+    token = auth_headers["Authorization"].split()[1]
+    calls = []
+
+    async def downstream(scope, receive, send):
+        calls.append(scope["path"])
+        await receive()
+        status = 500 if len(calls) == 1 else 200
+        if len(calls) == 2:
+            # A retry arriving while this attempt runs
+            await middleware(scope, _receive, _capture(retry_responses))
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    store = TTLCache(maxsize=10, ttl=60)
+    middleware = IdempotencyMiddleware(downstream, store)
+    scope = {"type": "http", "method": "POST", "path": "/customers/loans",
+             "headers": [(b"authorization", f"Bearer {token}".encode()), (b"idempotency-key", b"k")]}
+
+    async def _receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    def _capture(sink):
+        async def send(message):
+            sink.append(message)
+        return send
+
+    retry_responses = []
+    first, second, third = [], [], []
+    asyncio.run(middleware(scope, _receive, _capture(first)))
+    asyncio.run(middleware(scope, _receive, _capture(second)))
+    asyncio.run(middleware(scope, _receive, _capture(third)))
+    assert [first[0]["status"], second[0]["status"], third[0]["status"]] == [500, 200, 200]
+    assert retry_responses[0]["status"] == 409
+    assert len(calls) == 2  # The third request was replayed
+    assert (b"idempotent-replayed", b"true") in third[0]["headers"]
@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from app.database import Base
+from app.migrations import create_missing_indexes, backfill_loan_emi
+from app.models import Loan, Customer, BankAdmin
+
+def _query_plan(db_session, query):
+    """Return SQLite's EXPLAIN QUERY PLAN output for an ORM query."""
+    bind = db_session.get_bind()
+    compiled = query.statement.compile(dialect=bind.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with bind.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+    return " | ".join(row[-1] for row in rows)
+
+def test_pending_loans_query_uses_status_index(db_session):
+    """Test the admin pending listing is served by the (status, applied_at) index."""
+    query = db_session.query(Loan).filter(Loan.status == "pending").order_by(Loan.applied_at, Loan.id).limit(51)
+    plan = _query_plan(db_session, query)
+    assert "USING INDEX ix_loans_status_applied_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_customer_loans_query_uses_customer_index(db_session):
+    """Test the customer loan history is served by the (customer_id, applied_at) index."""
+    query = db_session.query(Loan).filter(Loan.customer_id == 1).order_by(Loan.applied_at, Loan.id).limit(51)
+    plan = _query_plan(db_session, query)
+    assert "USING INDEX ix_loans_customer_id_applied_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+@pytest.mark.parametrize("model", [Customer, BankAdmin])
+def test_login_lookup_uses_email_index(db_session, model):
+    """Test the email lookup used by login and token auth hits the unique index."""
+    plan = _query_plan(db_session, db_session.query(model).filter(model.email == "a@example.com"))
+    assert "USING INDEX sqlite_autoindex" in plan
+
+def test_create_missing_indexes_on_existing_database(tmp_path):
+    """Test indexes are added to a database created before they were declared."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for index in Loan.__table__.indexes:
+            conn.exec_driver_sql(f"DROP INDEX {index.name}")
+
+    created = create_missing_indexes(engine)
+    assert set(created) == {index.name for index in Loan.__table__.indexes}
+    names = {index["name"] for index in inspect(engine).get_indexes("loans")}
+    assert "ix_loans_pending_applied_at" in names
+    assert create_missing_indexes(engine) == []
+
+def test_backfill_loan_emi(tmp_path):
+    """Test EMI is filled in for legacy loans that have none, except rejected ones."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Loan.__table__.insert(), [
+            {"customer_id": 1, "loan_type": "home", "amount": 100000, "tenure_months": 12, "interest_rate": 12, "status": "pending"},
+            {"customer_id": 1, "loan_type": "home", "amount": 100000, "tenure_months": 12, "interest_rate": 12, "status": "rejected"},
+        ])
+    assert backfill_loan_emi(engine) == 1
+    with engine.connect() as conn:
+        emis = dict(conn.execute(Loan.__table__.select().with_only_columns(Loan.status, Loan.emi)).all())
+    assert float(emis["pending"]) == 8884.88
+    assert emis["rejected"] is None
+
+def test_add_missing_columns_on_existing_database(tmp_path):
+    """Test columns added to the models are added to existing tables with their defaults."""
+    from app.migrations import add_missing_columns
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE customers (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, email VARCHAR(100) NOT NULL UNIQUE, "
+            "password_hash VARCHAR(255) NOT NULL, age INTEGER NOT NULL, phone VARCHAR(20), address VARCHAR(255), created_at DATETIME)"
+        )
+        conn.exec_driver_sql("INSERT INTO customers (name, email, password_hash, age) VALUES ('a', 'a@example.com', 'x', 30)")
+    assert "customers.token_version" in add_missing_columns(engine)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT token_version FROM customers").scalar() == 0
+    assert add_missing_columns(engine) == []
+
+def test_login_union_lookup_uses_email_indexes(db_session):
+    """Test both branches of the unified login lookup search by index."""
+    from app.auth import auth as auth_module
+    captured = {}
+    class Capture:
+        def execute(self, stmt):
+            captured["stmt"] = stmt
+            class Result:
+                def first(self):
+                    return None
+            return Result()
+    auth_module.lookup_principal(Capture(), "a@example.com")
+    bind = db_session.get_bind()
+    compiled = captured["stmt"].compile(dialect=bind.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with bind.connect() as conn:
+        plan = " | ".join(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params))
+    assert "SEARCH bank_admins USING INDEX sqlite_autoindex_bank_admins" in plan
+    assert "SEARCH customers USING INDEX sqlite_autoindex_customers" in plan
@@ -0,0 +1,141 @@
+import time
+import pytest
+from datetime import datetime, timedelta
+from app import jobs, notifications
+from app.config import settings
+from app.models import Job
+from tests.conftest import TestingSessionLocal
+
+LOAN = {"loan_type": "personal", "amount": 50000, "tenure_months": 24, "interest_rate": 12.5}
+
+def _deliveries(monkeypatch) -> list:
+    sent = []
+    monkeypatch.setattr(notifications, "deliver", lambda recipient, subject, body: sent.append((recipient, subject, body)))
+    return sent
+
+def test_routes_enqueue_notifications(client, auth_headers, admin_auth_headers, db_session, monkeypatch):
+    """Test registration, applications and decisions queue notifications that run after the request."""
+    sent = _deliveries(monkeypatch)
+    loan_ids = [client.post("/customers/loans", json=LOAN, headers=auth_headers).json()["id"] for _ in range(3)]
+    assert db_session.query(Job).count() == 3
+    assert sent == []
+
+    client.put(f"/admins/loans/{loan_ids[0]}", json={"status": "approved"}, headers=admin_auth_headers)
+    client.put("/admins/loans/bulk", json=[
+        {"loan_id": loan_ids[1], "status": "rejected"}, {"loan_id": loan_ids[2], "status": "approved"},
+    ], headers=admin_auth_headers)
+    assert jobs.drain(TestingSessionLocal) == 6
+    assert db_session.query(Job).count() == 0
+
+    assert {recipient for recipient, _, _ in sent} == {"test@example.com"}
+    subjects = [subject for _, subject, _ in sent]
+    assert subjects.count("Loan application received") == 3
+    assert subjects.count("Loan approved") == 2
+    assert "Loan rejected" in subjects
+    assert "Your EMI is" in next(body for _, subject, body in sent if subject == "Loan approved")
+
+def test_register_enqueues_welcome(client, db_session, monkeypatch):
+    """Test a new customer is welcomed once the registration commits."""
+    sent = _deliveries(monkeypatch)
+    client.post("/auth/register", json={
+        "name": "New Customer", "email": "new@example.com", "password": "password123", "age": 30,
+    })
+    jobs.drain(TestingSessionLocal)
+    assert sent == [("new@example.com", "Welcome", "Welcome to HCL Bank, New Customer.")]
+
+def test_flagged_application_notifies_admins(client, auth_headers, db_session, monkeypatch):
+    """Test a flagged application also queues a message to the admins."""
+    sent = _deliveries(monkeypatch)
+    monkeypatch.setattr(settings, "fraud_velocity_limit", 1)
+    from app import fraud
+    fraud.scorer = fraud.new_scorer()
+    for _ in range(5):
+        client.post("/customers/loans", json=LOAN, headers=auth_headers)
+    jobs.drain(TestingSessionLocal)
+    assert any(recipient == notifications.ADMINS for recipient, _, _ in sent)
+
+def test_rolled_back_transaction_enqueues_nothing(db_session):
+    """Test a job only exists if the transaction that queued it commits."""
+    with TestingSessionLocal() as db:
+        jobs.enqueue(db, "notify", {"customer_id": None, "subject": "s", "body": "b"})
+        db.rollback()
+    assert db_session.query(Job).count() == 0
+
+def test_failed_job_retries_with_backoff(db_session, monkeypatch):
+    """Test failures are retried after exponentially growing delays, then kept as failed."""
+    monkeypatch.setattr(settings, "job_max_attempts", 3)
+    calls = []
+
+    def flaky(db, payload):
+        calls.append(payload)
+        raise RuntimeError("gateway down")
+    monkeypatch.setitem(jobs.handlers, "flaky", flaky)
+
+    with TestingSessionLocal() as db:
+        job = jobs.enqueue(db, "flaky", {"n": 1})
+        db.commit()
+        job_id = job.id
+    now = datetime.utcnow()
+    assert jobs.run_next(TestingSessionLocal, now) is True
+    job = db_session.get(Job, job_id)
+    assert (job.status, job.attempts, job.last_error) == ("queued", 1, "RuntimeError: gateway down")
+    assert job.run_at >= now + timedelta(seconds=settings.job_backoff_base_seconds)
+    assert jobs.run_next(TestingSessionLocal, now) is False  # Not due yet
+
+    assert jobs.run_next(TestingSessionLocal, now + timedelta(seconds=1.5)) is True
+    db_session.expire_all()
+    assert db_session.get(Job, job_id).run_at >= now + timedelta(seconds=2)  # Doubled
+    assert jobs.drain(TestingSessionLocal, now + timedelta(hours=1)) == 1
+    db_session.expire_all()
+    assert db_session.get(Job, job_id).status == "failed"
+    assert len(calls) == 3
+    assert jobs.backoff(20) == settings.job_backoff_max_seconds
+
+def test_stale_jobs_requeued_and_stats(db_session):
+    """Test jobs abandoned while running go back to the queue, and lag is measured from the oldest due job."""
+    now = datetime.utcnow()
+    db_session.add_all([
+        Job(kind="notify", payload="{}", status="running", max_attempts=5, run_at=now - timedelta(hours=1), locked_at=now - timedelta(hours=1)),
+        Job(kind="notify", payload="{}", status="queued", max_attempts=5, run_at=now - timedelta(seconds=30)),
+        Job(kind="notify", payload="{}", status="queued", max_attempts=5, run_at=now + timedelta(hours=1)),
+    ])
+    db_session.commit()
+    assert jobs.queue_stats(db_session, now) == {"counts": {"queued": 2, "running": 1}, "lag_seconds": 30.0}
+    assert jobs.requeue_stale(db_session, now) == 1
+    assert jobs.queue_stats(db_session, now) == {"counts": {"queued": 3}, "lag_seconds": 3600.0}
+
+def test_metrics_report_job_queue(client, auth_headers):
+    """Test queue depth and lag are exported on /metrics."""
+    client.post("/customers/loans", json=LOAN, headers=auth_headers)
+    body = client.get("/metrics").text
+    assert 'job_queue_jobs{status="queued"} 1' in body
+    assert "job_queue_lag_seconds" in body
+
+@pytest.fixture
+def worker_pool(db_session, monkeypatch):
+    """A one-thread pool on the test database, stopped before the tables are dropped."""
+    monkeypatch.setattr(settings, "job_workers", 1)
+    pool = jobs.JobWorkerPool(TestingSessionLocal)
+    monkeypatch.setattr(jobs, "pool", pool)
+    yield pool
+    pool.stop()
+
+def test_worker_pool_runs_jobs_after_commit(worker_pool, monkeypatch):
+    """Test committing a job wakes the worker threads, which run it."""
+    done = []
+    monkeypatch.setitem(jobs.handlers, "record", lambda db, payload: done.append(payload["n"]))
+    with TestingSessionLocal() as db:
+        jobs.enqueue(db, "record", {"n": 7})
+        db.commit()
+    deadline = time.monotonic() + 5
+    while not done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert done == [7]
+
+def test_worker_pool_stop_joins_threads(worker_pool):
+    """Test stop() ends the worker threads."""
+    worker_pool.ensure_started()
+    threads = list(worker_pool._threads)
+    worker_pool.stop()
+    assert worker_pool._threads == []
+    assert not any(thread.is_alive() for thread in threads)
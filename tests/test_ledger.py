@@ -0,0 +1,191 @@
+import random
+import threading
+import pytest
+from sqlalchemy import func, select
+from app.ledger import PostingEngine, Transfer, TransferRefused, post_transfers
+from app.models import Account, LedgerEntry
+from tests.conftest import TestingSessionLocal
+
+def _open_account(client, headers, account_type="savings"):
+    response = client.post("/customers/accounts", json={"account_type": account_type}, headers=headers)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def _assert_ledger_consistent(db):
+    """Every balance is the running total of its entries, and every transfer nets to zero."""
+    sums = dict(db.execute(select(LedgerEntry.account_id, func.sum(LedgerEntry.amount_minor)).group_by(LedgerEntry.account_id)).all())
+    for account_id, balance in db.execute(select(Account.id, Account.balance_minor)):
+        assert balance == sums.get(account_id, 0)
+    unbalanced = db.execute(
+        select(LedgerEntry.transfer_id).group_by(LedgerEntry.transfer_id).having(func.sum(LedgerEntry.amount_minor) != 0)
+    ).all()
+    assert unbalanced == []
+    assert db.scalar(select(func.sum(Account.balance_minor))) in (0, None)
+
+def test_open_deposit_and_transfer(client, auth_headers, admin_auth_headers, db_session):
+    """Test the account, deposit, transfer and statement flow."""
+    savings = _open_account(client, auth_headers)
+    current = _open_account(client, auth_headers, "current")
+    assert client.post("/customers/accounts", json={"account_type": "cash"}, headers=auth_headers).status_code == 400
+
+    response = client.post(f"/admins/accounts/{savings}/deposits", json={"amount": "1000.50"}, headers=admin_auth_headers)
+    assert response.status_code == 200
+    assert response.json()["balance"] == 1000.50
+
+    response = client.post("/customers/transfers", json={
+        "from_account_id": savings, "to_account_id": current, "amount": "250.25", "reference": "rent",
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["balance"] == 750.25
+
+    balances = {account["id"]: account["balance"] for account in client.get("/customers/accounts", headers=auth_headers).json()}
+    assert balances == {savings: 750.25, current: 250.25}
+
+    statement = client.get(f"/customers/accounts/{savings}/entries?limit=1", headers=auth_headers).json()
+    assert statement["balance"] == 750.25
+    assert [(entry["amount"], entry["balance"], entry["reference"]) for entry in statement["entries"]] == [(-250.25, 750.25, "rent")]
+    older = client.get(f"/customers/accounts/{savings}/entries?cursor={statement['next_cursor']}", headers=auth_headers).json()
+    assert [entry["amount"] for entry in older["entries"]] == [1000.50]
+    assert older["next_cursor"] is None
+    _assert_ledger_consistent(db_session)
+
+def test_transfer_refusals(client, auth_headers, admin_auth_headers, db_session):
+    """Test overdrafts, foreign accounts and invalid amounts are refused without writing anything."""
+    savings = _open_account(client, auth_headers)
+    current = _open_account(client, auth_headers, "current")
+    client.post(f"/admins/accounts/{savings}/deposits", json={"amount": 100}, headers=admin_auth_headers)
+
+    def transfer(**body):
+        return client.post("/customers/transfers", json={"from_account_id": savings, "to_account_id": current, "amount": 10, **body}, headers=auth_headers)
+
+    response = transfer(amount="100.01")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient funds"
+    assert transfer(to_account_id=savings).status_code == 400
+    assert transfer(to_account_id=999).status_code == 404
+    assert transfer(amount=0).status_code == 422
+    assert transfer(amount="1.001").status_code == 422
+
+    other = Account(customer_id=None, account_type="savings")
+    db_session.add(other)
+    db_session.commit()
+    assert transfer(from_account_id=other.id, to_account_id=savings).status_code == 404
+    assert db_session.query(LedgerEntry).count() == 2  # Only the deposit
+    _assert_ledger_consistent(db_session)
+
+def test_ledger_entries_are_append_only(client, auth_headers, admin_auth_headers, db_session):
+    """Test the ORM refuses to rewrite history."""
+    account_id = _open_account(client, auth_headers)
+    client.post(f"/admins/accounts/{account_id}/deposits", json={"amount": 5}, headers=admin_auth_headers)
+    entry = db_session.query(LedgerEntry).first()
+    entry.amount_minor = 0
+    with pytest.raises(ValueError):
+        db_session.commit()
+
+def test_post_transfers_in_one_batch(db_session):
+    """Test transfers in a batch see the balances left by earlier ones."""
+    accounts = [Account(account_type="cash"), Account(account_type="savings"), Account(account_type="savings")]
+    db_session.add_all(accounts)
+    db_session.commit()
+    cash, first, second = (account.id for account in accounts)
+    results = post_transfers(db_session, [
+        Transfer(first, second, 100),  # Nothing to send yet
+        Transfer(cash, first, 500),
+        Transfer(first, second, 400),
+        Transfer(first, second, 200),  # Only 100 left
+        Transfer(first, 999, 50),  # Refunded within the batch
+    ])
+    db_session.commit()
+    assert [type(result).__name__ for result in results] == [
+        "TransferRefused", "PostedTransfer", "PostedTransfer", "TransferRefused", "TransferRefused",
+    ]
+    assert results[2].from_balance_minor == 100
+    assert db_session.get(Account, first).balance_minor == 100
+    _assert_ledger_consistent(db_session)
+
+@pytest.mark.parametrize("max_batch", [0, 256])
+def test_concurrent_transfers_conserve_money(db_session, max_batch):
+    """Stress: many threads moving money between a few accounts never create or destroy any."""
+    posting = PostingEngine(TestingSessionLocal, max_batch=max_batch)
+    accounts = [Account(account_type="cash")] + [Account(account_type="savings") for _ in range(8)]
+    db_session.add_all(accounts)
+    db_session.commit()
+    cash, *customer_ids = (account.id for account in accounts)
+    with TestingSessionLocal() as db:
+        for account_id in customer_ids:
+            posting.post(db, Transfer(cash, account_id, 10000))
+
+    threads, per_thread = 8, 50
+    posted, refused = [], []
+
+    def worker(index: int):
+        rng = random.Random(index)
+        for _ in range(per_thread):
+            source, target = rng.sample(customer_ids, 2)
+            with TestingSessionLocal() as db:
+                try:
+                    posting.post(db, Transfer(source, target, rng.randint(1, 5000)))
+                    posted.append(1)
+                except TransferRefused:
+                    refused.append(1)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    assert len(posted) + len(refused) == threads * per_thread
+    db_session.expire_all()
+    assert sum(db_session.get(Account, account_id).balance_minor for account_id in customer_ids) == 8 * 10000
+    assert all(db_session.get(Account, account_id).balance_minor >= 0 for account_id in customer_ids)
+    _assert_ledger_consistent(db_session)
+
+def test_waiting_requests_leave_connections_for_the_writer(db_session):
+    """Test requests that read before posting do not starve the writer of pooled connections."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from tests.conftest import SQLALCHEMY_DATABASE_URL
+    small_pool = create_engine(
+        SQLALCHEMY_DATABASE_URL, pool_size=2, max_overflow=0, pool_timeout=2,
+        connect_args={"check_same_thread": False},
+    )
+    SmallSession = sessionmaker(bind=small_pool, autoflush=False)
+    posting = PostingEngine(SmallSession, max_batch=64)
+    accounts = [Account(account_type="cash"), Account(account_type="savings")]
+    db_session.add_all(accounts)
+    db_session.commit()
+    cash, savings = (account.id for account in accounts)
+    errors = []
+
+    def request():
+        # Like the routes: a check on the request's session, then the post
+        with SmallSession() as db:
+            db.get(Account, savings)
+            try:
+                posting.post(db, Transfer(cash, savings, 100))
+            except Exception as exc:
+                errors.append(exc)
+
+    workers = [threading.Thread(target=request) for _ in range(8)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    small_pool.dispose()
+    assert errors == []
+    db_session.expire_all()
+    assert db_session.get(Account, savings).balance_minor == 800
+
+def test_retried_transfer_posts_once(client, auth_headers, admin_auth_headers, db_session):
+    """Test a transfer retried with the same Idempotency-Key moves the money once."""
+    savings = _open_account(client, auth_headers)
+    current = _open_account(client, auth_headers, "current")
+    client.post(f"/admins/accounts/{savings}/deposits", json={"amount": 100}, headers=admin_auth_headers)
+    headers = {**auth_headers, "Idempotency-Key": "transfer-1"}
+    body = {"from_account_id": savings, "to_account_id": current, "amount": 30}
+    first = client.post("/customers/transfers", json=body, headers=headers)
+    second = client.post("/customers/transfers", json=body, headers=headers)
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert db_session.get(Account, savings).balance_minor == 7000
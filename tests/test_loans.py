@@ -1,5 +1,13 @@
+import threading
 import pytest
+from datetime import datetime, timedelta
 from app.models import Loan
+from app.utils import calculate_emi
+from app.aggregates import verify_aggregates
+from app.routers.admins import update_loan_status
+from app.schemas import LoanUpdate, TokenData
+from fastapi import HTTPException
+from tests.conftest import TestingSessionLocal
 
 def test_apply_for_loan(client, auth_headers, test_customer, db_session):
     """Test loan application."""
@@ -15,7 +23,7 @@ def test_apply_for_loan(client, auth_headers, test_customer, db_session):
     assert data["loan_type"] == "personal"
     assert data["amount"] == 50000
     assert data["status"] == "pending"
-    assert data["emi"] is None  # Not calculated yet
+    assert data["emi"] == calculate_emi(50000, 12.5, 24)  # Stored at application time
 
 def test_get_customer_loans(client, auth_headers, test_customer, db_session):
     """Test getting customer's loan history."""
@@ -34,7 +42,7 @@ def test_get_customer_loans(client, auth_headers, test_customer, db_session):
 
     response = client.get("/customers/loans", headers=auth_headers)
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["loans"]
     assert len(data) == 1
     assert data[0]["loan_type"] == "home"
     assert data[0]["status"] == "approved"
@@ -55,7 +63,7 @@ def test_get_pending_loans_admin(client, admin_auth_headers, db_session, test_cu
 
     response = client.get("/admins/loans", headers=admin_auth_headers)
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["loans"]
     assert len(data) == 1
     assert data[0]["loan_type"] == "car"
     assert data[0]["status"] == "pending"
@@ -146,4 +154,325 @@ def test_unauthorized_access(client):
     assert response.status_code == 401
 
     response = client.get("/admins/loans")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_pending_loans_listing_does_not_dirty_session(client, admin_auth_headers, db_session, test_customer):
+    """Test admin listing serves stored EMI without modifying loans."""
+    loan = Loan(
+        customer_id=test_customer.id,
+        loan_type="car",
+        amount=30000,
+        tenure_months=36,
+        interest_rate=10.0,
+        status="pending"
+    )
+    db_session.add(loan)
+    db_session.commit()
+    assert float(loan.emi) == calculate_emi(30000, 10.0, 36)
+
+    response = client.get("/admins/loans", headers=admin_auth_headers)
+    assert response.status_code == 200
+    assert response.json()["loans"][0]["emi"] == calculate_emi(30000, 10.0, 36)
+    assert not db_session.dirty
+
+def test_loan_emi_recalculated_when_terms_change(db_session, test_customer):
+    """Test stored EMI follows changes to amount, rate or tenure."""
+    loan = Loan(
+        customer_id=test_customer.id,
+        loan_type="home",
+        amount=100000,
+        tenure_months=12,
+        interest_rate=12.0,
+        status="pending"
+    )
+    db_session.add(loan)
+    db_session.commit()
+    assert float(loan.emi) == 8884.88
+
+    loan.tenure_months = 24
+    db_session.commit()
+    assert float(loan.emi) == calculate_emi(100000, 12.0, 24)
+
+    loan.status = "approved"
+    db_session.commit()
+    assert float(loan.emi) == calculate_emi(100000, 12.0, 24)
+
+def _create_loans(db_session, customer_id, count, applied_at, **fields):
+    """Create loans sharing one applied_at timestamp."""
+    defaults = {"loan_type": "personal", "amount": 10000, "tenure_months": 12, "interest_rate": 10.0, "status": "pending"}
+    defaults.update(fields)
+    loans = [Loan(customer_id=customer_id, applied_at=applied_at, **defaults) for _ in range(count)]
+    db_session.add_all(loans)
+    db_session.commit()
+    return loans
+
+def test_get_customer_loans_keyset_pagination(client, auth_headers, test_customer, db_session):
+    """Test paging through loans with next_cursor, including rows with equal applied_at."""
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    loans = _create_loans(db_session, test_customer.id, 3, now)
+    loans += _create_loans(db_session, test_customer.id, 2, now + timedelta(days=1))
+    expected = [loan.id for loan in loans]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/customers/loans", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["loans"]) <= 2
+        seen += [loan["id"] for loan in data["loans"]]
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+def test_get_pending_loans_filters(client, admin_auth_headers, test_customer, db_session):
+    """Test admin listing filters by type, amount range, date range and status."""
+    day = datetime(2026, 1, 1)
+    _create_loans(db_session, test_customer.id, 1, day, loan_type="car", amount=5000)
+    _create_loans(db_session, test_customer.id, 1, day + timedelta(days=10), loan_type="car", amount=50000)
+    _create_loans(db_session, test_customer.id, 1, day, loan_type="home", amount=50000)
+    _create_loans(db_session, test_customer.id, 1, day, loan_type="car", amount=50000, status="approved")
+
+    def ids(**params):
+        response = client.get("/admins/loans", params=params, headers=admin_auth_headers)
+        assert response.status_code == 200
+        return [(loan["loan_type"], loan["amount"], loan["status"]) for loan in response.json()["loans"]]
+
+    assert ids(loan_type="car") == [("car", 5000, "pending"), ("car", 50000, "pending")]
+    assert ids(loan_type="car", min_amount=10000) == [("car", 50000, "pending")]
+    assert ids(max_amount=10000) == [("car", 5000, "pending")]
+    assert ids(applied_from=(day + timedelta(days=1)).isoformat()) == [("car", 50000, "pending")]
+    assert ids(applied_to=(day + timedelta(days=1)).isoformat(), loan_type="home") == [("home", 50000, "pending")]
+    assert ids(status="approved") == [("car", 50000, "approved")]
+
+def test_get_customer_loans_invalid_cursor(client, auth_headers):
+    """Test a malformed cursor is rejected."""
+    response = client.get("/customers/loans", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+    assert "Invalid cursor" in response.json()["detail"]
+
+def test_export_loans_ndjson(client, admin_auth_headers, test_customer, db_session):
+    """Test admin export streams every loan as NDJSON."""
+    import json
+    _create_loans(db_session, test_customer.id, 3, datetime(2026, 1, 1))
+    _create_loans(db_session, test_customer.id, 2, datetime(2026, 1, 2), status="approved")
+
+    response = client.get("/admins/loans/export", headers=admin_auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 5
+    assert [row["status"] for row in rows] == ["pending"] * 3 + ["approved"] * 2
+    assert rows[0]["amount"] == 10000
+    assert rows[0]["applied_at"].startswith("2026-01-01T00:00:00")
+
+def test_export_loans_csv_with_filters(client, admin_auth_headers, test_customer, db_session):
+    """Test admin CSV export applies the listing filters."""
+    import csv, io
+    _create_loans(db_session, test_customer.id, 2, datetime(2026, 1, 1), loan_type="car")
+    _create_loans(db_session, test_customer.id, 1, datetime(2026, 1, 1), loan_type="home")
+
+    response = client.get("/admins/loans/export", params={"format": "csv", "loan_type": "car"}, headers=admin_auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 2
+    assert {row["loan_type"] for row in rows} == {"car"}
+    assert rows[0]["emi"] == "879.16"
+
+def test_export_loans_requires_admin(client, auth_headers):
+    """Test customers cannot export loans."""
+    response = client.get("/admins/loans/export", headers=auth_headers)
+    assert response.status_code == 403
+
+def test_export_loans_invalid_format(client, admin_auth_headers):
+    """Test unsupported export formats are rejected."""
+    response = client.get("/admins/loans/export", params={"format": "xml"}, headers=admin_auth_headers)
+    assert response.status_code == 422
+
+def test_bulk_update_loan_status(client, admin_auth_headers, test_customer, db_session):
+    """Test bulk decisions apply in one call and report conflicts and missing loans."""
+    pending = _create_loans(db_session, test_customer.id, 3, datetime(2026, 1, 1))
+    done = _create_loans(db_session, test_customer.id, 1, datetime(2026, 1, 1), status="rejected")
+    pending_ids = [loan.id for loan in pending]
+    done_id = done[0].id
+    expected_emi = float(pending[0].emi)
+
+    decisions = [
+        {"loan_id": pending_ids[0], "status": "approved"},
+        {"loan_id": pending_ids[1], "status": "rejected"},
+        {"loan_id": pending_ids[2], "status": "approved"},
+        {"loan_id": pending_ids[2], "status": "rejected"},
+        {"loan_id": done_id, "status": "approved"},
+        {"loan_id": 999, "status": "approved"},
+    ]
+    response = client.put("/admins/loans/bulk", json=decisions, headers=admin_auth_headers)
+    assert response.status_code == 200
+    results = [(r["loan_id"], r["result"], r["status"], r["emi"]) for r in response.json()]
+    assert results == [
+        (pending_ids[0], "updated", "approved", expected_emi),
+        (pending_ids[1], "updated", "rejected", None),
+        (pending_ids[2], "updated", "approved", expected_emi),
+        (pending_ids[2], "conflict", "approved", expected_emi),
+        (done_id, "conflict", "rejected", None),
+        (999, "not_found", None, None),
+    ]
+
+    statuses = dict(db_session.query(Loan.id, Loan.status).all())
+    assert statuses[pending_ids[0]] == "approved"
+    assert statuses[pending_ids[1]] == "rejected"
+    assert db_session.query(Loan).filter(Loan.updated_at.isnot(None)).count() == 3
+
+def test_bulk_update_computes_missing_emi(client, admin_auth_headers, test_customer, db_session):
+    """Test bulk approval fills in EMI for legacy loans stored without one."""
+    db_session.execute(Loan.__table__.insert(), [{
+        "customer_id": test_customer.id, "loan_type": "home", "amount": 100000,
+        "tenure_months": 12, "interest_rate": 12, "status": "pending",
+    }])
+    db_session.commit()
+    loan_id = db_session.query(Loan.id).scalar()
+
+    response = client.put("/admins/loans/bulk", json=[{"loan_id": loan_id, "status": "approved"}], headers=admin_auth_headers)
+    assert response.status_code == 200
+    assert response.json()[0]["emi"] == 8884.88
+    assert float(db_session.query(Loan.emi).scalar()) == 8884.88
+
+def test_bulk_update_requires_admin(client, auth_headers):
+    """Test customers cannot make bulk decisions."""
+    response = client.put("/admins/loans/bulk", json=[], headers=auth_headers)
+    assert response.status_code == 403
+
+def test_get_loan_schedule_paginated(client, auth_headers, test_customer, db_session):
+    """Test the repayment schedule is served a page at a time."""
+    loan = _create_loans(db_session, test_customer.id, 1, datetime(2026, 1, 1), amount=5000000, tenure_months=360, interest_rate=8.5)[0]
+    loan_id = loan.id
+
+    response = client.get(f"/customers/loans/{loan_id}/schedule", params={"limit": 100}, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["installments"] == 360
+    assert data["emi"] == calculate_emi(5000000, 8.5, 360)
+    assert [row["installment"] for row in data["rows"]] == list(range(1, 101))
+    assert data["next_offset"] == 100
+
+    response = client.get(f"/customers/loans/{loan_id}/schedule", params={"offset": 300, "limit": 100}, headers=auth_headers)
+    data = response.json()
+    assert len(data["rows"]) == 60
+    assert data["rows"][-1]["balance"] == 0
+    assert data["next_offset"] is None
+
+def test_get_loan_schedule_ndjson(client, auth_headers, test_customer, db_session):
+    """Test the schedule streams as NDJSON."""
+    import json
+    loan_id = _create_loans(db_session, test_customer.id, 1, datetime(2026, 1, 1))[0].id
+
+    response = client.get(f"/customers/loans/{loan_id}/schedule", params={"format": "ndjson"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 12
+    assert round(sum(row["principal"] for row in rows), 2) == 10000
+    assert rows[-1]["balance"] == 0
+
+def test_get_loan_schedule_other_customer(client, auth_headers, db_session):
+    """Test customers cannot read schedules of other customers' loans."""
+    from app.models import Customer
+    other = Customer(name="Other", email="other@example.com", password_hash="x", age=40)
+    db_session.add(other)
+    db_session.commit()
+    loan_id = _create_loans(db_session, other.id, 1, datetime(2026, 1, 1))[0].id
+
+    response = client.get(f"/customers/loans/{loan_id}/schedule", headers=auth_headers)
+    assert response.status_code == 404
+
+def test_export_loan_schedules(client, admin_auth_headers, test_customer, db_session):
+    """Test admins can stream schedules for a portfolio of approved loans."""
+    import json
+    approved = _create_loans(db_session, test_customer.id, 2, datetime(2026, 1, 1), status="approved", tenure_months=6)
+    _create_loans(db_session, test_customer.id, 1, datetime(2026, 1, 1), status="pending")
+    approved_ids = [loan.id for loan in approved]
+
+    response = client.get("/admins/loans/schedules", headers=admin_auth_headers)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["loan_id"] for row in rows] == [approved_ids[0]] * 6 + [approved_ids[1]] * 6
+    assert [row["installment"] for row in rows[:6]] == list(range(1, 7))
+
+def test_decision_with_stale_version(client, admin_auth_headers, db_session, test_customer):
+    """Test a decision naming an outdated version is refused and the version moves on."""
+    loan = Loan(customer_id=test_customer.id, loan_type="personal", amount=25000, tenure_months=12, interest_rate=11.0)
+    db_session.add(loan)
+    db_session.commit()
+    loan_id = loan.id
+    assert client.get("/admins/loans", headers=admin_auth_headers).json()["loans"][0]["version"] == 0
+
+    response = client.put(f"/admins/loans/{loan_id}", json={"status": "approved", "version": 3}, headers=admin_auth_headers)
+    assert response.status_code == 409
+
+    response = client.put(f"/admins/loans/{loan_id}", json={"status": "approved", "version": 0}, headers=admin_auth_headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == 1
+
+    client.put("/admins/loans/bulk", json=[{"loan_id": loan_id, "status": "rejected"}], headers=admin_auth_headers)
+    assert db_session.get(Loan, loan_id).version == 1  # Bulk only moves pending loans
+
+def test_concurrent_decisions_on_one_loan(db_session, test_customer):
+    """Test many admins deciding one loan at once: exactly one wins, the rest get 400 or 409."""
+    loan = Loan(customer_id=test_customer.id, loan_type="home", amount=900000, tenure_months=240, interest_rate=8.5)
+    db_session.add(loan)
+    db_session.commit()
+    loan_id = loan.id
+    threads = 16
+    barrier = threading.Barrier(threads)
+    outcomes = []
+
+    def decide(index: int):
+        status = "approved" if index % 2 else "rejected"
+        barrier.wait()
+        with TestingSessionLocal() as db:
+            try:
+                update_loan_status(loan_id, LoanUpdate(status=status), db=db, current_admin=TokenData(is_admin=True, user_id=1))
+                outcomes.append(200)
+            except HTTPException as exc:
+                outcomes.append(exc.status_code)
+
+    workers = [threading.Thread(target=decide, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    assert outcomes.count(200) == 1
+    assert set(outcomes) <= {200, 400, 409}
+    db_session.expire_all()
+    decided = db_session.get(Loan, loan_id)
+    assert decided.version == 1
+    assert decided.status in ("approved", "rejected")
+    assert verify_aggregates(db_session) == []
+
+def test_loan_listings_serialize_like_response_model(client, auth_headers, admin_auth_headers, test_customer, db_session):
+    """The row fast path writes exactly the JSON response_model would, and keeps the documented schema."""
+    from app.schemas import AdminLoanList, LoanList
+    for index, (amount, rate) in enumerate([(12345.67, 10.25), (999.99, 7.5), (50000, 12)]):
+        db_session.add(Loan(
+            customer_id=test_customer.id, loan_type="personal", amount=amount, tenure_months=12 + index,
+            interest_rate=rate, emi=calculate_emi(amount, rate, 12 + index), status="pending",
+            applied_at=datetime(2026, 1, 1 + index, 9, 30), fraud_score=0.125 * index, flagged=index == 2,
+        ))
+    db_session.commit()
+    loans = db_session.query(Loan).order_by(Loan.applied_at, Loan.id).all()
+
+    response = client.get("/admins/loans", headers=admin_auth_headers)
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == AdminLoanList(loans=loans).model_dump_json().encode()
+    response = client.get("/customers/loans", params={"limit": 2}, headers=auth_headers)
+    expected = LoanList.model_validate({"loans": loans[:2], "next_cursor": response.json()["next_cursor"]})
+    assert response.content == expected.model_dump_json().encode()
+
+    paths = client.get("/openapi.json").json()["paths"]
+    assert paths["/customers/loans"]["get"]["responses"]["200"]["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/LoanList"}
+    assert paths["/admins/loans"]["get"]["responses"]["200"]["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/AdminLoanList"}
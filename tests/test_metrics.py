@@ -0,0 +1,50 @@
+import re
+from app.metrics import Histogram, Gauge
+
+def _sample(text, name, **labels):
+    """Return the value of the sample with exactly these labels, or None."""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}{{{re.escape(label_text)}}} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_histogram_render():
+    """Test histogram buckets are cumulative and carry sum and count."""
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+    text = "\n".join(histogram.render())
+    assert _sample(text, "demo_seconds_bucket", route="/a", le="0.1") == 1
+    assert _sample(text, "demo_seconds_bucket", route="/a", le="1") == 2
+    assert _sample(text, "demo_seconds_bucket", route="/a", le="+Inf") == 3
+    assert _sample(text, "demo_seconds_count", route="/a") == 3
+    assert _sample(text, "demo_seconds_sum", route="/a") == 5.55
+    assert "# TYPE demo_seconds histogram" in text
+
+def test_gauge_render():
+    gauge = Gauge("demo_items", "Demo.", lambda: {"a": 1, "b": 2.5}, ("state",))
+    text = "\n".join(gauge.render())
+    assert _sample(text, "demo_items", state="a") == 1
+    assert _sample(text, "demo_items", state="b") == 2.5
+
+def test_metrics_endpoint_reports_routes_and_sql(client, auth_headers):
+    """Test /metrics exposes per-route latency and SQL statement counts."""
+    before = _sample(client.get("/metrics").text, "http_request_sql_queries_count", method="GET", route="/customers/loans") or 0
+    for _ in range(3):
+        assert client.get("/customers/loans", headers=auth_headers).status_code == 200
+    client.get("/no/such/path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert _sample(text, "http_request_duration_seconds_count", method="GET", route="/customers/loans", status="200") >= 3
+    assert _sample(text, "http_request_sql_queries_count", method="GET", route="/customers/loans") == before + 3
+    # Principal auth means the only statement per request is the loan page
+    assert _sample(text, "http_request_sql_queries_bucket", method="GET", route="/customers/loans", le="1") >= 3
+    assert _sample(text, "http_request_duration_seconds_count", method="GET", route="unmatched", status="404") >= 1
+    assert _sample(text, "password_hash_duration_seconds_count", operation="verify") >= 1
+    assert _sample(text, "token_cache_lookups_total", result="hit") >= 2
+    assert "jwt_decode_duration_seconds_count" in text
+    assert "sql_statement_duration_seconds_count{verb=\"SELECT\"}" in text
+    assert _sample(text, "threadpool_threads", state="limit") > 0
@@ -0,0 +1,74 @@
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app import replicas
+from app.database import build_engine
+from app.main import app
+from app.replicas import READ_PRIMARY_COOKIE, ReadRouter, get_read_db
+from tests.conftest import TestingSessionLocal, engine
+
+LOAN = {"loan_type": "personal", "amount": 100000, "tenure_months": 12, "interest_rate": 12}
+
+@pytest.fixture(scope="function")
+def replica(client, tmp_path, monkeypatch):
+    """A second SQLite file serving get_read_db; it only sees the primary as of the last replicate() call."""
+    path = tmp_path / "replica.db"
+    replica_engine = build_engine(f"sqlite:///{path}")
+
+    def replicate():
+        with sqlite3.connect(engine.url.database) as source, sqlite3.connect(path) as target:
+            source.backup(target)
+
+    replicate()
+    monkeypatch.setattr(replicas, "read_router", ReadRouter(TestingSessionLocal, [sessionmaker(bind=replica_engine)]))
+    monkeypatch.delitem(app.dependency_overrides, get_read_db)
+    yield replicate
+    replica_engine.dispose()
+
+def _loan_ids(client, headers):
+    response = client.get("/customers/loans", headers=headers)
+    assert response.status_code == 200
+    return [loan["id"] for loan in response.json()["loans"]]
+
+def test_read_your_writes_while_replica_lags(client, auth_headers, replica):
+    """Test a client reads its own write from the primary while other clients read the lagging replica."""
+    client.cookies.clear()
+    response = client.post("/customers/loans", json=LOAN, headers=auth_headers)
+    assert response.status_code == 200
+    loan_id = response.json()["id"]
+    assert float(response.cookies[READ_PRIMARY_COOKIE]) > time.time()
+
+    assert _loan_ids(client, auth_headers) == [loan_id]
+    assert replicas.read_router.reads == {"primary": 1, "replica": 0}
+
+    # Another client session has no cookie and reads the replica, which has not caught up yet
+    client.cookies.clear()
+    assert _loan_ids(client, auth_headers) == []
+    replica()
+    assert _loan_ids(client, auth_headers) == [loan_id]
+    assert replicas.read_router.reads == {"primary": 1, "replica": 2}
+
+def test_reads_without_commit_set_no_cookie(client, auth_headers, replica):
+    """Test reads leave the client free to use replicas."""
+    client.cookies.clear()
+    response = client.get("/customers/loans", headers=auth_headers)
+    assert response.status_code == 200
+    assert READ_PRIMARY_COOKIE not in response.cookies
+
+def test_read_router_round_robin_and_window():
+    """Test replicas are used in turn, and the primary only inside a client's window."""
+    router = ReadRouter("primary", ["a", "b"])
+    assert [router.session_factory() for _ in range(3)] == ["a", "b", "a"]
+    assert router.session_factory(time.time() + 5) == "primary"
+    assert router.session_factory(time.time() - 1) == "b"
+    assert ReadRouter("primary", []).session_factory() == "primary"
+
+def test_read_router_counts_concurrent_reads():
+    """Test reads picked from many threads are all counted and spread evenly over the replicas."""
+    router = ReadRouter("primary", ["a", "b"])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        picks = list(pool.map(lambda _: router.session_factory(), range(4000)))
+    assert router.reads == {"primary": 0, "replica": 4000}
+    assert picks.count("a") == picks.count("b") == 2000